@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Anthropic Messages API for load testing.
+Answers POST /v1/messages with canned sassy replies after a configurable
+latency, and injects errors at a configurable rate.
+
+Usage:
+    python benchmarks/fake_claude_server.py --port 8765 --latency-ms 400 --error-rate 0.02
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 python src/mcp_server.py
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+
+CANNED_REPLIES = [
+    "Bestie, who taught you biology? 💀 Your liver and kidneys detox you for free every single day, "
+    "no lemon water or pricey cleanse required! Save your money for snacks ✨ Source: Mayo Clinic",
+    "That's like, literal Nutrition 101 😤 No drink melts belly fat instantly, and spot reduction is a myth. "
+    "Eat well, move more and sleep, sorry bestie 💅 Source: Harvard Health",
+    "Essential oils smell nice but cure nothing 🤡 Real medicine needs real evidence from real trials, "
+    "not a diffuser and good vibes. Talk to your doctor, period 👑 Source: NIH",
+]
+
+
+class FakeClaudeConfig:
+    """Latency and error distribution for the stub server."""
+
+    def __init__(self, latency_ms: float = 400.0, latency_sigma: float = 0.3,
+                 error_rate: float = 0.0, error_status: int = 529):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def sample_latency(self) -> float:
+        """Lognormal latency in seconds with the configured median."""
+        if self.latency_ms <= 0:
+            return 0.0
+        return random.lognormvariate(0.0, self.latency_sigma) * self.latency_ms / 1000.0
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+
+def _make_handler(config: FakeClaudeConfig):
+    class FakeClaudeHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+        def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("request-id", f"req_fake_{uuid.uuid4().hex[:12]}")
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self) -> None:
+            if self.path == "/stats":
+                self._send_json(200, config.get_stats())
+            else:
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            time.sleep(config.sample_latency())
+
+            with config.lock:
+                config.requests += 1
+                failed = random.random() < config.error_rate
+                if failed:
+                    config.errors += 1
+
+            if not self.path.startswith("/v1/messages"):
+                self._send_json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+                return
+
+            if failed:
+                self._send_json(
+                    config.error_status,
+                    {"type": "error", "error": {"type": "overloaded_error", "message": "Injected failure"}},
+                    {"retry-after-ms": "50"}
+                )
+                return
+
+            prompt = "".join(
+                m["content"] if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+                for m in request.get("messages", [])
+            )
+            text = random.choice(CANNED_REPLIES)
+            input_tokens = max(1, len(prompt) // 4)
+            output_tokens = max(1, len(text) // 4)
+            with config.lock:
+                config.input_tokens += input_tokens
+                config.output_tokens += output_tokens
+
+            self._send_json(200, {
+                "id": f"msg_fake_{uuid.uuid4().hex[:16]}",
+                "type": "message",
+                "role": "assistant",
+                "model": request.get("model", "claude-3-haiku-20240307"),
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens},
+            })
+
+    return FakeClaudeHandler
+
+
+def start_fake_server(config: FakeClaudeConfig, host: str = "127.0.0.1",
+                      port: int = 0) -> Tuple[ThreadingHTTPServer, str]:
+    """Start the stub server in a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-claude", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API for load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.3, help="Lognormal spread of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests that fail")
+    parser.add_argument("--error-status", type=int, default=529, help="HTTP status for injected failures")
+    args = parser.parse_args()
+
+    config = FakeClaudeConfig(args.latency_ms, args.latency_sigma, args.error_rate, args.error_status)
+    server, url = start_fake_server(config, args.host, args.port)
+    print(f"🤖 Fake Claude listening on {url} (set ANTHROPIC_BASE_URL={url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"\n📊 {config.get_stats()}")
+        server.shutdown()
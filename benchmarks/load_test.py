@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Replay load test for Sassy Fact Check Bot.
+Replays interactions.json (or a synthetic DM firehose built from the demo DMs)
+at a fixed QPS against a local fake Claude server, either in-process through
+SassyFactChecker.process_dm_content or through the MCP stdio server.
+
+Usage:
+    python benchmarks/load_test.py --mode inprocess --qps 20 --requests 200
+    python benchmarks/load_test.py --mode stdio --source interactions --out bench.json
+    python benchmarks/load_test.py --compare bench.json
+    python benchmarks/load_test.py --processes 4 --duplicate-delivery   # shared SQLite state
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_DIR.parent
+SRC_DIR = PROJECT_ROOT / "src"
+
+sys.path.insert(0, str(BENCH_DIR))
+from fake_claude_server import FakeClaudeConfig, start_fake_server
+
+SYNTHETIC_USERS = ["wellness_guru_fake", "fitness_influencer", "health_coach_sus", "detox_queen", "mama_knows_best"]
+SYNTHETIC_SUFFIXES = ["", " Trust me!!", " My aunt swears by it 🔥", " Doctors hate this!", " 100% natural ✨"]
+
+
+def load_messages(source: str, interactions_file: Path, count: int, unique: bool) -> List[Dict[str, str]]:
+    """Build the replay list from the interaction log or from the demo DMs."""
+    if source == "interactions":
+        with open(interactions_file, "r") as f:
+            records = json.load(f)
+        base = [
+            {
+                "username": r.get("username", "replay_user"),
+                "content": r.get("content", ""),
+                "message_type": r.get("message_type", "text"),
+            }
+            for r in records
+            if r.get("username") != "test_user"
+        ]
+        if not base:
+            raise SystemExit(f"No interactions to replay in {interactions_file}")
+    else:
+        sys.path.insert(0, str(SRC_DIR))
+        from instagram_dm_mcp import InstagramDemoTools
+
+        base = [
+            {
+                "username": f"{random.choice(SYNTHETIC_USERS)}_{i}",
+                "content": dm["message"] + suffix,
+                "message_type": "text",
+            }
+            for i, (dm, suffix) in enumerate(
+                itertools.product(InstagramDemoTools().demo_dms, SYNTHETIC_SUFFIXES)
+            )
+        ]
+
+    messages = []
+    for i, message in enumerate(itertools.islice(itertools.cycle(base), count)):
+        message = dict(message)
+        if unique:
+            message["content"] = f"{message['content']} (#{i})"
+        messages.append(message)
+    return messages
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class StdioMCPClient:
+    """Minimal JSON-RPC client for the MCP stdio server."""
+
+    def __init__(self, env: Dict[str, str]):
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.ids = itertools.count(1)
+        self.reader_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, str(SRC_DIR / "mcp_server.py"),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=self.env,
+            cwd=self.env.get("BENCH_WORKDIR"),
+            limit=16 * 1024 * 1024,
+        )
+        self.reader_task = asyncio.create_task(self._read_loop())
+        await self.request("initialize", {
+            "protocolVersion": "2025-03-26",
+            "capabilities": {},
+            "clientInfo": {"name": "sassybot-load-test", "version": "0.1.0"},
+        })
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _send(self, message: Dict[str, Any]) -> None:
+        self.process.stdin.write((json.dumps(message) + "\n").encode())
+        await self.process.stdin.drain()
+
+    async def _read_loop(self) -> None:
+        while True:
+            line = await self.process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # the server prints progress lines to stdout
+            future = self.pending.pop(message.get("id"), None) if isinstance(message, dict) else None
+            if future is not None and not future.done():
+                future.set_result(message)
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError("MCP server exited"))
+
+    async def request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        await self._send({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        return await future
+
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.request("tools/call", {"name": name, "arguments": arguments})
+
+    async def close(self) -> None:
+        if self.process and self.process.returncode is None:
+            self.process.stdin.close()
+            try:
+                await asyncio.wait_for(self.process.wait(), 5)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self.reader_task:
+            self.reader_task.cancel()
+
+
+async def run_load(messages: List[Dict[str, str]], qps: float, send) -> Dict[str, Any]:
+    """Open-loop replay: request i starts at i/qps regardless of earlier replies."""
+    latencies: List[float] = []
+    failures = 0
+    categories: Dict[str, int] = {}
+
+    async def one(message: Dict[str, str], start_at: float) -> None:
+        nonlocal failures
+        delay = start_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            category = await send(message)
+            categories[category] = categories.get(category, 0) + 1
+            if category == "error":
+                failures += 1
+        except Exception:
+            failures += 1
+        # Measured from the scheduled start so queueing delay is not hidden
+        latencies.append((time.perf_counter() - start_at) * 1000)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(one(m, began + i / qps) for i, m in enumerate(messages)))
+    elapsed = time.perf_counter() - began
+    return summarize(latencies, failures, categories, elapsed)
+
+
+def summarize(latencies: List[float], failures: int, categories: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    """Build the report from raw per-request latencies."""
+    return {
+        "requests": len(latencies),
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "categories": categories,
+        "_latencies": latencies,
+    }
+
+
+async def run_inprocess(messages: List[Dict[str, str]], qps: float) -> Dict[str, Any]:
+    sys.path.insert(0, str(SRC_DIR))
+    from tools.sassy_fact_check import SassyFactChecker
+
+    checker = SassyFactChecker()
+
+    async def send(message: Dict[str, str]) -> str:
+        result = await checker.process_dm_content(
+            message["content"], message["username"], message["message_type"], message.get("message_id")
+        )
+        return result.get("category", "unknown")
+
+    report = await run_load(messages, qps, send)
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return report
+
+
+async def run_stdio(messages: List[Dict[str, str]], qps: float, env: Dict[str, str]) -> Dict[str, Any]:
+    client = StdioMCPClient(env)
+    await client.start()
+
+    async def send(message: Dict[str, str]) -> str:
+        reply = await client.call_tool("generate_sassy_response", {
+            "username": message["username"],
+            "content": message["content"],
+        })
+        if "error" in reply:
+            return "error"
+        text = reply["result"]["content"][0]["text"]
+        return "error" if text.startswith("Error in") or "glitch" in text else "ok"
+
+    try:
+        report = await run_load(messages, qps, send)
+    finally:
+        await client.close()
+    report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1)
+    return report
+
+
+def _process_worker(messages: List[Dict[str, str]], qps: float) -> Dict[str, Any]:
+    return asyncio.run(run_inprocess(messages, qps))
+
+
+def run_multiprocess(messages: List[Dict[str, str]], qps: float, processes: int,
+                     duplicate_delivery: bool) -> Dict[str, Any]:
+    """Run N in-process bots sharing one state backend and merge their results.
+
+    By default DMs are split between processes. With duplicate_delivery every
+    process sees every DM, and leases in the shared backend must dedupe them.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    for i, message in enumerate(messages):
+        message["message_id"] = f"bench-{i}"
+    if duplicate_delivery:
+        shards, shard_qps = [messages] * processes, qps
+    else:
+        shards, shard_qps = [messages[i::processes] for i in range(processes)], qps / processes
+
+    began = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        reports = list(pool.map(_process_worker, shards, [shard_qps] * processes))
+    elapsed = time.perf_counter() - began
+
+    latencies: List[float] = []
+    categories: Dict[str, int] = {}
+    failures = 0
+    for report in reports:
+        latencies.extend(report["_latencies"])
+        failures += report["failures"]
+        for category, count in report["categories"].items():
+            categories[category] = categories.get(category, 0) + count
+
+    merged = summarize(latencies, failures, categories, elapsed)
+    handled = len(latencies) - categories.get("duplicate", 0)
+    merged["throughput_rps"] = round(handled / elapsed, 2) if elapsed else 0.0
+    merged["processes"] = processes
+    merged["peak_rss_mb"] = round(max(r["peak_rss_mb"] for r in reports), 1)
+    return merged
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    def delta(path: List[str]) -> str:
+        if not baseline:
+            return ""
+        old, new = baseline, report
+        for key in path:
+            old, new = old.get(key, {}), new.get(key, {})
+        if not isinstance(old, (int, float)) or not old:
+            return ""
+        return f"  ({(new - old) / old * 100:+.1f}% vs baseline)"
+
+    latency = report["latency_ms"]
+    processes = f" x{report['processes']} processes" if report.get("processes") else ""
+    print(f"\n📊 Load test: {report['mode']} mode{processes}, {report['requests']} requests @ {report['target_qps']} QPS")
+    print(f"   Throughput: {report['throughput_rps']} req/s{delta(['throughput_rps'])}")
+    for key in ("p50", "p95", "p99"):
+        print(f"   {key}: {latency[key]}ms{delta(['latency_ms', key])}")
+    print(f"   Failures: {report['failures']}")
+    print(f"   LLM calls: {report['llm_calls']} ({report['llm_errors']} injected errors){delta(['llm_calls'])}")
+    print(f"   Peak RSS: {report['peak_rss_mb']} MB{delta(['peak_rss_mb'])}")
+    print(f"   Categories: {report['categories']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay load test against a fake Claude server")
+    parser.add_argument("--mode", choices=["inprocess", "stdio"], default="inprocess")
+    parser.add_argument("--source", choices=["demo", "interactions"], default="demo")
+    parser.add_argument("--interactions-file", default="interactions.json")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--qps", type=float, default=10.0)
+    parser.add_argument("--unique", action="store_true", help="Make every message unique to defeat the response cache")
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="Fake Claude median latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=529)
+    parser.add_argument("--out", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--processes", type=int, default=1, help="In-process bots sharing a SQLite state backend")
+    parser.add_argument("--duplicate-delivery", action="store_true",
+                        help="With --processes, deliver every DM to every process to exercise leases")
+    args = parser.parse_args()
+    # Resolve against the caller's directory; in-process runs chdir into a scratch dir below
+    out_path = Path(args.out).resolve() if args.out else None
+    compare_path = Path(args.compare).resolve() if args.compare else None
+    if compare_path and not compare_path.exists():
+        parser.error(f"--compare baseline not found: {compare_path}")
+
+    random.seed(args.seed)
+    messages = load_messages(args.source, Path(args.interactions_file), args.requests, args.unique)
+
+    config = FakeClaudeConfig(args.latency_ms, args.latency_sigma, args.error_rate, args.error_status)
+    server, base_url = start_fake_server(config)
+
+    workdir = tempfile.mkdtemp(prefix="sassybot-bench-")
+    os.environ.update({
+        "ANTHROPIC_BASE_URL": base_url,
+        "ANTHROPIC_API_KEY": os.getenv("ANTHROPIC_API_KEY", "sk-ant-fake-benchmark"),
+        "USAGE_LEDGER_FILE": os.path.join(workdir, "usage_ledger.json"),
+        "TRACE_FILE": os.path.join(workdir, "traces.jsonl"),
+        "INSTAGRAM_REAL_MODE": "false",
+        "BENCH_WORKDIR": workdir,
+    })
+
+    if args.mode == "inprocess" and args.processes > 1:
+        os.environ.update({"STATE_BACKEND": "sqlite", "STATE_DB_PATH": os.path.join(workdir, "bot_state.db")})
+        os.chdir(workdir)
+        report = run_multiprocess(messages, args.qps, args.processes, args.duplicate_delivery)
+    elif args.mode == "inprocess":
+        os.chdir(workdir)
+        report = asyncio.run(run_inprocess(messages, args.qps))
+    else:
+        report = asyncio.run(run_stdio(messages, args.qps, dict(os.environ)))
+
+    with urllib.request.urlopen(f"{base_url}/stats") as response:
+        stats = json.load(response)
+    server.shutdown()
+
+    report.pop("_latencies", None)
+    report.update({
+        "mode": args.mode,
+        "source": args.source,
+        "target_qps": args.qps,
+        "llm_calls": stats["requests"],
+        "llm_errors": stats["errors"],
+        "fake_latency_ms": args.latency_ms,
+        "fake_error_rate": args.error_rate,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+
+    baseline = None
+    if compare_path:
+        with open(compare_path, "r") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📁 Report written to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
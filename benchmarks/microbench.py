@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the CPU-side per-message hot paths:
+ContentFilter.analyze_content, SassyFactChecker.extract_text_from_caption,
+ClaudeFactChecker._extract_sources, ReplyPostprocessor.process, the
+claim gate (ClaimClassifier.is_claim) and ClaimExtractor.extract.
+
+Runs each case over realistic corpora (short DMs, long captions, emoji-heavy
+posts), scales filter keyword sets from 10^2 to 10^5, and reports ns/message
+and allocated bytes/message. Results are saved as a JSON baseline that later
+runs can be checked against.
+
+Usage:
+    python benchmarks/microbench.py                      # run and write baseline
+    python benchmarks/microbench.py --check              # compare with baseline
+    python benchmarks/microbench.py --filter caption     # only matching cases
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-fake-benchmark")
+os.environ.setdefault("USAGE_LEDGER_FILE", os.path.join(tempfile.gettempdir(), "sassybot_bench_ledger.json"))
+
+import claim_classifier
+from claude_client import ClaudeFactChecker
+from filters import ContentFilter
+from rule_packs import DEFAULT_RULES_DIR, compile_rules, pack_files
+from metrics import metrics
+from reply_postprocessor import ReplyPostprocessor
+from tools.sassy_fact_check import SassyFactChecker
+
+DEFAULT_BASELINE = BENCH_DIR / "microbench_baseline.json"
+KEYWORD_SCALES = [10**2, 10**3, 10**4, 10**5]
+
+CLAIMS = [
+    "Apple cider vinegar burns belly fat instantly!",
+    "Lemon water detoxes your liver completely!",
+    "Essential oils cure everything! Big pharma doesn't want you to know!",
+    "Green tea burns 100 calories per cup",
+    "You only use 10% of your brain",
+    "Cracking your knuckles gives you arthritis",
+    "Vaccines cause autism, my cousin said so",
+    "Eating carrots gives you night vision",
+]
+EMOJI = ["🔥", "💅", "✨", "😍", "🙌", "💯", "🌱", "🍋", "😂", "🚀", "🇺🇸", "💪"]
+HASHTAGS = ["#wellness", "#detox", "#cleaneating", "#fitfam", "#healthylifestyle", "#natural", "#glowup"]
+MENTIONS = ["@wellness_guru_fake", "@fitness_influencer", "@health_coach_sus", "@bestie"]
+SOURCES = ["Mayo Clinic", "NIH", "Harvard Health", "Cleveland Clinic", "WHO", "CDC"]
+
+
+def build_corpora(seed: int = 42) -> Dict[str, List[str]]:
+    """Generate deterministic message corpora."""
+    rng = random.Random(seed)
+
+    short_dms = [
+        rng.choice(CLAIMS) + rng.choice(["", "!!", " lol", " fr", " 🔥"])
+        for _ in range(500)
+    ]
+
+    long_captions = []
+    for _ in range(200):
+        parts = []
+        for _ in range(rng.randint(6, 12)):
+            parts.append(rng.choice(CLAIMS))
+            parts.append(" ".join(rng.sample(HASHTAGS, 2)))
+            parts.append(rng.choice(MENTIONS))
+        long_captions.append(" ".join(parts))
+
+    emoji_posts = []
+    for _ in range(300):
+        text = rng.choice(CLAIMS)
+        burst = "".join(rng.choice(EMOJI) for _ in range(rng.randint(3, 12)))
+        emoji_posts.append(f"{burst} {text} {burst} {' '.join(rng.sample(HASHTAGS, 3))} {burst}")
+
+    replies = [
+        f"Bestie, who taught you biology? 💀 {rng.choice(CLAIMS)} is fake news ✨ Source: {rng.choice(SOURCES)}"
+        + (f". Also Source: {rng.choice(SOURCES)}" if rng.random() < 0.3 else "")
+        for _ in range(500)
+    ]
+
+    return {
+        "short_dms": short_dms,
+        "long_captions": long_captions,
+        "emoji_posts": emoji_posts,
+        "replies": replies,
+    }
+
+
+def make_filter(extra_keywords: int = 0) -> ContentFilter:
+    """ContentFilter over the shipped rule packs plus `extra_keywords` non-matching keywords."""
+    packs = [json.loads(path.read_text()) for path in pack_files(DEFAULT_RULES_DIR)]
+    if extra_keywords:
+        per_set = extra_keywords // 3
+        packs.append({"name": "padding", "version": "0", "keywords": {
+            "sensitive": [f"zqsens{i:06d}" for i in range(per_set)],
+            "health_panic": [f"zqhealth{i:06d}" for i in range(per_set)],
+            "blocked": [f"zqblock{i:06d}" for i in range(extra_keywords - 2 * per_set)],
+        }})
+    return ContentFilter(rules=compile_rules(packs))
+
+
+def bench(func: Callable[[str], Any], corpus: List[str], rounds: int, min_time: float) -> Dict[str, float]:
+    """Time func over the corpus; returns ns/message stats and allocated bytes/message."""
+    def one_pass() -> None:
+        for message in corpus:
+            func(message)
+
+    # Calibrate passes per round so each round lasts at least min_time
+    one_pass()
+    started = time.perf_counter()
+    one_pass()
+    single = max(time.perf_counter() - started, 1e-9)
+    passes = max(1, int(min_time / single))
+
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter_ns()
+            for _ in range(passes):
+                one_pass()
+            samples.append((time.perf_counter_ns() - started) / (passes * len(corpus)))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    # Transient allocation per call: traced peak above the pre-call level
+    allocated = 0
+    tracemalloc.start()
+    for message in corpus:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(message)
+        _, peak = tracemalloc.get_traced_memory()
+        allocated += peak - before
+    tracemalloc.stop()
+
+    return {
+        "ns_per_msg_min": round(min(samples), 1),
+        "ns_per_msg_median": round(statistics.median(samples), 1),
+        "alloc_bytes_per_msg": round(allocated / len(corpus), 1),
+        "messages": len(corpus),
+        "rounds": rounds,
+        "passes_per_round": passes,
+    }
+
+
+def build_cases(corpora: Dict[str, List[str]]) -> Dict[str, tuple]:
+    """Map case name -> (callable, corpus)."""
+    checker = SassyFactChecker()
+    claude = ClaudeFactChecker()
+    cases = {}
+
+    for corpus_name in ("short_dms", "long_captions", "emoji_posts"):
+        cases[f"analyze_content/{corpus_name}"] = (make_filter().analyze_content, corpora[corpus_name])
+        cases[f"extract_text_from_caption/{corpus_name}"] = (checker.extract_text_from_caption, corpora[corpus_name])
+
+    for scale in KEYWORD_SCALES:
+        cases[f"analyze_content/keywords_{scale}"] = (make_filter(scale).analyze_content, corpora["short_dms"])
+
+    keywords = [keyword for words in make_filter().rules.keywords.values() for keyword in words]
+    for corpus_name in ("short_dms", "long_captions"):
+        cases[f"extract_claims/{corpus_name}"] = (
+            lambda text: claude.extractor.extract(text, keywords), corpora[corpus_name]
+        )
+
+    cases["extract_sources/replies"] = (claude._extract_sources, corpora["replies"])
+    postprocessor = ReplyPostprocessor()
+    cases["postprocess_reply/replies"] = (lambda reply: postprocessor.process(reply, "sassy"), corpora["replies"])
+
+    if claim_classifier.available():
+        gate = claim_classifier.ClaimClassifier().fit(*claim_classifier.training_set([]))
+        cases["claim_gate/short_dms"] = (gate.is_claim, corpora["short_dms"])
+    return cases
+
+
+def check_against(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return regressions slower than baseline by more than `tolerance`."""
+    regressions = []
+    for name, result in results.items():
+        old = baseline.get("cases", {}).get(name)
+        if not old:
+            continue
+        ratio = result["ns_per_msg_min"] / max(old["ns_per_msg_min"], 1e-9)
+        marker = "🐢" if ratio > 1 + tolerance else ("🚀" if ratio < 1 - tolerance else "  ")
+        print(f"{marker} {name:45s} {old['ns_per_msg_min']:>12.1f} -> {result['ns_per_msg_min']:>12.1f} ns/msg ({ratio:.2f}x)")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for per-message hot paths")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument("--check", action="store_true", help="Compare against the baseline instead of overwriting it")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before --check fails")
+    parser.add_argument("--filter", default="", help="Only run cases containing this substring")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="Minimum seconds per round")
+    args = parser.parse_args()
+
+    # Measure the code paths themselves, not the metrics hooks around them
+    metrics.enabled = False
+
+    cases = build_cases(build_corpora())
+    results = {}
+    for name, (func, corpus) in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = bench(func, corpus, args.rounds, args.min_time)
+        r = results[name]
+        print(f"{name:45s} {r['ns_per_msg_min']:>12.1f} ns/msg  {r['alloc_bytes_per_msg']:>10.1f} B/msg")
+
+    baseline_path = Path(args.baseline)
+    if args.check:
+        if not baseline_path.exists():
+            raise SystemExit(f"No baseline at {baseline_path} - run without --check first")
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        print()
+        regressions = check_against(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+        return
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": results,
+    }
+    with open(baseline_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📁 Baseline written to {baseline_path}")
+
+
+if __name__ == "__main__":
+    main()
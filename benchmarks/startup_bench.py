@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the MCP stdio server.
+Measures time from process spawn to the initialize reply and to the first
+list_tools reply, which is what the desktop host waits on at every launch.
+
+Usage:
+    python benchmarks/startup_bench.py --runs 10
+    python benchmarks/startup_bench.py --no-api-key   # server must still start
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+from load_test import StdioMCPClient
+
+
+async def measure_once(env: Dict[str, str]) -> Dict[str, float]:
+    client = StdioMCPClient(env)
+    started = time.perf_counter()
+    await client.start()
+    initialized = time.perf_counter()
+    reply = await client.request("tools/list", {})
+    listed = time.perf_counter()
+    await client.close()
+
+    if "error" in reply:
+        raise RuntimeError(f"tools/list failed: {reply['error']}")
+    return {
+        "initialize_ms": (initialized - started) * 1000,
+        "first_list_tools_ms": (listed - started) * 1000,
+        "tools": len(reply["result"]["tools"]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time-to-first-list_tools benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-api-key", action="store_true", help="Start without ANTHROPIC_API_KEY")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["BENCH_WORKDIR"] = tempfile.mkdtemp(prefix="sassybot-startup-")
+    env["PREWARM_ON_START"] = env.get("PREWARM_ON_START", "true")
+    if args.no_api_key:
+        env.pop("ANTHROPIC_API_KEY", None)
+
+    runs: List[Dict[str, float]] = []
+    for _ in range(args.runs):
+        runs.append(asyncio.run(measure_once(env)))
+
+    print(f"\n🚀 MCP server startup over {args.runs} runs ({runs[0]['tools']} tools listed)")
+    for key in ("initialize_ms", "first_list_tools_ms"):
+        values = [run[key] for run in runs]
+        print(f"   {key}: min={min(values):.1f} median={statistics.median(values):.1f} max={max(values):.1f}")
+
+
+if __name__ == "__main__":
+    main()
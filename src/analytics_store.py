@@ -0,0 +1,321 @@
+"""
+Columnar analytics store for Sassy Fact Check Bot.
+
+Interactions are kept as typed array columns partitioned by day instead of
+one dict per record. Usernames, categories, tones and message types are
+interned to small integer codes and timestamps are epoch seconds, so a
+record costs a few dozen bytes. Group-by queries run vectorized with NumPy
+(zero-copy views of the arrays) and fall back to plain loops without it.
+
+Records arriving late (a worker finishing after newer ones were logged) go
+into their own day partition; keys seen within the late window are kept so
+re-reading an overlapping slice of the log never counts a record twice.
+"""
+
+import base64
+import os
+import sys
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional - queries fall back to pure Python
+    np = None
+
+# Coded (interned) columns and plain numeric columns, with their array typecodes
+CODED_COLUMNS = {"user": "I", "category": "H", "tone": "H", "message_type": "H"}
+VALUE_COLUMNS = {"timestamp": "q", "words": "H", "sources": "B"}
+
+
+class Interner:
+    """Bidirectional string <-> small int mapping."""
+
+    __slots__ = ("values", "codes")
+
+    def __init__(self, values: Iterable[str] = ()):
+        self.values: List[str] = []
+        self.codes: Dict[str, int] = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class DayPartition:
+    """All interactions of one day, one typed array per column."""
+
+    __slots__ = ("columns",)
+
+    def __init__(self):
+        self.columns: Dict[str, array] = {
+            name: array(typecode) for name, typecode in {**CODED_COLUMNS, **VALUE_COLUMNS}.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.columns["timestamp"])
+
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self.columns.values())
+
+
+class AnalyticsStore:
+    """Day-partitioned columnar store of interactions with group-by queries."""
+
+    def __init__(self, retention_days: int = None):
+        self.retention_days = retention_days or int(os.getenv("ANALYTICS_RETENTION_DAYS", "90"))
+        self.interners: Dict[str, Interner] = {name: Interner() for name in CODED_COLUMNS}
+        self.partitions: Dict[str, DayPartition] = {}
+        self.cursor = ""
+        self.late_seconds = int(os.getenv("ANALYTICS_LATE_SECONDS", "600"))
+        # (timestamp, username) of records within late_seconds of the cursor -> epoch
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._cursor_epoch = 0.0
+
+    # Ingest
+
+    def append(self, interaction: Dict[str, Any]) -> None:
+        """Add one logged interaction, skipping ones already stored or older than the late window."""
+        timestamp = interaction.get("timestamp", "")
+        if not timestamp:
+            return
+        try:
+            moment = datetime.fromisoformat(timestamp).timestamp()
+        except ValueError:
+            return
+        key = (timestamp, interaction.get("username") or "")
+        if timestamp <= self.cursor:
+            if key in self._recent or moment < self._cursor_epoch - self.late_seconds:
+                return
+        else:
+            self.cursor = timestamp
+            self._cursor_epoch = moment
+        self._remember(key, moment)
+        epoch = int(moment)
+
+        day = timestamp[:10]
+        partition = self.partitions.get(day)
+        if partition is None:
+            partition = self.partitions[day] = DayPartition()
+            self._expire(day)
+
+        columns = partition.columns
+        columns["timestamp"].append(epoch)
+        columns["user"].append(self.interners["user"].code(interaction.get("username") or ""))
+        columns["category"].append(self.interners["category"].code(interaction.get("category") or "unknown"))
+        columns["tone"].append(self.interners["tone"].code(interaction.get("tone_used") or "unknown"))
+        columns["message_type"].append(self.interners["message_type"].code(interaction.get("message_type") or "text"))
+        columns["words"].append(min(len((interaction.get("response") or "").split()), 65535))
+        columns["sources"].append(min(len(interaction.get("sources") or []), 255))
+
+    def _remember(self, key: Tuple[str, str], moment: float) -> None:
+        recent = self._recent
+        recent[key] = moment
+        horizon = self._cursor_epoch - self.late_seconds
+        # Roughly oldest first; a late key may outstay the window a little
+        while recent and next(iter(recent.values())) < horizon:
+            del recent[next(iter(recent))]
+
+    def resume_from(self) -> str:
+        """Timestamp to re-read the log after: the cursor minus the late window."""
+        if not self.cursor:
+            return ""
+        return datetime.fromtimestamp(self._cursor_epoch - self.late_seconds).isoformat()
+
+    def ingest(self, interactions: Iterable[Dict[str, Any]]) -> int:
+        """Append interactions in timestamp order; returns how many were new."""
+        before = len(self)
+        for interaction in sorted(interactions, key=lambda log: log.get("timestamp", "")):
+            self.append(interaction)
+        return len(self) - before
+
+    def _expire(self, newest_day: str) -> None:
+        cutoff = (date.fromisoformat(newest_day) - timedelta(days=self.retention_days)).isoformat()
+        for day in [day for day in self.partitions if day < cutoff]:
+            del self.partitions[day]
+
+    # Queries
+
+    def _days(self, days: int, end: Optional[date] = None) -> List[str]:
+        end = end or date.today()
+        return [(end - timedelta(days=offset)).isoformat() for offset in range(days)]
+
+    def _select(self, days: int, end: Optional[date] = None) -> List[DayPartition]:
+        return [self.partitions[day] for day in self._days(days, end) if day in self.partitions]
+
+    def _column(self, partitions: List[DayPartition], name: str):
+        """Concatenated column across partitions (NumPy array or flat list)."""
+        if np is not None:
+            if not partitions:
+                return np.zeros(0, dtype=np.int64)
+            return np.concatenate([np.frombuffer(p.columns[name], dtype=p.columns[name].typecode) for p in partitions
+                                   if len(p)] or [np.zeros(0, dtype=np.int64)])
+        values: List[int] = []
+        for partition in partitions:
+            values.extend(partition.columns[name])
+        return values
+
+    def _mask(self, partitions: List[DayPartition], where: Optional[Dict[str, str]]):
+        """Row mask for equality filters on coded columns (None = all rows)."""
+        if not where:
+            return None
+        mask = None
+        for name, value in where.items():
+            code = self.interners[name].codes.get(value, -1)
+            column = self._column(partitions, name)
+            if np is not None:
+                match = column == code
+                mask = match if mask is None else mask & match
+            else:
+                match = [c == code for c in column]
+                mask = match if mask is None else [a and b for a, b in zip(mask, match)]
+        return mask
+
+    def group_count(self, by: str, days: int = 7, where: Dict[str, str] = None,
+                    end: Optional[date] = None) -> Dict[str, int]:
+        """Row count per value of a coded column over the last `days` days."""
+        partitions = self._select(days, end)
+        codes = self._column(partitions, by)
+        mask = self._mask(partitions, where)
+        names = self.interners[by].values
+        if np is not None:
+            if mask is not None:
+                codes = codes[mask]
+            counts = np.bincount(codes.astype(np.int64), minlength=len(names))
+            return {names[code]: int(count) for code, count in enumerate(counts) if count}
+        result: Dict[str, int] = {}
+        for index, code in enumerate(codes):
+            if mask is None or mask[index]:
+                result[names[code]] = result.get(names[code], 0) + 1
+        return result
+
+    def group_mean(self, value: str, by: str, days: int = 7, where: Dict[str, str] = None,
+                   end: Optional[date] = None) -> Dict[str, float]:
+        """Mean of a value column per value of a coded column."""
+        partitions = self._select(days, end)
+        codes = self._column(partitions, by)
+        values = self._column(partitions, value)
+        mask = self._mask(partitions, where)
+        names = self.interners[by].values
+        if np is not None:
+            if mask is not None:
+                codes, values = codes[mask], values[mask]
+            codes = codes.astype(np.int64)
+            counts = np.bincount(codes, minlength=len(names))
+            sums = np.bincount(codes, weights=values.astype(np.float64), minlength=len(names))
+            return {names[code]: round(float(sums[code] / counts[code]), 2) for code in range(len(names)) if counts[code]}
+        sums: Dict[int, List[int]] = {}
+        for index, code in enumerate(codes):
+            if mask is None or mask[index]:
+                entry = sums.setdefault(code, [0, 0])
+                entry[0] += values[index]
+                entry[1] += 1
+        return {names[code]: round(total / count, 2) for code, (total, count) in sums.items()}
+
+    def daily_counts(self, days: int = 7, where: Dict[str, str] = None) -> List[Tuple[str, int]]:
+        """(day, rows) for each of the last `days` days, oldest first."""
+        result = []
+        for day in reversed(self._days(days)):
+            partition = self.partitions.get(day)
+            if partition is None:
+                result.append((day, 0))
+                continue
+            mask = self._mask([partition], where)
+            if mask is None:
+                result.append((day, len(partition)))
+            else:
+                result.append((day, int(mask.sum()) if np is not None else sum(mask)))
+        return result
+
+    def spikes(self, days: int = 7, baseline_days: int = 28, min_count: int = 3) -> List[Dict[str, Any]]:
+        """Categories whose volume in the last `days` rose most against the preceding baseline."""
+        recent = self.group_count("category", days)
+        before = self.group_count("category", baseline_days, end=date.today() - timedelta(days=days))
+        scale = days / baseline_days
+        rows = []
+        for category, count in recent.items():
+            if count < min_count:
+                continue
+            expected = before.get(category, 0) * scale
+            rows.append({
+                "category": category,
+                "count": count,
+                "expected": round(expected, 1),
+                "ratio": round(count / expected, 2) if expected else None,
+            })
+        # New categories (no baseline) first, then by ratio
+        rows.sort(key=lambda row: (row["ratio"] is not None, -(row["ratio"] or 0), -row["count"]))
+        return rows
+
+    # Sizing and persistence
+
+    def __len__(self) -> int:
+        return sum(len(partition) for partition in self.partitions.values())
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by columns plus interned strings."""
+        column_bytes = sum(partition.nbytes() for partition in self.partitions.values())
+        string_bytes = sum(len(value) + 49 for interner in self.interners.values() for value in interner.values)
+        return column_bytes + string_bytes
+
+    def export_state(self) -> Dict[str, Any]:
+        """Interners and raw column bytes (base64), for snapshots."""
+        return {
+            "cursor": self.cursor,
+            "recent": [[timestamp, username, moment] for (timestamp, username), moment in self._recent.items()],
+            "byteorder": sys.byteorder,
+            "interners": {name: interner.values for name, interner in self.interners.items()},
+            "partitions": {
+                day: {name: base64.b64encode(column.tobytes()).decode() for name, column in partition.columns.items()}
+                for day, partition in self.partitions.items()
+            },
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Load a snapshot written by export_state."""
+        if state.get("byteorder", sys.byteorder) != sys.byteorder:
+            return  # snapshot from another architecture; rebuild from the log instead
+        self.cursor = state.get("cursor", "")
+        self._cursor_epoch = datetime.fromisoformat(self.cursor).timestamp() if self.cursor else 0.0
+        self._recent = {(timestamp, username): moment for timestamp, username, moment in state.get("recent", [])}
+        self.interners = {name: Interner(state.get("interners", {}).get(name, [])) for name in CODED_COLUMNS}
+        self.partitions = {}
+        for day, columns in state.get("partitions", {}).items():
+            partition = DayPartition()
+            for name, values in columns.items():
+                if name in partition.columns:
+                    partition.columns[name].frombytes(base64.b64decode(values))
+            self.partitions[day] = partition
+        if self.partitions:
+            self._expire(max(self.partitions))
+
+    @staticmethod
+    def dict_records_bytes(records: List[Dict[str, Any]]) -> int:
+        """Approximate deep size of the same history held as one dict per record."""
+        total = sys.getsizeof(records)
+        for record in records:
+            total += sys.getsizeof(record)
+            for value in record.values():
+                total += sys.getsizeof(value)
+                if isinstance(value, list):
+                    total += sum(sys.getsizeof(item) for item in value)
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Row, partition and memory statistics."""
+        return {
+            "rows": len(self),
+            "days": len(self.partitions),
+            "users": len(self.interners["user"]),
+            "memory_bytes": self.memory_bytes(),
+            "numpy": np is not None,
+        }
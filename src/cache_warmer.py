@@ -0,0 +1,254 @@
+"""
+Cache-warming job for Sassy Fact Check Bot.
+
+Mines the interaction log for the top trending claims per category and
+pre-generates several reply variants for each with ClaudeFactChecker, so
+repeat myths are answered from the response cache without waiting on Claude.
+Runs off-peak in small batches; reruns only touch entries that are missing,
+stale or short of variants. Run the CLI while the server is stopped (or with
+STATE_BACKEND=sqlite) so the warmed entries are not overwritten by the
+server's next snapshot.
+
+Usage:
+    python src/cache_warmer.py --dry-run          # show what would be generated
+    python src/cache_warmer.py --top 10 --variants 3
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import metrics
+from paths import data_path
+from response_cache import normalize_claim
+from state_backend import run_blocking
+from tool_progress import ToolProgress
+
+# Categories whose replies are templated or never cached
+SKIP_CATEGORIES = {"error", "no_text", "empty", "blocked", "duplicate", "no_claim"}
+
+
+def in_off_peak_window(hours: str, now: Optional[datetime] = None) -> bool:
+    """True if the local hour falls in an "H-H" window (may wrap midnight, e.g. "22-6")."""
+    start, end = (int(part) for part in hours.split("-"))
+    hour = (now or datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class CacheWarmer:
+    """Pre-generates response variants for trending claims."""
+
+    def __init__(self, fact_checker, top_n: int = None, variants: int = None, batch_size: int = None):
+        self.fact_checker = fact_checker
+        self.top_n = top_n or int(os.getenv("WARM_TOP_N", "10"))
+        self.variants = variants or int(os.getenv("WARM_VARIANTS", "0"))
+        self.batch_size = batch_size or int(os.getenv("WARM_BATCH_SIZE", "5"))
+        self.batch_pause = float(os.getenv("WARM_BATCH_PAUSE", "2.0"))
+        self.lookback_days = int(os.getenv("WARM_LOOKBACK_DAYS", "7"))
+        self.off_peak_hours = os.getenv("WARM_OFF_PEAK_HOURS", "2-6")
+        self.interval = float(os.getenv("WARM_INTERVAL", "3600"))
+        self.enabled = os.getenv("ENABLE_CACHE_WARMING", "true").lower() == "true"
+        self.last_report: Dict[str, Any] = {}
+        # Claims whose last top-up produced no new distinct variant; retried on refresh
+        self._saturated: set = set()
+
+    def _load_interactions(self) -> List[Dict[str, Any]]:
+        """Recent interactions from the shared backend or the JSON log."""
+        since = (datetime.now() - timedelta(days=self.lookback_days)).isoformat()
+        checker = self.fact_checker
+        if checker.backend is not None:
+            return checker.backend.interactions_since(since, limit=50000)
+        return [log for log in checker.log_writer.read() if log.get("timestamp", "") > since]
+
+    def mine_trending(self, logs: List[Dict[str, Any]] = None) -> Dict[str, List[Tuple[str, str, int]]]:
+        """Top-N claims per category as (sample content, tone, count), most frequent first."""
+        if logs is None:
+            logs = self._load_interactions()
+
+        counts: Dict[str, Counter] = {}
+        samples: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        for log in logs:
+            category = log.get("category", "unknown")
+            content = log.get("content", "")
+            tone = log.get("tone_used")
+            if category in SKIP_CATEGORIES or not tone or not content:
+                continue
+            claim = normalize_claim(content)
+            if not claim:
+                continue
+            counts.setdefault(category, Counter())[claim] += 1
+            # Keep the newest phrasing and the tone it was answered in
+            samples[(category, claim)] = (content, tone)
+
+        return {
+            category: [(*samples[(category, claim)], count) for claim, count in counter.most_common(self.top_n)]
+            for category, counter in counts.items()
+        }
+
+    def plan(self, trending: Dict[str, List[Tuple[str, str, int]]]) -> List[Dict[str, Any]]:
+        """Decide which claims need a full refresh or a top-up; fresh full entries are skipped."""
+        cache = self.fact_checker.response_cache
+        wanted = min(self.variants or cache.max_variants, cache.max_variants)
+        refresh_age = float(os.getenv("WARM_REFRESH_AGE", str(cache.ttl_seconds / 2)))
+
+        jobs = []
+        for category, claims in trending.items():
+            for content, tone, count in claims:
+                info = cache.entry_info(content, tone)
+                if info is None or info[0] > refresh_age:
+                    jobs.append({"content": content, "tone": tone, "category": category,
+                                 "count": count, "mode": "refresh", "needed": wanted})
+                elif info[1] < wanted and (normalize_claim(content), tone) not in self._saturated:
+                    jobs.append({"content": content, "tone": tone, "category": category,
+                                 "count": count, "mode": "top_up", "needed": wanted - info[1]})
+        jobs.sort(key=lambda job: job["count"], reverse=True)
+        return jobs
+
+    async def run(self, force: bool = False, dry_run: bool = False,
+                  progress: Optional[ToolProgress] = None) -> Dict[str, Any]:
+        """Run one warming pass. Without force, only inside the off-peak window.
+        
+        `progress` is advanced once per finished variant, with the variant as the message.
+        """
+        started = time.perf_counter()
+        report = {"claims": 0, "refreshed": 0, "topped_up": 0, "variants_generated": 0, "failed": 0, "skipped": ""}
+
+        if not force and not in_off_peak_window(self.off_peak_hours):
+            report["skipped"] = f"outside off-peak window {self.off_peak_hours}"
+            return report
+
+        checker = self.fact_checker
+        jobs = await run_blocking(checker.backend, lambda: self.plan(self.mine_trending()))
+        report["claims"] = len(jobs)
+        report["planned"] = [
+            {"content": job["content"][:80], "category": job["category"], "mode": job["mode"], "variants": job["needed"]}
+            for job in jobs
+        ]
+        if dry_run:
+            return report
+
+        # One task per variant; results are applied to the cache once every batch is done
+        tasks = [(job, index) for job in jobs for index in range(job["needed"])]
+        generated: Dict[int, List[Dict[str, Any]]] = {}
+        if progress is not None:
+            progress.total = len(tasks)
+        for offset in range(0, len(tasks), self.batch_size):
+            if checker.ledger.degraded_mode():
+                report["skipped"] = "daily Claude budget reached"
+                break
+            batch = tasks[offset:offset + self.batch_size]
+            with metrics.timer("cache_warm_batch"):
+                results = await asyncio.gather(
+                    *(checker.claude_client.fact_check(job["content"]) for job, _ in batch),
+                    return_exceptions=True
+                )
+            for (job, _), result in zip(batch, results):
+                if isinstance(result, Exception) or result.get("category") == "error":
+                    report["failed"] += 1
+                    if progress is not None:
+                        await progress.advance(f"❌ [{job['category']}] {job['content'][:60]}")
+                    continue
+                for usage in result.get("usage") or []:
+                    checker.ledger.record(
+                        "cache_warmer", result["category"], usage["model"],
+                        usage["input_tokens"], usage["output_tokens"], usage["cached_tokens"]
+                    )
+                generated.setdefault(id(job), []).append(result)
+                report["variants_generated"] += 1
+                if progress is not None:
+                    await progress.advance(f"🔥 [{job['category']}] {job['content'][:60]} → {result['response']}")
+            if offset + self.batch_size < len(tasks):
+                await asyncio.sleep(self.batch_pause)
+
+        def apply() -> None:
+            for job in jobs:
+                results = generated.get(id(job))
+                if not results:
+                    continue
+                key = (normalize_claim(job["content"]), job["tone"])
+                if job["mode"] == "refresh":
+                    checker.response_cache.replace(job["content"], job["tone"], results)
+                    self._saturated.discard(key)
+                    report["refreshed"] += 1
+                else:
+                    before = checker.response_cache.entry_info(job["content"], job["tone"])
+                    for result in results:
+                        checker.response_cache.put(job["content"], job["tone"], result)
+                    after = checker.response_cache.entry_info(job["content"], job["tone"])
+                    if before and after and after[1] == before[1]:
+                        self._saturated.add(key)
+                    report["topped_up"] += 1
+
+        await run_blocking(checker.backend, apply)
+
+        metrics.incr("cache_warm_variants", "all", report["variants_generated"])
+        report["duration_s"] = round(time.perf_counter() - started, 2)
+        self.last_report = report
+        return report
+
+    async def run_periodic(self) -> None:
+        """Check every `interval` seconds and warm the cache during off-peak hours."""
+        while self.enabled:
+            await asyncio.sleep(self.interval)
+            try:
+                report = await self.run()
+                if not report["skipped"]:
+                    print(f"🔥 Cache warmed: {report['variants_generated']} variants for {report['claims']} claims")
+            except Exception as e:
+                print(f"Cache warming failed: {e}")
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable summary of a warming pass."""
+    if report.get("skipped") and not report.get("variants_generated"):
+        text = f"⏸️ Cache warming skipped: {report['skipped']}"
+        if not report.get("planned"):
+            return text
+        text += "\n"
+    else:
+        text = (
+            f"🔥 Cache warming: {report['claims']} claims, {report['variants_generated']} variants generated "
+            f"({report['refreshed']} refreshed, {report['topped_up']} topped up, {report['failed']} failed)"
+        )
+        if report.get("duration_s") is not None:
+            text += f" in {report['duration_s']}s"
+        text += "\n"
+    for job in report.get("planned", [])[:20]:
+        text += f"- [{job['category']}] {job['mode']} x{job['variants']}: {job['content']}\n"
+    return text
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from snapshot import SnapshotError, read_snapshot, write_snapshot
+    from tools.sassy_fact_check import SassyFactChecker
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Pre-generate replies for trending claims")
+    parser.add_argument("--top", type=int, default=None, help="Claims per category")
+    parser.add_argument("--variants", type=int, default=None, help="Variants per claim")
+    parser.add_argument("--batch-size", type=int, default=None, help="Concurrent Claude calls per batch")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would be generated")
+    args = parser.parse_args()
+
+    checker = SassyFactChecker()
+    # Without a shared backend the cache lives in the snapshot: load it, warm it, write it back
+    snapshot_path = Path(os.getenv("STATE_SNAPSHOT_FILE") or data_path("bot_state.snap"))
+    try:
+        _, sections = read_snapshot(snapshot_path)
+    except SnapshotError:
+        sections = {}
+    checker.response_cache.restore_state(sections.get("response_cache", []))
+
+    warmer = CacheWarmer(checker, args.top, args.variants, args.batch_size)
+    print(format_report(asyncio.run(warmer.run(force=True, dry_run=args.dry_run))))
+    if not args.dry_run:
+        sections["response_cache"] = checker.response_cache.export_state()
+        write_snapshot(snapshot_path, sections)
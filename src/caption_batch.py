@@ -0,0 +1,171 @@
+"""
+Bulk caption preprocessing for Sassy Fact Check Bot.
+
+Scanning the posts and comments of followed accounts means cleaning
+thousands of captions, most of which hold nothing to check. CaptionBatch
+streams them in one pass: clean with precompiled patterns (skipping passes
+that cannot match, e.g. no '#'/'@' or no astral-plane emoji), normalize,
+drop duplicates and captions too short to hold a claim, then score the
+survivors in chunks with the claim gate and lazily yield the fact-check
+candidates. Nothing is materialized beyond one chunk.
+
+Usage:
+    python src/caption_batch.py captions.jsonl   # one caption per line (text or JSON object)
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from metrics import metrics
+from response_cache import normalize_claim
+
+# Hashtags and mentions in one pass (same result as removing #tags, then @mentions)
+TAG_RE = re.compile(r"[#@]\w+")
+# Runs of 3+ emoji collapse to one sparkle (keep a little context)
+EMOJI_RUN_RE = re.compile(r"[\U0001F1E0-\U0001F1FF\U0001F300-\U0001F64F\U0001F680-\U0001F6FF]{3,}")
+# Every emoji above is outside the BMP
+ASTRAL = "\U00010000"
+
+Caption = Union[str, Dict[str, Any]]
+
+
+def clean_caption(caption: str) -> str:
+    """Strip hashtags and mentions, collapse emoji runs, normalize whitespace."""
+    if not caption:
+        return ""
+    if "#" in caption or "@" in caption:
+        caption = TAG_RE.sub("", caption)
+    if not caption.isascii() and max(caption) >= ASTRAL:
+        caption = EMOJI_RUN_RE.sub("✨", caption)
+    return " ".join(caption.split())
+
+
+class CaptionBatch:
+    """Streaming clean -> dedupe -> claim-score pipeline over many captions."""
+
+    def __init__(self, claim_gate: Any = None, min_words: int = None, chunk_size: int = None,
+                 max_seen: int = None):
+        self.claim_gate = claim_gate
+        self.min_words = min_words or int(os.getenv("CAPTION_MIN_WORDS", "4"))
+        self.chunk_size = chunk_size or int(os.getenv("CAPTION_CHUNK_SIZE", "512"))
+        self.max_seen = max_seen or int(os.getenv("CAPTION_MAX_SEEN", "100000"))
+        self._seen: Dict[str, None] = {}
+        self.stats = {"captions": 0, "empty": 0, "too_short": 0, "duplicates": 0,
+                      "not_claims": 0, "candidates": 0, "seconds": 0.0}
+
+    def _remember(self, key: str) -> bool:
+        """False if the normalized caption was seen before; bounded FIFO memory."""
+        if key in self._seen:
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.max_seen:
+            del self._seen[next(iter(self._seen))]
+        return True
+
+    def candidates(self, captions: Iterable[Caption]) -> Iterator[Dict[str, Any]]:
+        """Lazily yield fact-check candidates: {"text", "claim_score", "id", "username"}.
+
+        Captions may be strings or dicts with "caption"/"text" plus optional "id" and "username".
+        """
+        stats = self.stats
+        chunk: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+        try:
+            for item in captions:
+                stats["captions"] += 1
+                if isinstance(item, str):
+                    raw, meta = item, None
+                else:
+                    raw, meta = item.get("caption") or item.get("text") or "", item
+                text = clean_caption(raw)
+                if not text:
+                    stats["empty"] += 1
+                    continue
+                if text.count(" ") + 1 < self.min_words:
+                    stats["too_short"] += 1
+                    continue
+                if not self._remember(normalize_claim(text)):
+                    stats["duplicates"] += 1
+                    continue
+                chunk.append({
+                    "text": text,
+                    "id": meta.get("id") if meta else None,
+                    "username": meta.get("username") if meta else None,
+                })
+                if len(chunk) >= self.chunk_size:
+                    yield from self._score(chunk)
+                    chunk = []
+            if chunk:
+                yield from self._score(chunk)
+        finally:
+            # Includes time spent by the consumer between yields; measures end-to-end throughput
+            stats["seconds"] += time.perf_counter() - started
+            metrics.incr("captions_scanned", "all", stats["captions"])
+
+    def _score(self, chunk: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Score a chunk with the claim gate in one vectorized call; yield the likely claims."""
+        if self.claim_gate is None:
+            for candidate in chunk:
+                candidate["claim_score"] = None
+                self.stats["candidates"] += 1
+                yield candidate
+            return
+        with metrics.timer("caption_chunk_score"):
+            scores = self.claim_gate.predict_proba([candidate["text"] for candidate in chunk])
+        threshold = self.claim_gate.threshold
+        for candidate, score in zip(chunk, scores):
+            if score < threshold:
+                self.stats["not_claims"] += 1
+                continue
+            candidate["claim_score"] = round(float(score), 3)
+            self.stats["candidates"] += 1
+            yield candidate
+
+    def throughput(self) -> float:
+        """Captions per second over everything scanned so far."""
+        seconds = self.stats["seconds"]
+        return self.stats["captions"] / seconds if seconds else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "seconds": round(self.stats["seconds"], 3),
+                "captions_per_sec": round(self.throughput())}
+
+
+def _read_captions(path: str) -> Iterator[Caption]:
+    import json
+    with open(path, "r") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("{"):
+                try:
+                    yield json.loads(line)
+                    continue
+                except ValueError:
+                    pass
+            yield line
+
+
+if __name__ == "__main__":
+    import argparse
+    from dotenv import load_dotenv
+    from tools.sassy_fact_check import SassyFactChecker
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Find fact-check candidates in a file of captions")
+    parser.add_argument("path", help="One caption per line (plain text or JSON with caption/id/username)")
+    parser.add_argument("--show", type=int, default=10, help="Candidates to print")
+    parser.add_argument("--no-gate", action="store_true", help="Skip claim scoring (clean and dedupe only)")
+    args = parser.parse_args()
+
+    batch = CaptionBatch(None if args.no_gate else SassyFactChecker().claim_gate)
+    shown = 0
+    for candidate in batch.candidates(_read_captions(args.path)):
+        if shown < args.show:
+            print(f"- [{candidate['claim_score']}] {candidate['text'][:120]}")
+            shown += 1
+    stats = batch.get_stats()
+    print(f"\n{stats['captions']} captions -> {stats['candidates']} candidates "
+          f"({stats['duplicates']} duplicates, {stats['too_short']} too short, {stats['empty']} empty, "
+          f"{stats['not_claims']} not claims) in {stats['seconds']}s = {stats['captions_per_sec']} captions/sec")
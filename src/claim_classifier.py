@@ -0,0 +1,340 @@
+"""
+Claim-worthiness classifier for Sassy Fact Check Bot.
+
+Many DMs are greetings, memes, questions or chit-chat that match no filter
+keyword, land in SAFE and would go straight to Claude. This tiny local model
+decides whether a message contains a checkable claim so the rest can get a
+templated reply instead.
+
+Features are hashed word unigrams and bigrams plus a few shape tokens
+(length bucket, digits, question mark); the model is a logistic regression
+in NumPy. A whole batch is featurized into flat index arrays and scored with
+one bincount, so classifying costs microseconds per message.
+
+Training data is the hand-labelled seed set (data/claim_seed.json) plus the
+interaction log, weakly labelled: keyword-matched categories are claims,
+obvious chit-chat is not, and ambiguous SAFE messages are left out.
+
+Usage:
+    python src/claim_classifier.py              # train, report held-out metrics, save
+    python src/claim_classifier.py --eval-only  # saved model on messages it never saw
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from paths import data_path
+
+try:
+    import numpy as np
+except ImportError:  # optional - without NumPy every message goes to Claude as before
+    np = None
+
+DEFAULT_SEED_FILE = Path(__file__).parent.parent / "data" / "claim_seed.json"
+
+TOKEN_RE = re.compile(r"[a-z0-9']+|[^\sa-z0-9']")
+CHITCHAT_RE = re.compile(
+    r"^(hi+|hey+|hello+|yo|gm|gn|good (morning|night)|thanks?( you)?|ty|lo+l|lma+o+|haha\w*|ok(ay)?|k|yes|no|bye|"
+    r"love (this|you)|slay|same|mood|facts|real|omg)\b"
+)
+# Verbs and phrasings that turn a sentence into something checkable
+ASSERTION_RE = re.compile(
+    r"\b(cures?|causes?|prevents?|burns?|detox\w*|boosts?|kills?|reverses?|heals?|proven|study|studies|"
+    r"makes? you|gives? you|is (good|bad)|are (good|bad)|toxic|poison|percent|%)"
+)
+
+BOS, EOS = "<s>", "</s>"
+
+
+def available() -> bool:
+    return np is not None
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word and symbol tokens plus shape tokens."""
+    lowered = text.lower()
+    tokens = TOKEN_RE.findall(lowered)
+    words = sum(1 for token in tokens if token[0].isalnum())
+    shape = [f"__words{min(words, 12) // 3}__"]
+    if any(char.isdigit() for char in lowered):
+        shape.append("__digit__")
+    if lowered.rstrip().endswith("?"):
+        shape.append("__question__")
+    return [BOS] + tokens + [EOS] + shape
+
+
+def weak_label(interaction: Dict[str, Any]) -> Optional[int]:
+    """1 = claim, 0 = not a claim, None = too ambiguous to train on."""
+    content = (interaction.get("content") or "").strip().lower()
+    category = interaction.get("category")
+    if not content or category in (None, "error", "duplicate", "no_text", "empty", "no_claim"):
+        return None
+    if category in ("health_panic", "sensitive", "blocked"):
+        return 1
+    if category == "spam":
+        return None
+    words = content.split()
+    if CHITCHAT_RE.match(content) and len(words) <= 4:
+        return 0
+    if not any(char.isalnum() for char in content):
+        return 0  # emoji / punctuation only
+    if ASSERTION_RE.search(content) and len(words) >= 4:
+        return 1
+    return None
+
+
+class ClaimClassifier:
+    """Hashed n-gram logistic regression: P(message contains a checkable claim)."""
+
+    def __init__(self, dim: int = None, threshold: float = None):
+        self.dim = dim or int(os.getenv("CLAIM_MODEL_DIM", str(2 ** 18)))
+        self.threshold = threshold if threshold is not None else float(os.getenv("CLAIM_GATE_THRESHOLD", "0.3"))
+        self.weights = np.zeros(self.dim, dtype=np.float64)
+        self.bias = 0.0
+        self.trained_on = 0
+        self.trained_texts = np.zeros(0, dtype=np.uint32)  # sorted crc32 of every training text
+        self.report: Dict[str, Any] = {}  # held-out numbers taken before the final refit
+        self._hashes: Dict[str, int] = {}
+
+    def _hash(self, token: str) -> int:
+        value = self._hashes.get(token)
+        if value is None:
+            if len(self._hashes) > 200_000:
+                self._hashes.clear()
+            value = self._hashes[token] = zlib.crc32(token.encode())
+        return value
+
+    def featurize(self, texts: Sequence[str]) -> Tuple[Any, Any, Any]:
+        """Flat (row, feature index) arrays for a batch plus each row's L2 scale."""
+        hashes: List[int] = []
+        lengths: List[int] = []
+        for text in texts:
+            tokens = tokenize(text)
+            hashes.extend(self._hash(token) for token in tokens)
+            lengths.append(len(tokens))
+        token_hashes = np.array(hashes, dtype=np.int64)
+        lengths = np.array(lengths, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts)), lengths)
+
+        # Bigrams pair each token with the next one in the same message
+        if len(token_hashes) > 1:
+            same_row = rows[:-1] == rows[1:]
+            bigrams = (token_hashes[:-1][same_row] * 1000003) ^ token_hashes[1:][same_row]
+            feature_rows = np.concatenate([rows, rows[:-1][same_row]])
+            features = np.concatenate([token_hashes, bigrams]) % self.dim
+        else:
+            feature_rows, features = rows, token_hashes % self.dim
+
+        counts = np.bincount(feature_rows, minlength=len(texts))
+        scale = 1.0 / np.sqrt(np.maximum(counts, 1))
+        return feature_rows, features, scale
+
+    def _scores(self, feature_rows, features, scale, count: int):
+        return np.bincount(feature_rows, weights=self.weights[features], minlength=count) * scale + self.bias
+
+    def predict_proba(self, texts: Sequence[str]):
+        """P(claim) for each text, vectorized over the batch."""
+        if not texts:
+            return np.zeros(0)
+        feature_rows, features, scale = self.featurize(texts)
+        return 1.0 / (1.0 + np.exp(-self._scores(feature_rows, features, scale, len(texts))))
+
+    def is_claim(self, text: str) -> bool:
+        return bool(self.predict_proba([text])[0] >= self.threshold)
+
+    def fit(self, texts: Sequence[str], labels: Sequence[int], epochs: int = 300,
+            learning_rate: float = 0.5, l2: float = 1e-4) -> "ClaimClassifier":
+        """Full-batch Adagrad on class-balanced logistic loss."""
+        y = np.asarray(labels, dtype=np.float64)
+        feature_rows, features, scale = self.featurize(texts)
+        positives = max(y.sum(), 1.0)
+        negatives = max(len(y) - y.sum(), 1.0)
+        sample_weight = np.where(y == 1, len(y) / (2 * positives), len(y) / (2 * negatives))
+
+        grad_sq = np.full(self.dim, 1e-8)
+        bias_sq = 1e-8
+        for _ in range(epochs):
+            scores = self._scores(feature_rows, features, scale, len(texts))
+            error = (1.0 / (1.0 + np.exp(-scores)) - y) * sample_weight / len(y)
+            grad = np.bincount(features, weights=(error * scale)[feature_rows], minlength=self.dim) + l2 * self.weights
+            grad_sq += grad * grad
+            self.weights -= learning_rate * grad / np.sqrt(grad_sq)
+            bias_grad = error.sum()
+            bias_sq += bias_grad * bias_grad
+            self.bias -= learning_rate * bias_grad / np.sqrt(bias_sq)
+        self.trained_on = len(y)
+        self.trained_texts = np.unique(np.array([zlib.crc32(text.encode()) for text in texts], dtype=np.uint32))
+        return self
+
+    def was_trained_on(self, text: str) -> bool:
+        """True if `text` (probably) was one of the training examples."""
+        index = np.searchsorted(self.trained_texts, zlib.crc32(text.encode()))
+        return bool(index < len(self.trained_texts) and self.trained_texts[index] == zlib.crc32(text.encode()))
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        tmp = path.with_suffix(".tmp.npz")
+        meta = json.dumps({"threshold": self.threshold, "trained_on": self.trained_on, "report": self.report})
+        np.savez_compressed(tmp, weights=self.weights, bias=self.bias, trained_texts=self.trained_texts, meta=meta)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ClaimClassifier":
+        with np.load(path) as data:
+            model = cls(dim=len(data["weights"]))
+            model.weights = data["weights"].astype(np.float64)
+            model.bias = float(data["bias"])
+            meta = json.loads(str(data["meta"]))
+            if "trained_texts" in data:
+                model.trained_texts = data["trained_texts"]
+        if "CLAIM_GATE_THRESHOLD" not in os.environ:
+            model.threshold = meta.get("threshold", model.threshold)
+        model.trained_on = meta.get("trained_on", 0)
+        model.report = meta.get("report", {})
+        return model
+
+
+def training_set(interactions: Iterable[Dict[str, Any]], seed_file: Path = None) -> Tuple[List[str], List[int]]:
+    """Seed examples plus weakly labelled log messages, deduplicated by text."""
+    seed = json.loads(Path(seed_file or os.getenv("CLAIM_SEED_FILE", DEFAULT_SEED_FILE)).read_text())
+    labelled: Dict[str, int] = {}
+    for interaction in interactions:
+        label = weak_label(interaction)
+        if label is not None:
+            labelled[interaction["content"].strip()] = label
+    # Hand labels win over weak ones
+    labelled.update({text: 1 for text in seed.get("claims", [])})
+    labelled.update({text: 0 for text in seed.get("non_claims", [])})
+    return list(labelled), list(labelled.values())
+
+
+def split_holdout(texts: List[str], labels: List[int], fraction: float = 0.2) -> Tuple[Tuple[list, list], Tuple[list, list]]:
+    """Deterministic train/held-out split by text hash (stable across runs)."""
+    buckets = int(round(1 / fraction)) if fraction else 0
+    train, held = ([], []), ([], [])
+    for text, label in zip(texts, labels):
+        target = held if buckets and zlib.crc32(text.encode()) % buckets == 0 else train
+        target[0].append(text)
+        target[1].append(label)
+    return train, held
+
+
+def evaluate(model: ClaimClassifier, texts: List[str], labels: List[int]) -> Dict[str, Any]:
+    """Precision/recall of the claim class, LLM calls saved and scoring speed on a labelled set."""
+    if not texts:
+        return {"messages": 0}
+    started = time.perf_counter_ns()
+    predicted = model.predict_proba(texts) >= model.threshold
+    batch_ns = time.perf_counter_ns() - started
+    started = time.perf_counter_ns()
+    for text in texts[:200]:
+        model.is_claim(text)
+    single_ns = (time.perf_counter_ns() - started) / min(len(texts), 200)
+
+    actual = np.asarray(labels, dtype=bool)
+    true_pos = int((predicted & actual).sum())
+    false_pos = int((predicted & ~actual).sum())
+    false_neg = int((~predicted & actual).sum())
+    precision = true_pos / (true_pos + false_pos) if true_pos + false_pos else 0.0
+    recall = true_pos / (true_pos + false_neg) if true_pos + false_neg else 0.0
+    # Claims phrased as questions ("does garlic cure a cold?") look like chit-chat to the shape tokens
+    questions = actual & np.array([text.rstrip().endswith("?") for text in texts], dtype=bool)
+    gated = int((~predicted).sum())
+    return {
+        "messages": len(texts),
+        "claims": int(actual.sum()),
+        "precision": round(precision, 3),
+        "recall": round(recall, 3),
+        "f1": round(2 * precision * recall / (precision + recall), 3) if precision + recall else 0.0,
+        "llm_calls_saved": gated,
+        "llm_calls_saved_pct": round(100 * gated / len(texts), 1),
+        "claims_wrongly_gated": false_neg,
+        "question_claims": int(questions.sum()),
+        "question_recall": round(float((predicted & questions).sum() / questions.sum()), 3) if questions.any() else None,
+        "us_per_msg_batch": round(batch_ns / len(texts) / 1000, 2),
+        "us_per_msg_single": round(single_ns / 1000, 2),
+    }
+
+
+def train(interactions: Iterable[Dict[str, Any]], holdout: float = 0.2) -> Tuple[ClaimClassifier, Dict[str, Any]]:
+    """Train on the seed set plus the log; returns the model and its held-out report.
+
+    The returned model is refit on all examples once the held-out numbers are taken.
+    """
+    texts, labels = training_set(interactions)
+    (train_texts, train_labels), (held_texts, held_labels) = split_holdout(texts, labels, holdout)
+    report = evaluate(ClaimClassifier().fit(train_texts, train_labels), held_texts, held_labels)
+    report["trained_on"] = len(texts)
+    model = ClaimClassifier().fit(texts, labels)
+    model.report = report
+    return model, report
+
+
+def load_or_train(path: Path, interactions) -> ClaimClassifier:
+    """Saved model if present, otherwise train from the seed set and `interactions()` and save it."""
+    path = Path(path)
+    if path.exists():
+        return ClaimClassifier.load(path)
+    model, report = train(interactions())
+    try:
+        model.save(path)
+    except OSError as e:
+        print(f"Could not save claim model: {e}")
+    print(f"🧠 Claim gate trained on {report['trained_on']} messages: held-out precision {report['precision']}, "
+          f"recall {report['recall']}, {report['llm_calls_saved_pct']}% of calls saved")
+    return model
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    if not report.get("messages"):
+        return "No held-out messages to evaluate."
+    return (
+        f"Held-out: {report['messages']} messages ({report['claims']} claims)\n"
+        f"- precision {report['precision']}, recall {report['recall']}, F1 {report['f1']}\n"
+        f"- LLM calls saved: {report['llm_calls_saved']} ({report['llm_calls_saved_pct']}%), "
+        f"claims wrongly gated: {report['claims_wrongly_gated']}\n"
+        + (f"- question-form claims: {report['question_claims']}, recall {report['question_recall']}\n"
+           if report.get("question_claims") else "")
+        + f"- speed: {report['us_per_msg_batch']} us/msg batched, {report['us_per_msg_single']} us/msg one at a time"
+    )
+
+
+if __name__ == "__main__":
+    import sys
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Train and evaluate the claim-worthiness gate")
+    parser.add_argument("--days", type=int, default=90, help="Days of interaction log to learn from")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of messages held out for evaluation")
+    parser.add_argument("--eval-only", action="store_true", help="Evaluate the saved model instead of training")
+    args = parser.parse_args()
+
+    if not available():
+        sys.exit("NumPy is required for the claim classifier")
+    from tools.sassy_fact_check import SassyFactChecker
+
+    checker = SassyFactChecker()
+    path = Path(os.getenv("CLAIM_MODEL_FILE") or data_path("claim_model.npz"))
+    logs = checker._read_log(args.days)
+    if args.eval_only:
+        # The saved model was refit on every example, so only messages it never saw are held out
+        model = ClaimClassifier.load(path)
+        if model.report:
+            print("At training time, before the refit:")
+            print(format_report(model.report))
+        texts, labels = training_set(logs)
+        unseen = [(text, label) for text, label in zip(texts, labels) if not model.was_trained_on(text)]
+        print(f"\nSaved model on {len(unseen)} labelled messages it was not trained on:")
+        print(format_report(evaluate(model, [text for text, _ in unseen], [label for _, label in unseen])))
+    else:
+        model, report = train(logs, args.holdout)
+        model.save(path)
+        print(format_report(report))
+        print(f"Saved to {path} (trained on {report['trained_on']} messages)")
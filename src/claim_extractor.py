@@ -0,0 +1,187 @@
+"""
+Claim extraction for Sassy Fact Check Bot.
+
+A pasted article or a long caption can run to hundreds of tokens, yet the
+reply is 30 words about one claim. ClaimExtractor.extract() splits long
+messages into sentences, scores each for check-worthiness (health terms,
+rule-pack keywords, hedging and certainty phrases, numbers) and keeps the
+one to three best, in their original order, under a hard input-token cap.
+Short messages pass through untouched, and the content filter still sees
+the whole message, so nothing here can change how a DM is moderated.
+
+Usage:
+    python src/claim_extractor.py long_posts.txt   # one message per line; reports token savings
+"""
+
+import os
+import re
+from typing import Iterable, List, Tuple
+
+from conversation_context import CHARS_PER_TOKEN, estimate_tokens
+
+# Words this long or longer match on their first PREFIX_CHARS ("vaccine" covers "vaccinated")
+PREFIX_CHARS = 5
+HEALTH_TERMS = (
+    "cure cures cured curing heal heals healing detox cleanse cancer tumor vaccine virus covid flu immune "
+    "immunity diet diets weight fat fats belly burn burns calorie sugar insulin diabetes heart blood liver "
+    "kidney gut vitamin supplement drug drugs medicine medication doctor pharma disease infection antibiotic "
+    "autism toxin keto fasting protein cholesterol pill pills dose doses gluten herb herbs herbal remedy "
+    "remedies treatment symptom metabolism hormone alkaline inflammation brain sleep pregnant fertility "
+    "skin anxiety depression essential oils"
+)
+# Hedged ("studies suggest", "I heard") or absolute ("proven", "100%") claims are the ones worth checking
+HEDGE_WORDS = frozenset((
+    "proven clinically guaranteed guarantee miracle instantly overnight secret apparently supposedly "
+    "reportedly cause causes prevent prevents boost boosts reverse reverses kill kills destroy destroys "
+    "melt melts flush flushes always never natural naturally 100% cure cures"
+).split())
+HEDGE_PHRASES = tuple(f" {phrase} " for phrase in (
+    "studies show", "study shows", "studies prove", "studies suggest", "study found", "research shows",
+    "research proves", "scientists say", "doctors say", "doctors hate", "don't want you", "won't tell you",
+    "experts say", "big pharma", "i heard", "i read", "linked to", "may help", "can help", "could help",
+    "might help", "may cause", "can cause", "everyone knows", "no side effects"
+))
+_PUNCTUATION = str.maketrans({char: " " for char in ".,!?…:;\"“”()[]{}*#@/|~_+=<>"})
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?…])\s+")
+_URL = re.compile(r"(?:https?://|www\.)\S*")
+_DIGITS = re.compile(r"\d+")
+
+
+def _term_index(terms: str) -> Tuple[frozenset, frozenset]:
+    words = terms.split()
+    return (
+        frozenset(word for word in words if len(word) < PREFIX_CHARS),
+        frozenset(word[:PREFIX_CHARS] for word in words if len(word) >= PREFIX_CHARS),
+    )
+
+
+_HEALTH_WORDS, _HEALTH_PREFIXES = _term_index(HEALTH_TERMS)
+
+
+class ExtractedClaim:
+    """The text to send to Claude, and how much of the original it kept."""
+
+    __slots__ = ("text", "sentences", "original_tokens", "kept_tokens", "trimmed")
+
+    def __init__(self, text: str, sentences: int, original_tokens: int, kept_tokens: int, trimmed: bool):
+        self.text = text
+        self.sentences = sentences
+        self.original_tokens = original_tokens
+        self.kept_tokens = kept_tokens
+        self.trimmed = trimmed
+
+    @property
+    def saved_tokens(self) -> int:
+        return self.original_tokens - self.kept_tokens
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences and lines of a message, whitespace normalized and URLs dropped."""
+    if "http" in text or "www." in text:
+        text = _URL.sub(" ", text)
+    sentences = []
+    for line in text.splitlines():
+        for sentence in _SENTENCE_SPLIT.split(line):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def score_sentence(sentence: str, keywords: Iterable[str] = ()) -> float:
+    """Check-worthiness: health terms, rule-pack keywords, hedging/certainty phrases and numbers."""
+    lowered = sentence.lower()
+    words = lowered.translate(_PUNCTUATION).split()
+    unique = set(words)
+    health = len(_HEALTH_WORDS.intersection(unique)) + len(
+        _HEALTH_PREFIXES.intersection({word[:PREFIX_CHARS] for word in unique})
+    )
+    padded = f" {' '.join(words)} "
+    hedges = len(HEDGE_WORDS.intersection(unique)) + sum(1 for phrase in HEDGE_PHRASES if phrase in padded)
+    score = 2.0 * min(health, 3) + 1.5 * min(hedges, 3) + 3.0 * sum(1 for keyword in keywords if keyword in lowered)
+    if score:
+        # "5am" alone is not a claim; "burns 100 calories" is a sharper one
+        score += 0.5 * min(len(_DIGITS.findall(sentence)), 2)
+    if len(words) < 4:
+        score *= 0.5  # fragments ("OMG.", "Link in bio!") rarely carry the claim
+    return score
+
+
+class ClaimExtractor:
+    """Trims long messages to their most check-worthy sentences under a token cap."""
+
+    def __init__(self, max_sentences: int = None, max_tokens: int = None, min_tokens: int = None):
+        self.enabled = os.getenv("ENABLE_CLAIM_EXTRACTION", "true").lower() == "true"
+        self.max_sentences = max(1, max_sentences or int(os.getenv("CLAIM_MAX_SENTENCES", "3")))
+        self.max_tokens = max(8, max_tokens or int(os.getenv("CLAIM_MAX_INPUT_TOKENS", "120")))
+        # Messages this short are sent whole
+        self.min_tokens = min(self.max_tokens, min_tokens or int(os.getenv("CLAIM_EXTRACT_MIN_TOKENS", "60")))
+
+    def extract(self, text: str, keywords: Iterable[str] = ()) -> ExtractedClaim:
+        """The 1-3 best sentences of `text`, in original order, within max_tokens."""
+        original_tokens = estimate_tokens(text)
+        if not self.enabled or original_tokens <= self.min_tokens:
+            return ExtractedClaim(text, 1, original_tokens, original_tokens, False)
+
+        sentences = split_sentences(text)
+        # Only keywords present somewhere are worth looking for sentence by sentence
+        lowered = text.lower()
+        keywords = tuple(keyword for keyword in keywords if keyword in lowered)
+        ranked: List[Tuple[float, int, str]] = sorted(
+            ((score_sentence(sentence, keywords), index, sentence) for index, sentence in enumerate(sentences)),
+            key=lambda item: (-item[0], item[1])
+        )
+
+        chosen: List[Tuple[int, str]] = []
+        budget = self.max_tokens
+        for score, index, sentence in ranked:
+            if score <= 0 and chosen:
+                break  # filler ("Link in bio") is not worth the tokens
+            tokens = estimate_tokens(sentence) + 1
+            if tokens <= budget:
+                chosen.append((index, sentence))
+                budget -= tokens
+                if len(chosen) >= self.max_sentences:
+                    break
+
+        if chosen:
+            kept = " ".join(sentence for _, sentence in sorted(chosen))
+        else:
+            # Even the best sentence is over the cap: cut it at a word boundary
+            limit = self.max_tokens * CHARS_PER_TOKEN - 1
+            best = ranked[0][2] if ranked else text
+            kept = best[:limit].rsplit(" ", 1)[0] + "…" if len(best) > limit else best
+        return ExtractedClaim(kept, max(1, len(chosen)), original_tokens, estimate_tokens(kept), kept != text)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Show what claim extraction keeps from long messages")
+    parser.add_argument("path", help="One message per line")
+    parser.add_argument("--show", type=int, default=3, help="Examples to print")
+    args = parser.parse_args()
+
+    from filters import ContentFilter
+    rules = ContentFilter().rules
+    keywords = [keyword for words in rules.keywords.values() for keyword in words]
+    extractor = ClaimExtractor()
+    with open(args.path, "r") as f:
+        messages = [line.strip() for line in f if line.strip()]
+
+    started = time.perf_counter_ns()
+    results = [extractor.extract(message, keywords) for message in messages]
+    elapsed_ns = time.perf_counter_ns() - started
+
+    trimmed = [result for result in results if result.trimmed]
+    original = sum(result.original_tokens for result in results)
+    kept = sum(result.kept_tokens for result in results)
+    for message, result in list(zip(messages, results))[:args.show]:
+        if result.trimmed:
+            print(f"- {result.original_tokens} -> {result.kept_tokens} tokens: {result.text}")
+    print(
+        f"\n{len(messages)} messages, {len(trimmed)} trimmed: {original} -> {kept} input tokens "
+        f"({(original - kept) / original:.0%} saved), {elapsed_ns / 1000 / max(len(messages), 1):.1f} µs/message"
+        if original else "No messages"
+    )
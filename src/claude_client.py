@@ -2,40 +2,98 @@
 Claude API client for fact-checking.
 """
 
-import asyncio
 import os
-from typing import Dict, Any
-from anthropic import Anthropic
+import time
+from functools import cached_property
+from typing import Dict, Any, Optional, Tuple
+
+from claim_extractor import ClaimExtractor
+from health import health
+from metrics import metrics
+from model_router import ModelRouter
+from reply_postprocessor import ReplyPostprocessor
+from tracing import tracer
 
 class ClaudeFactChecker:
     """Claude API client for fact-checking with sassy responses."""
     
-    def __init__(self):
+    @cached_property
+    def client(self) -> Any:
+        """Async Anthropic client, created (and the SDK imported) on first use.
+        
+        Async so the event loop stays free during calls and a cancelled tool
+        call aborts its in-flight request instead of waiting it out.
+        """
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable required")
-        self.client = Anthropic(api_key=api_key)
+        
+        with metrics.timer("init_anthropic_client"):
+            from anthropic import AsyncAnthropic
+            return AsyncAnthropic(api_key=api_key)
+    
+    @cached_property
+    def content_filter(self) -> Any:
+        """Shared content filter instead of one per call."""
+        from filters import ContentFilter
+        return ContentFilter()
+    
+    @cached_property
+    def router(self) -> ModelRouter:
+        """Per-request model selection and escalation."""
+        return ModelRouter()
+    
+    @cached_property
+    def postprocessor(self) -> ReplyPostprocessor:
+        """Validates and normalizes every generated reply."""
+        return ReplyPostprocessor()
+    
+    @cached_property
+    def extractor(self) -> ClaimExtractor:
+        """Trims long messages to their most check-worthy sentences before prompting."""
+        return ClaimExtractor()
+    
+    async def probe(self) -> Tuple[bool, str]:
+        """Check reachability and auth by listing models - no completion, no tokens spent."""
+        from anthropic import APIConnectionError, APIStatusError, AuthenticationError, PermissionDeniedError
+        started = time.perf_counter_ns()
+        try:
+            await self.client.models.list(limit=1)
+        except (AuthenticationError, PermissionDeniedError) as e:
+            return False, f"auth rejected ({e.status_code})"
+        except APIConnectionError as e:
+            return False, f"unreachable: {e}"
+        except APIStatusError as e:
+            if e.status_code >= 500:
+                return False, f"API error {e.status_code}"
+            # Reachable and authenticated; the endpoint just isn't served here (e.g. a proxy)
+        return True, f"reachable in {(time.perf_counter_ns() - started) / 1e6:.0f}ms"
     
     async def test_connection(self) -> bool:
         """Test Claude API connection."""
-        try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=10,
-                messages=[{"role": "user", "content": "Hi"}]
-            )
-            return True
-        except Exception as e:
-            print(f"Claude API test failed: {e}")
-            return False
+        ok, detail = await self.probe()
+        if not ok:
+            print(f"Claude API test failed: {detail}")
+        return ok
     
-    async def fact_check(self, content: str, message_type: str = "text") -> Dict[str, Any]:
-        """Fact-check content with Claude."""
+    async def fact_check(
+        self,
+        content: str,
+        message_type: str = "text",
+        analysis: Optional[Tuple[Any, Any, str]] = None,
+        context: str = ""
+    ) -> Dict[str, Any]:
+        """Fact-check content with Claude, reusing a precomputed filter analysis if given.
+        
+        `context` is a short summary of earlier turns in the same DM thread.
+        """
         try:
-            from filters import ContentFilter, ToneMode
-            
-            filter_instance = ContentFilter()
-            category, tone_mode, reason = filter_instance.analyze_content(content)
+            filter_instance = self.content_filter
+            if analysis is None:
+                with tracer.span("filter") as span:
+                    analysis = filter_instance.analyze_content(content)
+                    span.set(category=analysis[0].value, tone=analysis[1].value)
+            category, tone_mode, reason = analysis
             
             if not filter_instance.should_respond(category):
                 return {
@@ -46,6 +104,16 @@ class ClaudeFactChecker:
                     "should_send": False
                 }
             
+            # Long posts: only the most check-worthy sentences are sent, under a hard token cap
+            # A SAFE verdict means the filter matched no keyword, so only flagged messages have any to rank by
+            keywords = () if category.value == "safe" else filter_instance.rules.keywords_in(content.lower())
+            with metrics.timer("extract_claims"), tracer.span("extract_claims") as span:
+                claim = self.extractor.extract(content, keywords)
+                span.set(original_tokens=claim.original_tokens, kept_tokens=claim.kept_tokens)
+            if claim.trimmed:
+                metrics.incr("claims_trimmed", category.value)
+                metrics.incr("input_tokens_saved", category.value, claim.saved_tokens)
+            
             # Build Claude prompt with MAXIMUM SASS
             claude_prompt = f"""You are a fact-checking queen with MAXIMUM sass. Be witty, dramatic, and use Gen Z language.
 
@@ -61,29 +129,80 @@ LENGTH: 25-40 words INCLUDING the source
 STYLE: Dramatic, educational sass with proper citations
 EMOJIS: Use 2-3 relevant emojis (💀, 👑, ✨, 😤, 🤡)
 
-Claim to roast: "{content}"
+Claim to roast: "{claim.text}"
 
 Generate a sassy fact-check with full attitude!"""
+            if tone_mode.value == "soft":
+                # Sensitive topics: the validator rejects sass, so ask for the gentle tone up front
+                claude_prompt += "\n\nTONE OVERRIDE - this topic is sensitive:\n" + filter_instance.get_tone_prompt(tone_mode, category)
+            if context:
+                claude_prompt = claude_prompt.replace(
+                    "Claim to roast:",
+                    f"Earlier in this DM thread (stay consistent, this is a follow-up):\n{context}\n\nClaim to roast:"
+                )
 
-            # Call Claude API
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=150,
-                messages=[{"role": "user", "content": claude_prompt}]
-            )
+            # Cheap model first; escalate only if the draft fails the local checks
+            router = self.router
+            route = router.choose(category.value, tone_mode.value, claim.text)
+            prompt = claude_prompt
+            usages = []
+            for attempt in range(len(router.models)):
+                model = router.model_for(route)
+                started = time.perf_counter_ns()
+                try:
+                    with metrics.timer("llm_call"), tracer.span("llm", model=model, route=route) as span:
+                        raw_response = await self.client.messages.with_raw_response.create(
+                            model=model,
+                            max_tokens=150,
+                            messages=[{"role": "user", "content": prompt}]
+                        )
+                        response = raw_response.parse()
+                        usage = self._usage_dict(model, response.usage)
+                        span.set(retries=raw_response.retries_taken, **usage)
+                except Exception as e:
+                    health.record("claude_api", False, time.perf_counter_ns() - started, type(e).__name__)
+                    if not usages:
+                        raise
+                    # A failed escalation still leaves the earlier draft to send
+                    print(f"Claude escalation to {model} failed: {e}")
+                    metrics.incr("llm_errors", category.value)
+                    route = previous_route
+                    break
+                router.record(route, time.perf_counter_ns() - started, usage)
+                health.record("claude_api", True, time.perf_counter_ns() - started)
+                usages.append(usage)
+                
+                with metrics.timer("postprocess_reply"):
+                    reply = self.postprocessor.process(response.content[0].text, tone_mode.value)
+                if reply.trimmed:
+                    metrics.incr("replies_trimmed", category.value)
+                if not reply.needs_regeneration:
+                    break
+                next_route = router.escalate(route, attempt)
+                if next_route is None:
+                    break
+                previous_route, route = route, next_route
+                prompt = self._revision_prompt(claude_prompt, reply.problems, tone_mode, category)
             
-            fact_check_response = response.content[0].text.strip()
+            if reply.unsafe_tone:
+                # Never send sass about a sensitive topic, even if every retry got it wrong
+                metrics.incr("replies_replaced", category.value)
+                reply = self.postprocessor.process(filter_instance.get_fallback_response(category), tone_mode.value)
             
             return {
-                "response": fact_check_response,
+                "response": reply.text,
                 "tone_used": tone_mode.value,
                 "category": category.value,
-                "sources": self._extract_sources(fact_check_response),
-                "should_send": True
+                "sources": reply.sources,
+                "should_send": True,
+                "route": route,
+                "usage": usages
             }
             
         except Exception as e:
             print(f"Claude fact-check failed: {e}")
+            # Labelled like the other fact-check counters; exception names would grow the label set unbounded
+            metrics.incr("llm_errors", analysis[0].value if analysis else "unknown")
             return {
                 "response": "Oops! My fact-checking brain had a glitch. Try again! 🤖",
                 "tone_used": "error",
@@ -92,8 +211,25 @@ Generate a sassy fact-check with full attitude!"""
                 "should_send": True
             }
     
+    def _revision_prompt(self, prompt: str, problems: list, tone_mode: Any, category: Any) -> str:
+        """Prompt for an escalated retry, spelling out what the rejected draft got wrong."""
+        fix = "Your previous draft was rejected: " + "; ".join(problems) + "."
+        if tone_mode.value == "soft":
+            fix += "\n" + self.content_filter.get_tone_prompt(tone_mode, category)
+        return f"{prompt}\n\n{fix}\nWrite a corrected reply that fixes every problem."
+    
+    def _usage_dict(self, model: str, usage: Any) -> Dict[str, Any]:
+        """Flatten the API usage block into plain token counts."""
+        return {
+            "model": model,
+            "input_tokens": getattr(usage, "input_tokens", 0) or 0,
+            "output_tokens": getattr(usage, "output_tokens", 0) or 0,
+            "cached_tokens": getattr(usage, "cache_read_input_tokens", 0) or 0
+        }
+    
     def _extract_sources(self, response: str) -> list:
         """Extract source citations from response."""
         import re
-        sources = re.findall(r'Source:\s*([^.!?\n]+)', response)
+        with metrics.timer("extract_sources"):
+            sources = re.findall(r'Source:\s*([^.!?\n]+)', response)
         return sources[:3]
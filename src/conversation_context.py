@@ -0,0 +1,143 @@
+"""
+Per-thread conversation context for Sassy Fact Check Bot.
+Keeps the last few compact turns of each DM thread so follow-ups
+("but my aunt says it worked!") get a coherent reply without sending
+whole histories to Claude.
+"""
+
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional
+
+# Rough token estimate used for budgeting (English averages ~4 chars/token)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for prompt budgeting."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class Turn:
+    """One compact message in a thread."""
+
+    __slots__ = ("timestamp", "role", "text", "category")
+
+    def __init__(self, timestamp: float, role: str, text: str, category: Optional[str] = None):
+        self.timestamp = timestamp
+        self.role = role
+        self.text = text
+        self.category = category
+
+
+class ConversationStore:
+    """LRU-bounded map of thread key -> ring buffer of recent turns."""
+
+    def __init__(
+        self,
+        max_threads: int = None,
+        max_turns: int = None,
+        token_budget: int = None,
+        idle_seconds: float = None
+    ):
+        self.max_threads = max_threads or int(os.getenv("CONTEXT_MAX_THREADS", "5000"))
+        self.max_turns = max_turns or int(os.getenv("CONTEXT_MAX_TURNS", "6"))
+        self.token_budget = token_budget or int(os.getenv("CONTEXT_TOKEN_BUDGET", "120"))
+        self.idle_seconds = idle_seconds or float(os.getenv("CONTEXT_IDLE_SECONDS", "86400"))
+        self.max_turn_chars = int(os.getenv("CONTEXT_TURN_CHARS", "280"))
+        self.enabled = os.getenv("ENABLE_CONVERSATION_CONTEXT", "true").lower() == "true"
+        self._threads: "OrderedDict[str, Deque[Turn]]" = OrderedDict()
+
+    def add_turn(self, thread_key: str, role: str, text: str, category: Optional[str] = None) -> None:
+        """Append a turn, evicting the oldest turn and least recently used thread as needed."""
+        if not self.enabled or not text:
+            return
+        turns = self._threads.get(thread_key)
+        if turns is None:
+            turns = self._threads[thread_key] = deque(maxlen=self.max_turns)
+        self._threads.move_to_end(thread_key)
+
+        text = " ".join(text.split())
+        if len(text) > self.max_turn_chars:
+            text = text[:self.max_turn_chars - 1] + "…"
+        turns.append(Turn(time.time(), role, text, category))
+
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+    def context_for(self, thread_key: str) -> str:
+        """Recent turns summarized to fit the token budget ("" if there is no live thread)."""
+        if not self.enabled:
+            return ""
+        turns = self._threads.get(thread_key)
+        if not turns:
+            return ""
+        if time.time() - turns[-1].timestamp > self.idle_seconds:
+            del self._threads[thread_key]
+            return ""
+        self._threads.move_to_end(thread_key)
+
+        # Newest turns first until the budget runs out; older ones collapse to a note
+        lines: List[str] = []
+        remaining = self.token_budget
+        included = 0
+        for turn in reversed(turns):
+            speaker = "User" if turn.role == "user" else "You"
+            line = f"{speaker}: {turn.text}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                if included == 0 and remaining > 8:
+                    # Always keep at least a trimmed version of the latest turn
+                    line = line[:remaining * CHARS_PER_TOKEN - 1] + "…"
+                    lines.append(line)
+                    included += 1
+                break
+            lines.append(line)
+            remaining -= cost
+            included += 1
+
+        if included < len(turns):
+            # Make room for a note on the older turns by dropping the oldest included one
+            if remaining < 12 and len(lines) > 1:
+                remaining += estimate_tokens(lines.pop())
+                included -= 1
+            skipped = len(turns) - included
+            topics = sorted({turn.category for turn in list(turns)[:skipped] if turn.category})
+            note = f"(earlier: {skipped} message(s)"
+            note += f" about {', '.join(topics)})" if topics else ")"
+            if estimate_tokens(note) <= remaining:
+                lines.append(note)
+
+        return "\n".join(reversed(lines))
+
+    def export_state(self) -> List[list]:
+        """Threads in LRU order, for snapshots."""
+        return [
+            [key, [[t.timestamp, t.role, t.text, t.category] for t in turns]]
+            for key, turns in self._threads.items()
+        ]
+
+    def restore_state(self, state: List[list]) -> None:
+        """Load threads saved by export_state, skipping idle ones."""
+        now = time.time()
+        for key, turns in state:
+            if not turns or now - turns[-1][0] > self.idle_seconds:
+                continue
+            self._threads[key] = deque((Turn(*turn) for turn in turns), maxlen=self.max_turns)
+            self._threads.move_to_end(key)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._threads)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store size statistics."""
+        return {
+            "threads": len(self._threads),
+            "turns": sum(len(turns) for turns in self._threads.values()),
+            "max_threads": self.max_threads,
+            "max_turns": self.max_turns,
+            "token_budget": self.token_budget,
+        }
@@ -3,10 +3,16 @@ Content filters and safety mechanisms for Sassy Fact Check Bot.
 Handles sensitive content detection and tone moderation.
 """
 
-import re
+import os
+import threading
+import time
+from pathlib import Path
 from typing import Dict, List, Tuple
 from enum import Enum
 
+from metrics import metrics
+from rule_packs import DEFAULT_RULES_DIR, RulePackError, RuleSet, fingerprint, load_last_good, load_rules
+
 class ContentCategory(Enum):
     SAFE = "safe"
     SENSITIVE = "sensitive"  
@@ -20,86 +26,95 @@ class ToneMode(Enum):
     SOFT = "soft"
     BLOCKED = "blocked"
 
+# Rule-pack category -> (category, tone, reason)
+RULE_OUTCOMES = {
+    "blocked": (ContentCategory.BLOCKED, ToneMode.BLOCKED,
+                "Content contains blocked conspiracy theories or hate speech"),
+    "spam": (ContentCategory.SPAM, ToneMode.SASSY,
+             "Content appears to be spam or promotional"),
+    "sensitive": (ContentCategory.SENSITIVE, ToneMode.SOFT,
+                  "Content contains sensitive topics requiring gentle approach"),
+    "health_panic": (ContentCategory.HEALTH_PANIC, ToneMode.SASSY,
+                     "Health misinformation detected - sass mode with facts"),
+}
+
 class ContentFilter:
     """Filters content and determines appropriate response tone."""
     
-    def __init__(self):
-        # Sensitive topics that require neutral tone
-        self.sensitive_keywords = {
-            'war', 'death', 'suicide', 'trauma', 'grief', 'funeral', 'shooting',
-            'terrorism', 'murder', 'cancer', 'terminal', 'dying', 'miscarriage',
-            'abuse', 'violence', 'assault', 'rape', 'depression', 'anxiety',
-            'mental health crisis', 'self harm', 'cutting', 'overdose'
-        }
-        
-        # Health panic keywords that get special treatment
-        self.health_panic_keywords = {
-            'detox', 'cleanse', 'toxins', 'miracle cure', 'doctors hate',
-            'big pharma', 'natural healing', 'alternative medicine gone wrong',
-            'essential oils cure', 'alkaline water', 'raw diet', 'juice cleanse'
-        }
-        
-        # Blocked content - we won't engage
-        self.blocked_keywords = {
-            'nazi', 'hitler', 'holocaust denial', 'qanon', 'pizzagate',
-            'flat earth', 'chemtrails', 'lizard people', 'illuminati'
-        }
-        
-        # Spam indicators
-        self.spam_patterns = [
-            r'\b(?:buy now|click here|limited time|act fast)\b',
-            r'\b(?:make money|earn \$|work from home)\b',
-            r'(?:http[s]?://|www\.)[^\s]+',  # URLs
-            r'\b(?:dm me|message me|link in bio)\b'
-        ]
+    def __init__(self, rules: RuleSet = None):
+        # Keyword sets and spam patterns come from rule packs (rules/*.json)
+        self.rules_dir = Path(os.getenv("RULES_DIR", DEFAULT_RULES_DIR))
+        self.reload_interval = float(os.getenv("RULES_RELOAD_INTERVAL", "10"))
+        self._fingerprint = fingerprint(self.rules_dir)
+        self._next_check = time.monotonic() + self.reload_interval
+        self._reloading = False
+        self.hot_reload = rules is None
+        self.rules = rules or self._load_initial_rules()
+    
+    def _load_initial_rules(self) -> RuleSet:
+        try:
+            rules = load_rules(self.rules_dir)
+        except (RulePackError, OSError) as e:
+            rules = load_last_good()
+            if rules is None:
+                raise
+            print(f"⚠️ Rule packs unusable ({e}), using {rules.describe()}")
+            return rules
+        print(f"📏 Rules: {rules.describe()}")
+        return rules
+    
+    def _maybe_reload(self) -> None:
+        """Recompile in a background thread when the pack files change; requests keep the old rules meanwhile."""
+        now = time.monotonic()
+        if now < self._next_check or self._reloading:
+            return
+        self._next_check = now + self.reload_interval
+        current = fingerprint(self.rules_dir)
+        if current == self._fingerprint:
+            return
+        self._fingerprint = current
+        self._reloading = True
+        threading.Thread(target=self.reload_rules, name="rules-reload", daemon=True).start()
+    
+    def reload_rules(self) -> bool:
+        """Load the current packs and swap them in; a broken pack keeps the previous rules."""
+        try:
+            rules = load_rules(self.rules_dir)
+            if rules.digest != self.rules.digest:
+                # Single attribute store: in-flight analyze_content calls finish on the old RuleSet
+                self.rules = rules
+                metrics.incr("rules_reloads")
+                print(f"📏 Rules reloaded: {rules.describe()}")
+            return True
+        except Exception as e:
+            metrics.incr("rules_reload_errors")
+            print(f"⚠️ Rule reload failed, keeping {self.rules.describe()}: {e}")
+            return False
+        finally:
+            self._reloading = False
 
     def analyze_content(self, text: str) -> Tuple[ContentCategory, ToneMode, str]:
         """
         Analyze content and return category, recommended tone, and reason.
-        
+
         Returns:
             (ContentCategory, ToneMode, explanation)
         """
-        text_lower = text.lower()
-        
-        # Check for blocked content first
-        if any(keyword in text_lower for keyword in self.blocked_keywords):
-            return (
-                ContentCategory.BLOCKED, 
-                ToneMode.BLOCKED,
-                "Content contains blocked conspiracy theories or hate speech"
-            )
-        
-        # Check for spam
-        if any(re.search(pattern, text_lower) for pattern in self.spam_patterns):
-            return (
-                ContentCategory.SPAM,
-                ToneMode.SASSY,
-                "Content appears to be spam or promotional"
-            )
-        
-        # Check for sensitive content
-        if any(keyword in text_lower for keyword in self.sensitive_keywords):
-            return (
-                ContentCategory.SENSITIVE,
-                ToneMode.SOFT,
-                "Content contains sensitive topics requiring gentle approach"
-            )
-        
-        # Check for health panic content
-        if any(keyword in text_lower for keyword in self.health_panic_keywords):
+        with metrics.timer("analyze_content"):
+            if self.hot_reload:
+                self._maybe_reload()
+
+            # Blocked content first, then spam, sensitive and health panic
+            matched = self.rules.match(text.lower())
+            if matched is not None:
+                return RULE_OUTCOMES[matched]
+
+            # Default to safe content with sassy tone
             return (
-                ContentCategory.HEALTH_PANIC,
+                ContentCategory.SAFE,
                 ToneMode.SASSY,
-                "Health misinformation detected - sass mode with facts"
+                "Safe content ready for sassy fact-checking"
             )
-        
-        # Default to safe content with sassy tone
-        return (
-            ContentCategory.SAFE,
-            ToneMode.SASSY,
-            "Safe content ready for sassy fact-checking"
-        )
 
     def get_tone_prompt(self, tone_mode: ToneMode, content_category: ContentCategory) -> str:
         """Get the appropriate prompt based on tone and content category."""
@@ -0,0 +1,140 @@
+"""
+Health checks for Sassy Fact Check Bot.
+
+Health is derived passively from the outcomes of real calls whenever there
+is recent traffic. Probes only run when that evidence is missing or stale,
+and their results are cached for a TTL. Probes marked active (they reach
+an external service) run only while traffic is idle, so polling the report
+is essentially free.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+# Probe: async () -> (ok, detail)
+Probe = Callable[[], Awaitable[Tuple[bool, str]]]
+
+# Least to most severe; the overall status is the worst component
+SEVERITY = ("healthy", "unknown", "degraded", "unhealthy")
+
+
+class _Outcome:
+    __slots__ = ("at", "ok", "latency_ns", "error")
+
+    def __init__(self, at: float, ok: bool, latency_ns: int, error: Optional[str]):
+        self.at = at
+        self.ok = ok
+        self.latency_ns = latency_ns
+        self.error = error
+
+
+class HealthMonitor:
+    """Passive outcome windows plus TTL-cached probes per component."""
+
+    def __init__(self):
+        self.window_size = int(os.getenv("HEALTH_WINDOW", "50"))
+        self.passive_seconds = float(os.getenv("HEALTH_PASSIVE_SECONDS", "300"))
+        self.probe_ttl = float(os.getenv("HEALTH_PROBE_TTL", "300"))
+        self.idle_seconds = float(os.getenv("HEALTH_IDLE_SECONDS", "60"))
+        self.min_samples = int(os.getenv("HEALTH_MIN_SAMPLES", "3"))
+        self.degraded_error_rate = float(os.getenv("HEALTH_DEGRADED_ERROR_RATE", "0.2"))
+        self.unhealthy_error_rate = float(os.getenv("HEALTH_UNHEALTHY_ERROR_RATE", "0.5"))
+        self._outcomes: Dict[str, Deque[_Outcome]] = {}
+        self._probes: Dict[str, Tuple[Probe, bool, float]] = {}
+        self._cached: Dict[str, Tuple[float, bool, str]] = {}
+        self._probing: Dict[str, asyncio.Task] = {}
+        self.last_traffic = 0.0
+
+    def register_probe(self, component: str, probe: Probe, active: bool = False, ttl: float = None) -> None:
+        """Register how to check a component when passive evidence is missing."""
+        self._probes[component] = (probe, active, ttl or self.probe_ttl)
+
+    def record(self, component: str, ok: bool, latency_ns: int = 0, error: Optional[str] = None) -> None:
+        """Record the outcome of a real call (O(1), no I/O)."""
+        now = time.time()
+        outcomes = self._outcomes.get(component)
+        if outcomes is None:
+            outcomes = self._outcomes[component] = deque(maxlen=self.window_size)
+        outcomes.append(_Outcome(now, ok, latency_ns, error))
+        self.last_traffic = now
+
+    def idle(self) -> bool:
+        return time.time() - self.last_traffic >= self.idle_seconds
+
+    def _passive(self, component: str) -> Optional[Dict[str, Any]]:
+        outcomes = self._outcomes.get(component)
+        if not outcomes:
+            return None
+        cutoff = time.time() - self.passive_seconds
+        recent = [outcome for outcome in outcomes if outcome.at >= cutoff]
+        if len(recent) < self.min_samples:
+            return None
+        failures = [outcome for outcome in recent if not outcome.ok]
+        error_rate = len(failures) / len(recent)
+        if error_rate >= self.unhealthy_error_rate:
+            status = "unhealthy"
+        elif error_rate >= self.degraded_error_rate:
+            status = "degraded"
+        else:
+            status = "healthy"
+        latencies = sorted(outcome.latency_ns for outcome in recent if outcome.ok and outcome.latency_ns)
+        detail = f"{len(recent)} recent calls, {error_rate:.0%} errors"
+        if latencies:
+            detail += f", p50 {latencies[len(latencies) // 2] / 1e6:.0f}ms"
+        if failures:
+            detail += f", last error {failures[-1].error}"
+        return {"status": status, "source": "passive", "age_s": round(time.time() - recent[-1].at, 1), "detail": detail}
+
+    async def _probe(self, component: str) -> None:
+        probe, _, _ = self._probes[component]
+        try:
+            ok, detail = await probe()
+        except Exception as e:
+            ok, detail = False, f"{type(e).__name__}: {e}"
+        self._cached[component] = (time.time(), ok, detail)
+
+    async def check(self, component: str, force: bool = False) -> Dict[str, Any]:
+        """Status of one component from passive data, the probe cache, or a fresh probe."""
+        if not force:
+            passive = self._passive(component)
+            if passive is not None:
+                return passive
+
+        entry = self._probes.get(component)
+        cached = self._cached.get(component)
+        if entry is None:
+            return {"status": "unknown", "source": "none", "age_s": None, "detail": "no recent calls"}
+
+        _, active, ttl = entry
+        fresh = cached is not None and time.time() - cached[0] < ttl
+        if force or (not fresh and (not active or self.idle())):
+            # Concurrent pollers share one in-flight probe
+            task = self._probing.get(component)
+            if task is None or task.done():
+                task = self._probing[component] = asyncio.create_task(self._probe(component))
+            await asyncio.shield(task)
+            cached = self._cached[component]
+            source = "probe"
+        elif cached is None:
+            return {"status": "unknown", "source": "none", "age_s": None,
+                    "detail": "busy with traffic but no recent outcomes yet"}
+        else:
+            source = "cached probe"
+
+        at, ok, detail = cached
+        return {"status": "healthy" if ok else "unhealthy", "source": source,
+                "age_s": round(time.time() - at, 1), "detail": detail}
+
+    async def report(self, force: bool = False) -> Dict[str, Any]:
+        """Every known component plus the overall (worst) status."""
+        components = sorted(set(self._probes) | set(self._outcomes))
+        results = await asyncio.gather(*(self.check(component, force) for component in components))
+        checks = dict(zip(components, results))
+        worst = max((check["status"] for check in checks.values()), key=SEVERITY.index, default="unknown")
+        return {"status": worst, "components": checks, "idle": self.idle()}
+
+
+health = HealthMonitor()
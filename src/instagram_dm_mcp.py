@@ -4,19 +4,31 @@ Choose between demo mode and real Instagram via Gala Labs Instagram DM MCP
 """
 
 import asyncio
+import base64
 import json
 import os
-from typing import Dict, List, Any
+from collections import deque
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, List, Optional
 from datetime import datetime
 import mcp.types as types
-from dotenv import load_dotenv
 
-load_dotenv()
+from metrics import metrics
+from tracing import tracer
+
+
+def _dm_key(dm: Dict[str, Any]) -> str:
+    """Stable identity of a DM (message id, or thread and timestamp for sources without ids)."""
+    return dm.get("message_id") or f"{dm.get('thread_id', '')}:{dm.get('timestamp', '')}"
+
 
 class InstagramDemoTools:
-    """Instagram tools with configurable demo/real mode"""
+    """Instagram tools with configurable demo/real mode, for one Instagram account"""
     
-    def __init__(self):
+    def __init__(self, account: Optional[str] = None):
+        # None is the bot's own (default) account
+        self.account = account
+        
         # Check environment variable or default to demo for safety
         use_real_mode = os.getenv("INSTAGRAM_REAL_MODE", "false").lower() == "true"
         self.demo_mode = not use_real_mode
@@ -43,10 +55,33 @@ class InstagramDemoTools:
             }
         ]
         
+        # Incremental fetching: pages of DMs newer than the watermark, oldest first
+        self.page_size = int(os.getenv("DM_PAGE_SIZE", "20"))
+        self.poll_min = float(os.getenv("DM_POLL_MIN", "5"))
+        self.poll_max = float(os.getenv("DM_POLL_MAX", "300"))
+        self.poll_backoff = float(os.getenv("DM_POLL_BACKOFF", "2"))
+        self.poll_interval = self.poll_min
+        # The watermark only passes a DM once it and every older DM are answered (ack_dm);
+        # the read mark is how far poll_dms has handed DMs out
+        self.dm_watermark = ""
+        self._watermark_keys: set = set()  # DMs already seen at exactly the watermark timestamp
+        self._read_mark = ""
+        self._read_keys: set = set()
+        self._unanswered: Dict[str, List] = {}  # DM key -> [timestamp, answered, attempts], in hand-out order
+        # Failed DMs are handed out again up to max_attempts times, then parked as dead letters so
+        # the watermark moves past them; polling pauses while max_unanswered DMs are outstanding
+        self.max_attempts = int(os.getenv("DM_MAX_ATTEMPTS", "3"))
+        self.max_unanswered = int(os.getenv("DM_MAX_UNANSWERED", "500"))
+        self._retry: deque = deque()
+        self.dead_letters: deque = deque(maxlen=int(os.getenv("DM_DEAD_LETTERS", "100")))
+        self.last_fetch_error: Optional[str] = None
+        
     async def _call_gala_labs_tool(self, tool_name: str, args: dict) -> dict:
         """Call Gala Labs Instagram DM MCP tool (only in real mode)"""
         if self.demo_mode:
             return {"success": False, "error": "Demo mode - MCP not called"}
+        if self.account:
+            args = {**args, "account": self.account}
             
         try:
             # REAL MODE: Call actual Gala Labs MCP tools
@@ -85,6 +120,12 @@ class InstagramDemoTools:
     async def send_instagram_dm(self, username: str, message: str) -> Dict[str, Any]:
         """Send Instagram DM - demo or real mode"""
         
+        with tracer.span("send", mode="demo" if self.demo_mode else "real"):
+            return await self._send_instagram_dm(username, message)
+    
+    async def _send_instagram_dm(self, username: str, message: str) -> Dict[str, Any]:
+        """Send through the demo stub or the Gala Labs MCP"""
+        
         if self.demo_mode:
             # Demo mode response
             return {
@@ -113,25 +154,185 @@ class InstagramDemoTools:
                 "gala_labs_response": result.get("message", "")
             }
     
-    async def check_instagram_dms(self) -> List[Dict[str, Any]]:
-        """Check Instagram DMs - demo or real mode"""
+    async def fetch_dm_page(self, since: str = "", cursor: Optional[str] = None, page_size: int = None) -> Dict[str, Any]:
+        """One page of DMs at or after `since`, oldest first, plus the cursor of the next page (None at the end)"""
+        page_size = page_size or self.page_size
         
         if self.demo_mode:
-            # Return demo data
-            return self.demo_dms
+            ordered = sorted((dm for dm in self.demo_dms if dm["timestamp"] >= since), key=lambda dm: dm["timestamp"])
+            offset = int(cursor or 0)
+            end = offset + page_size
+            return {"success": True, "messages": ordered[offset:end], "cursor": str(end) if end < len(ordered) else None}
+        
+        # Real mode - Gala Labs list_chats, paged by cursor from the since timestamp
+        args = {"amount": page_size, "since": since}
+        if cursor:
+            args["cursor"] = cursor
+        result = await self._call_gala_labs_tool("list_chats", args)
+        if not result.get("success"):
+            return {"success": False, "messages": [], "cursor": None, "error": result.get("error", "list_chats failed")}
+        messages = sorted(
+            (dm for dm in result.get("data", []) if dm.get("timestamp", "") >= since),
+            key=lambda dm: dm.get("timestamp", "")
+        )
+        return {"success": True, "messages": messages, "cursor": result.get("next_cursor")}
+    
+    async def iter_dms(self, since: str = "", page_size: int = None, max_pages: int = None,
+                       seen: set = frozenset()) -> AsyncIterator[Dict[str, Any]]:
+        """Stream DMs from `since` page by page, oldest first, without loading the whole backlog"""
+        cursor = None
+        pages = 0
+        self.last_fetch_error = None
+        while max_pages is None or pages < max_pages:
+            with tracer.span("fetch_dms", page=pages), metrics.timer("fetch_dm_page"):
+                page = await self.fetch_dm_page(since, cursor, page_size)
+            pages += 1
+            metrics.incr("dm_pages")
+            if not page["success"]:
+                self.last_fetch_error = page["error"]
+                metrics.incr("dm_fetch_errors")
+                return
+            for dm in page["messages"]:
+                # `since` is inclusive so DMs sharing the watermark timestamp are not lost
+                if dm["timestamp"] == since and _dm_key(dm) in seen:
+                    continue
+                metrics.incr("dm_fetched")
+                yield dm
+            cursor = page["cursor"]
+            if not cursor:
+                return
+    
+    @staticmethod
+    def _advance(mark: str, keys: set, timestamp: str, key: str) -> tuple:
+        """Move a (timestamp, keys at that timestamp) mark past one DM"""
+        if timestamp > mark:
+            return timestamp, {key}
+        if timestamp == mark:
+            keys.add(key)
+        return mark, keys
+    
+    def ack_dm(self, dm: Dict[str, Any]) -> None:
+        """Mark a DM from poll_dms as answered; the watermark passes it once every older DM is answered too"""
+        entry = self._unanswered.get(_dm_key(dm))
+        if entry is None:
+            return
+        entry[1] = True
+        while self._unanswered:
+            key, (timestamp, answered, _) = next(iter(self._unanswered.items()))
+            if not answered:
+                break
+            del self._unanswered[key]
+            self.dm_watermark, self._watermark_keys = self._advance(
+                self.dm_watermark, self._watermark_keys, timestamp, key
+            )
+    
+    @property
+    def unanswered(self) -> int:
+        """DMs handed out by poll_dms and not answered yet"""
+        return len(self._unanswered)
+    
+    def retry_dm(self, dm: Dict[str, Any], error: str = "") -> bool:
+        """Hand a failed DM from poll_dms out again; after max_attempts it becomes a dead letter and is acked.
+        
+        Returns whether the DM will be retried.
+        """
+        entry = self._unanswered.get(_dm_key(dm))
+        if entry is None:
+            return False
+        entry[2] += 1
+        if entry[2] < self.max_attempts:
+            metrics.incr("dm_retries")
+            self._retry.append(dm)
+            return True
+        metrics.incr("dm_dead_letters")
+        self.dead_letters.append({**dm, "error": error, "attempts": entry[2]})
+        self.ack_dm(dm)
+        return False
+    
+    def next_poll_interval(self, interval: float, received: int) -> float:
+        """Poll again quickly while DMs keep arriving; back off exponentially while the inbox is idle"""
+        if received:
+            return self.poll_min
+        return min(interval * self.poll_backoff, self.poll_max)
+    
+    async def poll_dms(self) -> AsyncIterator[Dict[str, Any]]:
+        """Endless stream of new DMs from the watermark on, with adaptive poll intervals"""
+        interval = self.poll_min
+        while True:
+            received = 0
+            while self._retry:
+                received += 1
+                yield self._retry.popleft()
+            if len(self._unanswered) < self.max_unanswered:
+                async with aclosing(self.iter_dms(self._read_mark, seen=self._read_keys)) as dms:
+                    async for dm in dms:
+                        received += 1
+                        key = _dm_key(dm)
+                        # Handed out once (plus retries); unanswered DMs hold the watermark back until a
+                        # restart refetches them
+                        self._unanswered[key] = [dm["timestamp"], False, 0]
+                        self._read_mark, self._read_keys = self._advance(
+                            self._read_mark, self._read_keys, dm["timestamp"], key
+                        )
+                        yield dm
+                        if len(self._unanswered) >= self.max_unanswered:
+                            break  # the rest is fetched from the read mark once answers catch up
+            interval = self.poll_max if self.last_fetch_error else self.next_poll_interval(interval, received)
+            self.poll_interval = interval
+            await asyncio.sleep(interval)
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        """(timestamp, keys of DMs already returned at that timestamp) from a page cursor"""
+        try:
+            mark, keys = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return mark, set(keys)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid DM cursor: {cursor!r}") from e
+    
+    def page_cursor(self, dms: List[Dict[str, Any]], cursor: str = "") -> str:
+        """Opaque cursor resuming check_instagram_dms right after `dms` (DMs sharing a timestamp are not lost)"""
+        mark, keys = self._decode_cursor(cursor) if cursor else ("", set())
+        for dm in dms:
+            mark, keys = self._advance(mark, keys, dm["timestamp"], _dm_key(dm))
+        return base64.urlsafe_b64encode(json.dumps([mark, sorted(keys)]).encode()).decode()
+    
+    async def check_instagram_dms(self, limit: int = None, since: str = "", cursor: str = "") -> List[Dict[str, Any]]:
+        """Check Instagram DMs newer than `since`, or after a page_cursor - demo or real mode"""
+        if cursor:
+            mark, seen = self._decode_cursor(cursor)
+            dms_after = self.iter_dms(mark, page_size=limit, seen=seen)
         else:
-            # Real mode - call Gala Labs Instagram DM MCP
-            result = await self._call_gala_labs_tool("list_chats", {"amount": 5})
-            
-            if result.get("success"):
-                return result.get("data", [])
-            else:
-                return [{
-                    "username": "real_user_error",
-                    "message": "Error fetching real Instagram DMs",
-                    "timestamp": datetime.now().isoformat(),
-                    "thread_id": "error_thread"
-                }]
+            dms_after = self.iter_dms(since, page_size=limit)
+        dms = []
+        async with aclosing(dms_after) as fetched:
+            async for dm in fetched:
+                if since and not cursor and dm["timestamp"] <= since:
+                    continue
+                dms.append(dm)
+                if limit and len(dms) >= limit:
+                    break
+        
+        if self.last_fetch_error and not dms:
+            return [{
+                "username": "real_user_error",
+                "message": "Error fetching real Instagram DMs",
+                "timestamp": datetime.now().isoformat(),
+                "thread_id": "error_thread"
+            }]
+        return dms
+    
+    def export_state(self) -> Dict[str, Any]:
+        """DM watermark, for snapshots"""
+        return {"watermark": self.dm_watermark, "keys": sorted(self._watermark_keys)}
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Resume fetching from a saved watermark"""
+        self.dm_watermark = self._read_mark = state.get("watermark", "")
+        self._watermark_keys = set(state.get("keys", []))
+        self._read_keys = set(self._watermark_keys)
+        self._unanswered = {}
+        self._retry.clear()
     
     async def get_user_profile(self, username: str) -> Dict[str, Any]:
         """Get Instagram user profile - demo or real mode"""
@@ -196,6 +397,14 @@ class InstagramDemoTools:
                 "✅ Content safety filtering",
                 "✅ Citation integration"
             ],
+            "account": self.account or "default",
+            "dm_polling": {
+                "watermark": self.dm_watermark or None,
+                "poll_interval_s": self.poll_interval,
+                "unanswered": self.unanswered,
+                "dead_letters": len(self.dead_letters),
+                "last_error": self.last_fetch_error
+            },
             "configuration": {
                 "mode": mode,
                 "switch_instructions": "Set INSTAGRAM_REAL_MODE=true in .env for real mode, or false for demo mode"
@@ -241,6 +450,14 @@ class InstagramDemoTools:
                             "type": "integer",
                             "description": "Maximum number of DMs to check",
                             "default": 5
+                        },
+                        "since": {
+                            "type": "string",
+                            "description": "Only DMs after this ISO timestamp"
+                        },
+                        "cursor": {
+                            "type": "string",
+                            "description": "Cursor returned by the previous call, to fetch the next page"
                         }
                     }
                 }
@@ -271,5 +488,17 @@ class InstagramDemoTools:
             )
         ]
 
-# Global instance
-instagram_tools = InstagramDemoTools()
+# One instance per account, created on first use so the mode is read after .env is loaded
+_instagram_tools: Dict[Optional[str], InstagramDemoTools] = {}
+
+def get_instagram_tools(account: Optional[str] = None) -> InstagramDemoTools:
+    """Get the InstagramDemoTools instance for an account (None for the default account)."""
+    tools = _instagram_tools.get(account)
+    if tools is None:
+        tools = _instagram_tools[account] = InstagramDemoTools(account)
+    return tools
+
+def __getattr__(name: str) -> Any:
+    if name == "instagram_tools":
+        return get_instagram_tools()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,142 @@
+"""
+Bounded in-memory interaction history for Sassy Fact Check Bot.
+
+The server keeps recent interactions in memory for reports, but a list of
+dicts grows forever and repeats every key, category, tone and username.
+InteractionRing holds a fixed number of __slots__ records in a preallocated
+ring: once full, the oldest record is overwritten. Categorical fields and
+usernames are small integer codes into shared interners, timestamps are
+epoch floats and long texts are capped, so memory stays flat no matter how
+long the server runs. The full records stay in the interaction log.
+"""
+
+import os
+import sys
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from analytics_store import Interner
+
+CODED_FIELDS = ("user", "category", "tone", "message_type")
+
+
+class InteractionRecord:
+    """One interaction with interned codes instead of repeated strings."""
+
+    __slots__ = ("at", "user", "category", "tone", "message_type", "content", "response", "sources", "trace_id")
+
+    def __init__(self, at: float, user: int, category: int, tone: int, message_type: int,
+                 content: str, response: str, sources: tuple, trace_id: Optional[str]):
+        self.at = at
+        self.user = user
+        self.category = category
+        self.tone = tone
+        self.message_type = message_type
+        self.content = content
+        self.response = response
+        self.sources = sources
+        self.trace_id = trace_id
+
+
+class InteractionRing:
+    """Fixed-capacity ring of the most recent interactions."""
+
+    def __init__(self, capacity: int = None, text_chars: int = None):
+        self.capacity = max(1, capacity or int(os.getenv("INTERACTION_RING_SIZE", "1000")))
+        self.text_chars = text_chars or int(os.getenv("INTERACTION_RING_TEXT_CHARS", "500"))
+        self.interners: Dict[str, Interner] = {name: Interner() for name in CODED_FIELDS}
+        self._records: List[Optional[InteractionRecord]] = [None] * self.capacity
+        self._next = 0
+        self._size = 0
+        self.total = 0  # appended since start, including overwritten records
+
+    def append(self, interaction: Dict[str, Any]) -> None:
+        """Store an interaction, overwriting the oldest once the ring is full (O(1) amortized)."""
+        try:
+            at = datetime.fromisoformat(interaction.get("timestamp", "")).timestamp()
+        except ValueError:
+            at = datetime.now().timestamp()
+        interners = self.interners
+        self._records[self._next] = InteractionRecord(
+            at,
+            interners["user"].code(interaction.get("username") or ""),
+            interners["category"].code(interaction.get("category") or "unknown"),
+            interners["tone"].code(interaction.get("tone_used") or "unknown"),
+            interners["message_type"].code(interaction.get("message_type") or "text"),
+            (interaction.get("content") or "")[:self.text_chars],
+            (interaction.get("response") or "")[:self.text_chars],
+            tuple(sys.intern(source) for source in interaction.get("sources") or ()),
+            interaction.get("trace_id"),
+        )
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.total += 1
+        # Usernames churn; drop codes no live record uses so the interner stays bounded too
+        if len(interners["user"]) > 2 * self.capacity:
+            self._compact_users()
+
+    def _compact_users(self) -> None:
+        old = self.interners["user"].values
+        users = Interner()
+        for record in self._records:
+            if record is not None:
+                record.user = users.code(old[record.user])
+        self.interners["user"] = users
+
+    def _ordered(self) -> Iterator[InteractionRecord]:
+        """Live records, oldest first."""
+        start = (self._next - self._size) % self.capacity
+        for offset in range(self._size):
+            yield self._records[(start + offset) % self.capacity]
+
+    def to_dict(self, record: InteractionRecord) -> Dict[str, Any]:
+        """Expand a record back into the logged interaction shape."""
+        interners = self.interners
+        return {
+            "timestamp": datetime.fromtimestamp(record.at).isoformat(),
+            "username": interners["user"].values[record.user],
+            "content": record.content,
+            "message_type": interners["message_type"].values[record.message_type],
+            "response": record.response,
+            "tone_used": interners["tone"].values[record.tone],
+            "category": interners["category"].values[record.category],
+            "sources": list(record.sources),
+            "trace_id": record.trace_id,
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for record in self._ordered():
+            yield self.to_dict(record)
+
+    def recent(self, count: int) -> List[Dict[str, Any]]:
+        """The newest `count` interactions, newest first."""
+        records = list(self._ordered())[-count:] if count > 0 else []
+        return [self.to_dict(record) for record in reversed(records)]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def memory_bytes(self) -> int:
+        """Approximate deep size: slot table, records, their strings and the interners."""
+        total = sys.getsizeof(self._records)
+        for record in self._records:
+            if record is None:
+                continue
+            total += sys.getsizeof(record) + sys.getsizeof(record.at)
+            total += sys.getsizeof(record.content) + sys.getsizeof(record.response) + sys.getsizeof(record.sources)
+            if record.trace_id:
+                total += sys.getsizeof(record.trace_id)
+        for interner in self.interners.values():
+            total += sys.getsizeof(interner.values) + sys.getsizeof(interner.codes)
+            total += sum(sys.getsizeof(value) for value in interner.values)
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Fill level, lifetime appends and memory use."""
+        return {
+            "records": self._size,
+            "capacity": self.capacity,
+            "total": self.total,
+            "users": len(self.interners["user"]),
+            "memory_bytes": self.memory_bytes(),
+        }
@@ -0,0 +1,169 @@
+"""
+Process lifecycle for Sassy Fact Check Bot.
+
+LifecycleManager turns SIGTERM/SIGINT into an orderly shutdown: stop taking
+new work, give in-flight fact-checks a deadline to finish, cancel whatever is
+left, then run the registered flush steps (write-behind logs, ledger,
+snapshot). A marker file records whether the last run shut down cleanly so
+the next start can report what it recovered.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from paths import data_path
+from write_behind import atomic_write_json
+
+
+class LifecycleManager:
+    """Tracks in-flight work and runs drain + flush steps on shutdown."""
+
+    def __init__(self, state_file: str = None, drain_seconds: float = None):
+        self.state_file = Path(state_file or os.getenv("LIFECYCLE_STATE_FILE") or data_path("bot_lifecycle.json"))
+        self.drain_seconds = drain_seconds or float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "20"))
+        self.accepting = True
+        self.stop_reason: Optional[str] = None
+        self._flush_steps: List[Tuple[str, Callable[[], Any]]] = []
+        self._inflight: Dict[int, str] = {}
+        self._next_id = 0
+        self._stop: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._report: Optional[Dict[str, Any]] = None
+
+    def on_shutdown(self, name: str, step: Callable[[], Any]) -> None:
+        """Register a flush step; steps run in registration order."""
+        self._flush_steps.append((name, step))
+
+    def start(self) -> Dict[str, Any]:
+        """Install signal handlers, mark the run as live and return how the previous run ended."""
+        self._stop = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.request_stop, sig.name)
+            except (NotImplementedError, RuntimeError):
+                pass  # e.g. Windows; KeyboardInterrupt still ends the run
+
+        previous = {}
+        if self.state_file.exists():
+            try:
+                with open(self.state_file, 'r') as f:
+                    previous = json.load(f)
+            except Exception as e:
+                print(f"Failed to read lifecycle state: {e}")
+        try:
+            atomic_write_json(self.state_file, {"clean": False, "pid": os.getpid(),
+                                                "started_at": datetime.now().isoformat()})
+        except Exception as e:
+            print(f"Failed to write lifecycle state: {e}")
+        return previous
+
+    def request_stop(self, reason: str = "requested") -> None:
+        """Stop taking new work and wake the main task (signal-handler safe)."""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            print(f"🛑 {reason} received, shutting down gracefully...")
+        self.accepting = False
+        if self._stop is not None:
+            self._stop.set()
+
+    async def wait(self, task: asyncio.Task) -> None:
+        """Return when the task finishes or a stop is requested."""
+        stop = asyncio.create_task(self._stop.wait())
+        try:
+            await asyncio.wait({task, stop}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop.cancel()
+
+    @contextmanager
+    def inflight(self, label: str):
+        """Track one unit of work so shutdown waits for it."""
+        self._next_id += 1
+        work_id = self._next_id
+        self._inflight[work_id] = label
+        if self._idle is not None:
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            del self._inflight[work_id]
+            if not self._inflight and self._idle is not None:
+                self._idle.set()
+
+    async def shutdown(self, *tasks: Optional[asyncio.Task]) -> Dict[str, Any]:
+        """Drain in-flight work up to the deadline, cancel `tasks`, run flush steps (idempotent)."""
+        if self._report is not None:
+            return self._report
+        started = time.perf_counter()
+        self.accepting = False
+        self.stop_reason = self.stop_reason or "exit"
+
+        waiting = len(self._inflight)
+        if waiting and self._idle is not None:
+            try:
+                await asyncio.wait_for(self._idle.wait(), self.drain_seconds)
+            except asyncio.TimeoutError:
+                pass
+        abandoned = sorted(self._inflight.values())
+
+        for task in tasks:
+            if task is not None and not task.done():
+                task.cancel()
+        pending = [task for task in tasks if task is not None]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        flushed, failed = [], []
+        for name, step in self._flush_steps:
+            try:
+                step()
+                flushed.append(name)
+            except Exception as e:
+                failed.append(name)
+                print(f"Failed to flush {name} on shutdown: {e}")
+
+        self._report = {
+            "clean": not failed,
+            "reason": self.stop_reason,
+            "stopped_at": datetime.now().isoformat(),
+            "drained": waiting - len(abandoned),
+            "abandoned": abandoned,
+            "flushed": flushed,
+            "failed": failed,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+        try:
+            atomic_write_json(self.state_file, self._report)
+        except Exception as e:
+            print(f"Failed to write lifecycle state: {e}")
+        return self._report
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"accepting": self.accepting, "inflight": len(self._inflight), "stop_reason": self.stop_reason}
+
+
+def format_recovery(previous: Dict[str, Any], journal_recovered: int) -> str:
+    """One-line summary of how the previous run ended and what was recovered."""
+    if not previous:
+        text = "first start"
+    elif previous.get("clean"):
+        text = (f"previous run stopped cleanly ({previous.get('reason')}) at {previous.get('stopped_at')}, "
+                f"drained {previous.get('drained', 0)} in-flight request(s)")
+        if previous.get("abandoned"):
+            text += f", abandoned {len(previous['abandoned'])}"
+    elif "failed" in previous:
+        text = f"previous shutdown could not flush {', '.join(previous['failed'])}"
+    else:
+        text = f"previous run (pid {previous.get('pid')}, started {previous.get('started_at')}) did not shut down cleanly"
+    if journal_recovered:
+        text += f"; recovered {journal_recovered} unflushed interaction(s) from the journal"
+    return text
@@ -4,13 +4,19 @@ Sassy Fact Check Bot - MCP Server - PERFECT VERSION
 """
 
 import asyncio
+import importlib.metadata
 import json
 import os
 import sys
+import time
+from contextlib import aclosing, closing
+from itertools import islice
 from typing import Any, Dict, List, Optional
 from datetime import datetime
+from io import TextIOWrapper
 from pathlib import Path
 
+import anyio
 import mcp.types as types
 from mcp.server.models import InitializationOptions
 import mcp.server.stdio
@@ -24,16 +30,93 @@ sys.path.insert(0, str(project_root))
 
 from tools.sassy_fact_check import SassyFactChecker
 from tools.welcome_followers import FollowerWelcomer
+from analytics_store import AnalyticsStore
+from cache_warmer import CacheWarmer, format_report
+from caption_batch import CaptionBatch
 from claude_client import ClaudeFactChecker
-from instagram_dm_mcp import instagram_tools
+from metrics import metrics
+from snapshot import SnapshotManager
+from tenancy import Account, AccountRegistry
+from tracing import tracer
+from instagram_dm_mcp import get_instagram_tools
+from health import health
+from lifecycle import LifecycleManager, format_recovery
+from tool_progress import ToolProgress, run_bounded
+from worker_pool import WorkerPool
 
 # Load environment variables
 load_dotenv()
 
-# Initialize components
+# mcp versions whose RequestResponder.__exit__ is known to leak client cancellations (see below)
+CANCELLATION_PATCH_VERSIONS = ("1.10.1",)
+
+def _survive_client_cancellation() -> None:
+    """Keep the session alive when a client cancels a tool call.
+
+    mcp's RequestResponder.__exit__ drops the result of its cancel scope's
+    __exit__, so the cancellation it raised in the handler is not swallowed and
+    tears down the server's task group (the whole stdio session). A tool handler
+    cannot absorb it instead: mcp has already answered the cancelled request, so
+    returning a result fails with "Request already responded to".
+
+    The replacement relies on RequestResponder internals, so it is only applied
+    to the mcp versions it was checked against (requirements pin one of them).
+    """
+    version = importlib.metadata.version("mcp")
+    if version not in CANCELLATION_PATCH_VERSIONS:
+        print(f"⚠️ mcp {version} is not a version checked for the tool-cancellation fix; "
+              f"a client cancelling a tool call may end the session")
+        return
+    from mcp.shared.session import RequestResponder
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self._completed:
+                self._on_complete(self)
+        finally:
+            self._entered = False
+            if not self._cancel_scope:
+                raise RuntimeError("No active cancel scope")
+            return self._cancel_scope.__exit__(exc_type, exc_val, exc_tb)
+
+    RequestResponder.__exit__ = __exit__
+
+_survive_client_cancellation()
+
+# Initialize components (cheap - heavy parts are built on first tool use)
 server = Server("sassy-factcheck-bot")
 fact_checker = SassyFactChecker()
 welcomer = FollowerWelcomer()
+accounts = AccountRegistry(welcomer)
+snapshots = SnapshotManager()
+worker_pool = WorkerPool(fact_checker)
+cache_warmer = CacheWarmer(fact_checker)
+lifecycle = LifecycleManager()
+snapshots.register(
+    "response_cache",
+    lambda: fact_checker.response_cache.export_state(),
+    lambda state: fact_checker.response_cache.restore_state(state)
+)
+snapshots.register("stats", fact_checker.export_state, fact_checker.restore_state)
+snapshots.register("followers", welcomer.export_state, welcomer.restore_state)
+snapshots.register(
+    "analytics",
+    lambda: fact_checker.analytics.export_state(),
+    fact_checker.restore_analytics
+)
+snapshots.register(
+    "dm_watermark",
+    lambda: get_instagram_tools().export_state(),
+    lambda state: get_instagram_tools().restore_state(state)
+)
+snapshots.register(
+    "conversations",
+    lambda: fact_checker.conversations.export_state(),
+    lambda state: fact_checker.conversations.restore_state(state)
+)
+snapshots.register("accounts", accounts.export_state, accounts.restore_state)
+
+ACCOUNT_PROPERTY = {"type": "string", "description": "Account to act for (defaults to the bot's own account; see BOT_ACCOUNTS)"}
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
@@ -49,12 +132,87 @@ async def handle_list_tools() -> list[types.Tool]:
                 "type": "object",
                 "properties": {
                     "username": {"type": "string", "description": "Instagram username"},
-                    "content": {"type": "string", "description": "Content to fact-check"}
+                    "content": {"type": "string", "description": "Content to fact-check"},
+                    "message_id": {"type": "string", "description": "Optional DM id so multiple bot processes never answer the same DM twice"},
+                    "thread_id": {"type": "string", "description": "Optional DM thread id; messages in one thread are answered in order"},
+                    "account": ACCOUNT_PROPERTY
                 },
                 "required": ["username", "content"]
             }
         ),
         
+        types.Tool(
+            name="batch_fact_check",
+            description="📦 Fact-check many claims at once; each reply is streamed as a progress update as soon as it is ready",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "items": {
+                        "type": "array",
+                        "description": "Claims to fact-check",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "username": {"type": "string", "description": "Instagram username"},
+                                "content": {"type": "string", "description": "Content to fact-check"},
+                                "message_id": {"type": "string", "description": "Optional DM id (deduplicated across bot processes)"},
+                                "thread_id": {"type": "string", "description": "Optional DM thread id"}
+                            },
+                            "required": ["username", "content"]
+                        }
+                    },
+                    "concurrency": {"type": "integer", "description": "Claims checked in parallel (defaults to BATCH_CONCURRENCY)"},
+                    "account": ACCOUNT_PROPERTY
+                },
+                "required": ["items"]
+            }
+        ),
+        
+        types.Tool(
+            name="triage_dms",
+            description="🗂️ Fetch the DM backlog and generate replies for every message (don't send), streaming each as it completes",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "limit": {"type": "integer", "description": "Maximum number of DMs to triage", "default": 10},
+                    "since": {"type": "string", "description": "Only DMs after this ISO timestamp"},
+                    "cursor": {"type": "string", "description": "Cursor returned by the previous call, to triage the next page"},
+                    "concurrency": {"type": "integer", "description": "DMs checked in parallel (defaults to BATCH_CONCURRENCY)"},
+                    "account": ACCOUNT_PROPERTY
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="scan_captions",
+            description="🔎 Clean, dedupe and claim-score a bulk batch of post/comment captions; returns only the ones worth fact-checking",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "captions": {
+                        "type": "array",
+                        "description": "Captions as plain strings or objects with caption, id and username",
+                        "items": {
+                            "anyOf": [
+                                {"type": "string"},
+                                {
+                                    "type": "object",
+                                    "properties": {
+                                        "caption": {"type": "string", "description": "Caption or comment text"},
+                                        "id": {"type": "string", "description": "Optional post or comment id"},
+                                        "username": {"type": "string", "description": "Optional author"}
+                                    },
+                                    "required": ["caption"]
+                                }
+                            ]
+                        }
+                    },
+                    "limit": {"type": "integer", "description": "Maximum candidates to return", "default": 20}
+                },
+                "required": ["captions"]
+            }
+        ),
+        
         types.Tool(
             name="generate_welcome_message",
             description="💅 Generate welcome message (don't send - just generate)",
@@ -67,10 +225,99 @@ async def handle_list_tools() -> list[types.Tool]:
             }
         ),
         
+        types.Tool(
+            name="bot_metrics",
+            description="📊 Show per-stage latency histograms and request counters",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "format": {
+                        "type": "string",
+                        "enum": ["summary", "prometheus"],
+                        "description": "Output format",
+                        "default": "summary"
+                    },
+                    "dump_path": {"type": "string", "description": "Optional file to write Prometheus text to (defaults to METRICS_PROM_FILE)"}
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="usage_report",
+            description="💸 Show Claude token usage and cost by user, category or day",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "enum": ["top_spenders", "by_category", "daily"],
+                        "description": "Which breakdown to show",
+                        "default": "top_spenders"
+                    },
+                    "days": {"type": "integer", "description": "Number of days to include", "default": 1},
+                    "limit": {"type": "integer", "description": "Maximum rows to show", "default": 5}
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="warm_cache",
+            description="🔥 Pre-generate reply variants for trending claims so they skip Claude",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "top_n": {"type": "integer", "description": "Trending claims per category", "default": 10},
+                    "variants": {"type": "integer", "description": "Variants per claim (capped by RESPONSE_CACHE_VARIANTS)"},
+                    "dry_run": {"type": "boolean", "description": "Only show what would be generated", "default": False}
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="analytics",
+            description="📈 Query interaction history: volume by category or tone, reply length, spikes, top users",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "enum": ["by_category", "by_tone", "response_length_by_tone", "spikes", "top_users", "daily"],
+                        "description": "Which aggregation to run",
+                        "default": "by_category"
+                    },
+                    "days": {"type": "integer", "description": "Number of days to include", "default": 7},
+                    "category": {"type": "string", "description": "Only count interactions in this category"},
+                    "limit": {"type": "integer", "description": "Maximum rows to show", "default": 10}
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="bot_health",
+            description="🩺 Health of Claude, filters, logging and workers from recent traffic and cached probes (no tokens spent)",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "refresh": {"type": "boolean", "description": "Re-run every probe now instead of using passive data and cached results", "default": False}
+                }
+            }
+        ),
+        
+        types.Tool(
+            name="account_status",
+            description="👥 Per-account DM cursor, outbox, followers and rate/cost quota usage",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "account": {"type": "string", "description": "Only this account (defaults to all accounts)"}
+                }
+            }
+        ),
+        
         types.Tool(
             name="instagram_integration_status",
             description="🔍 Show Instagram MCP integration status",
-            inputSchema={"type": "object", "properties": {}}
+            inputSchema={"type": "object", "properties": {"account": ACCOUNT_PROPERTY}}
         )
     ]
     
@@ -83,7 +330,10 @@ async def handle_list_tools() -> list[types.Tool]:
                 inputSchema={
                     "type": "object",
                     "properties": {
-                        "limit": {"type": "integer", "description": "Maximum number of DMs to check", "default": 5}
+                        "limit": {"type": "integer", "description": "Maximum number of DMs to check", "default": 5},
+                        "since": {"type": "string", "description": "Only DMs after this ISO timestamp"},
+                        "cursor": {"type": "string", "description": "Cursor returned by the previous call, to fetch the next page"},
+                        "account": ACCOUNT_PROPERTY
                     }
                 }
             )
@@ -98,15 +348,41 @@ async def handle_call_tool(name: str, arguments: dict | None) -> list[types.Text
     if arguments is None:
         arguments = {}
     
+    if not lifecycle.accepting:
+        return [types.TextContent(type="text", text=f"⏳ Bot is shutting down - {name} not started, try again shortly")]
+    
+    with lifecycle.inflight(f"tool:{name}"), tracer.trace(f"tool:{name}", tool=name):
+        return await _dispatch_tool(name, arguments)
+
+async def _dispatch_tool(name: str, arguments: dict) -> list[types.TextContent]:
+    """Route a tool call to its handler."""
     try:
         if name == "generate_sassy_response":
             return await handle_generate_sassy_response(arguments)
+        elif name == "batch_fact_check":
+            return await handle_batch_fact_check(arguments)
+        elif name == "triage_dms":
+            return await handle_triage_dms(arguments)
+        elif name == "scan_captions":
+            return await handle_scan_captions(arguments)
         elif name == "generate_welcome_message":
             return await handle_generate_welcome_message(arguments)
         elif name == "check_instagram_dms":
             return await handle_check_instagram_dms(arguments)
         elif name == "instagram_integration_status":
             return await handle_instagram_integration_status(arguments)
+        elif name == "bot_metrics":
+            return await handle_bot_metrics(arguments)
+        elif name == "usage_report":
+            return await handle_usage_report(arguments)
+        elif name == "warm_cache":
+            return await handle_warm_cache(arguments)
+        elif name == "analytics":
+            return await handle_analytics(arguments)
+        elif name == "bot_health":
+            return await handle_bot_health(arguments)
+        elif name == "account_status":
+            return await handle_account_status(arguments)
         else:
             raise ValueError(f"Unknown tool: {name}")
             
@@ -122,13 +398,132 @@ async def handle_generate_sassy_response(arguments: dict) -> list[types.TextCont
         return [types.TextContent(type="text", text="❌ Username and content required!")]
     
     # Generate sassy response
-    fact_result = await fact_checker.process_dm_content(content, username, "text")
+    account = accounts.get(arguments.get("account"))
+    fact_result = await account.process(
+        worker_pool, content, username, "text", arguments.get("message_id"), arguments.get("thread_id")
+    )
+    if fact_result.get("category") == "duplicate":
+        return [types.TextContent(type="text", text=f"⏭️ DM {arguments['message_id']} is already handled by another bot process")]
     sassy_response = fact_result.get("response", "No response generated")
     
     response_text = f"💅 **Generated sassy response for @{username}:**\n\n{sassy_response}\n\n✅ Ready to send via Instagram MCP!"
     
     return [types.TextContent(type="text", text=response_text)]
 
+def _format_item(number: int, item: dict, result: Any) -> str:
+    """One line per batch item, used for both progress updates and the final result."""
+    if result is None:
+        return f"⏸️ {number}. @{item['username']}: not started (bot is shutting down)"
+    if isinstance(result, Exception):
+        return f"❌ {number}. @{item['username']}: failed ({result})"
+    if result.get("category") == "duplicate":
+        return f"⏭️ {number}. @{item['username']}: already handled by another bot process"
+    return f"💅 {number}. @{item['username']} [{result.get('category')}]: {result.get('response')}"
+
+async def _fact_check_items(
+    title: str,
+    items: List[dict],
+    concurrency: Optional[int],
+    account: Account
+) -> list[types.TextContent]:
+    """Fact-check items concurrently, reporting each result as a progress update when it finishes.
+    
+    Cancelling the tool call cancels the in-flight checks and skips the rest.
+    """
+    started = time.perf_counter()
+    progress = ToolProgress(server, len(items))
+    limit = concurrency or int(os.getenv("BATCH_CONCURRENCY", "4"))
+    jobs = [
+        lambda item=item: account.process(
+            worker_pool, item["content"], item["username"], "text", item.get("message_id"), item.get("thread_id")
+        )
+        for item in items
+    ]
+    
+    results: List[Any] = [None] * len(items)
+    # Shutting down: items already running finish within the drain, the rest never start
+    async with aclosing(run_bounded(jobs, limit, lambda: lifecycle.accepting)) as finished:
+        async for index, result in finished:
+            results[index] = result
+            metrics.incr("batch_items", "error" if isinstance(result, Exception) else result.get("category", "unknown"))
+            await progress.advance(_format_item(index + 1, items[index], result))
+    
+    lines = [_format_item(number, item, result) for number, (item, result) in enumerate(zip(items, results), 1)]
+    failed = sum(1 for result in results if isinstance(result, Exception) or (result or {}).get("category") == "error")
+    not_started = results.count(None)
+    summary = (
+        f"{title}: {len(items) - failed - not_started} answered, {failed} failed"
+        + (f", {not_started} not started" if not_started else "")
+        + f" in {time.perf_counter() - started:.1f}s"
+    )
+    return [types.TextContent(type="text", text=summary)] + [types.TextContent(type="text", text=line) for line in lines]
+
+async def handle_batch_fact_check(arguments: dict) -> list[types.TextContent]:
+    """Fact-check a list of claims with per-item progress"""
+    items = [item for item in arguments.get("items") or [] if item.get("username") and item.get("content")]
+    if not items:
+        return [types.TextContent(type="text", text="❌ At least one item with username and content required!")]
+    
+    max_items = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+    if len(items) > max_items:
+        return [types.TextContent(type="text", text=f"❌ At most {max_items} items per batch (got {len(items)})")]
+    
+    account = accounts.get(arguments.get("account"))
+    return await _fact_check_items(
+        f"📦 **Batch fact-check** ({len(items)} claims)", items, arguments.get("concurrency"), account
+    )
+
+async def handle_triage_dms(arguments: dict) -> list[types.TextContent]:
+    """Generate replies for the DM backlog with per-DM progress - don't send"""
+    limit = min(arguments.get("limit", 10), int(os.getenv("BATCH_MAX_ITEMS", "50")))
+    account = accounts.get(arguments.get("account"))
+    tools = account.instagram
+    cursor = arguments.get("cursor", "")
+    dms = await tools.check_instagram_dms(limit, arguments.get("since", ""), cursor)
+    if tools.last_fetch_error and dms and dms[0]["username"] == "real_user_error":
+        return [types.TextContent(type="text", text=f"❌ Could not fetch DMs: {tools.last_fetch_error}")]
+    if not dms:
+        return [types.TextContent(type="text", text="✅ No DMs waiting!")]
+    
+    items = [
+        {"username": dm["username"], "content": dm["message"], "message_id": dm.get("message_id"), "thread_id": dm.get("thread_id")}
+        for dm in dms
+    ]
+    contents = await _fact_check_items(
+        f"🗂️ **DM triage** ({len(items)} DMs)", items, arguments.get("concurrency"), account
+    )
+    if len(dms) == limit:
+        contents.append(types.TextContent(type="text", text=f"⏭️ More may be waiting: call again with cursor=\"{tools.page_cursor(dms, cursor)}\""))
+    return contents
+
+async def handle_scan_captions(arguments: dict) -> list[types.TextContent]:
+    """Find fact-check candidates in a bulk batch of captions - don't check them"""
+    captions = arguments.get("captions") or []
+    if not captions:
+        return [types.TextContent(type="text", text="❌ At least one caption required!")]
+    limit = arguments.get("limit", 20)
+    
+    def scan():
+        batch = CaptionBatch(fact_checker.claim_gate)
+        with closing(batch.candidates(captions)) as found:
+            candidates = list(islice(found, limit))
+        return candidates, batch.get_stats()
+    
+    # CPU-bound; keep the event loop free for other tool calls
+    candidates, stats = await asyncio.to_thread(scan)
+    lines = [
+        f"🔎 **Caption scan**: {stats['captions']} captions → {len(candidates)} candidates "
+        f"({stats['duplicates']} duplicates, {stats['too_short']} too short, {stats['empty']} empty, "
+        f"{stats['not_claims']} not claims) at {stats['captions_per_sec']:,} captions/sec"
+    ]
+    if len(candidates) == limit:
+        lines.append(f"(stopped after {limit} candidates)")
+    for number, candidate in enumerate(candidates, 1):
+        author = f"@{candidate['username']} " if candidate.get("username") else ""
+        score = f" [{candidate['claim_score']}]" if candidate.get("claim_score") is not None else ""
+        lines.append(f"{number}. {author}{candidate['text'][:200]}{score}")
+    return [types.TextContent(type="text", text="\n".join(lines))]
+
 async def handle_generate_welcome_message(arguments: dict) -> list[types.TextContent]:
     """Generate welcome message only - don't send"""
     username = arguments.get("username", "")
@@ -148,24 +543,28 @@ async def handle_check_instagram_dms(arguments: dict) -> list[types.TextContent]
     limit = arguments.get("limit", 5)
     
     # This function only gets called in demo mode now
-    dms = await instagram_tools.check_instagram_dms()
+    tools = accounts.get(arguments.get("account")).instagram
+    cursor = arguments.get("cursor", "")
+    dms = await tools.check_instagram_dms(limit, arguments.get("since", ""), cursor)
     
     if not dms:
         return [types.TextContent(type="text", text="✅ No demo claims available!")]
     
-    response_text = f"📱 **Demo Mode - Practice Claims!** ({len(dms)} available)\n\n"
+    response_text = f"📱 **Demo Mode - Practice Claims!** ({len(dms)} shown)\n\n"
     
-    for i, dm in enumerate(dms[:limit], 1):
+    for i, dm in enumerate(dms, 1):
         response_text += f"**{i}. @{dm['username']}:**\n"
         response_text += f"Claim: \"{dm['message']}\"\n\n"
     
+    if len(dms) == limit:
+        response_text += f"⏭️ More may be waiting: call again with cursor=\"{tools.page_cursor(dms, cursor)}\"\n\n"
     response_text += f"💅 Use `generate_sassy_response` to practice roasting these!"
     
     return [types.TextContent(type="text", text=response_text)]
 
 async def handle_instagram_integration_status(arguments: dict) -> list[types.TextContent]:
     """Handle Instagram integration status check"""
-    status = instagram_tools.get_integration_status()
+    status = accounts.get(arguments.get("account")).instagram.get_integration_status()
     real_mode = os.getenv("INSTAGRAM_REAL_MODE", "false").lower() == "true"
     
     response_text = f"""🔍 **Instagram MCP Integration Status**
@@ -177,38 +576,395 @@ async def handle_instagram_integration_status(arguments: dict) -> list[types.Tex
 
 **Available Tools:**
 - generate_sassy_response - Create sassy fact-checks
-- generate_welcome_message - Create welcome messages"""
+- batch_fact_check - Fact-check many claims with streamed progress
+- triage_dms - Generate replies for the DM backlog with streamed progress
+- scan_captions - Find fact-check candidates in bulk post/comment captions
+- generate_welcome_message - Create welcome messages
+- bot_metrics - Latency histograms and counters
+- usage_report - Token and cost accounting
+- warm_cache - Pre-generate replies for trending claims
+- analytics - Aggregations over the interaction history
+- bot_health - Cheap, cached health report
+- account_status - Per-account cursors, outboxes and quotas"""
 
     if not real_mode:
         response_text += "\n- check_instagram_dms - Practice claims (demo mode only)"
     
     response_text += f"\n- instagram_integration_status - This status\n\n{status['note']}"
+    if len(accounts) > 1:
+        response_text += f"\n\n👥 Serving {len(accounts)} accounts: {', '.join(account.account_id for account in accounts)}"
+    
+    return [types.TextContent(type="text", text=response_text)]
+
+async def handle_bot_metrics(arguments: dict) -> list[types.TextContent]:
+    """Handle metrics report"""
+    output_format = arguments.get("format", "summary")
+    memory = fact_checker.memory_report()  # refreshes the memory gauges
+    dump_path = metrics.dump_prometheus(arguments.get("dump_path"))
+    
+    if output_format == "prometheus":
+        return [types.TextContent(type="text", text=metrics.to_prometheus())]
+    
+    snapshot = metrics.snapshot()
+    response_text = f"📊 **Bot Metrics** (uptime {snapshot['uptime_seconds']}s)\n\n**Stage latency:**\n"
+    
+    for stage, summary in snapshot["stages"].items():
+        response_text += (
+            f"- {stage}: n={summary['count']} p50={summary['p50_ms']}ms "
+            f"p90={summary['p90_ms']}ms p99={summary['p99_ms']}ms max={summary['max_ms']}ms\n"
+        )
+    
+    response_text += "\n**Counters:**\n"
+    for counter, by_category in snapshot["counters"].items():
+        breakdown = ", ".join(f"{category}={value}" for category, value in by_category.items())
+        response_text += f"- {counter}: {breakdown}\n"
+    
+    routes = fact_checker.claude_client.router.get_stats()
+    if any(route["calls"] for route in routes.values()):
+        response_text += "\n**Model routes:**\n"
+        for name, route in routes.items():
+            response_text += (
+                f"- {name} ({route['model']}): {route['calls']} calls, {route['mean_latency_ms']}ms mean, "
+                f"${route['cost_per_call_usd']:.5f}/call, escalation rate {route['escalation_rate']:.0%}\n"
+            )
+    
+    response_text += f"\n**Rules:** {fact_checker.filter.rules.describe()}\n"
+    
+    ring = memory["interaction_log"]
+    response_text += f"\n**Memory:** {memory['rss_bytes'] / 2**20:.1f} MB resident\n"
+    response_text += (
+        f"- interaction_log: {ring['records']}/{ring['capacity']} records ({ring['total']} since start), "
+        f"{ring['memory_bytes'] / 1024:.1f} KB"
+    )
+    if ring["records"]:
+        as_dicts = AnalyticsStore.dict_records_bytes(list(fact_checker.interaction_log))
+        response_text += f" (~{as_dicts / 1024:.1f} KB as dicts)"
+    response_text += "\n"
+    if "analytics" in memory["components"]:
+        response_text += f"- analytics: {memory['components']['analytics'] / 1024:.1f} KB\n"
+    
+    worker_snapshots = await worker_pool.worker_metrics()
+    if worker_snapshots:
+        response_text += "\n**Workers:**\n"
+    for worker in worker_snapshots:
+        stage = worker["stages"].get("process_dm_content", {})
+        requests = sum(worker["counters"].get("requests", {}).values())
+        response_text += f"- worker {worker['worker']}: {requests} requests, p50={stage.get('p50_ms', 0)}ms p99={stage.get('p99_ms', 0)}ms\n"
+    
+    if dump_path:
+        response_text += f"\n📁 Prometheus metrics written to {dump_path}"
+    
+    return [types.TextContent(type="text", text=response_text)]
+
+async def handle_usage_report(arguments: dict) -> list[types.TextContent]:
+    """Handle token and cost accounting queries"""
+    query = arguments.get("query", "top_spenders")
+    days = arguments.get("days", 1)
+    limit = arguments.get("limit", 5)
+    ledger = fact_checker.ledger
+    
+    budget = ledger.get_budget_status()
+    response_text = f"💸 **Claude Usage** (last {days} day(s))\n\n"
+    response_text += f"Today: ${budget['spent_usd']:.4f} spent, {budget['tokens_used']} tokens"
+    if budget["daily_budget_usd"]:
+        response_text += f" of ${budget['daily_budget_usd']:.2f} budget"
+    if budget["degraded_mode"]:
+        response_text += f"\n⚠️ Budget exceeded - running in {budget['degraded_mode']} mode"
+    response_text += "\n\n"
+    
+    if query == "by_category":
+        rows = ledger.cost_by_category(days)
+        for row in rows[:limit]:
+            response_text += (
+                f"- {row['category']}: ${row['cost_usd']:.4f} over {row['calls']} calls "
+                f"(${row['cost_per_call_usd']:.5f}/call)\n"
+            )
+    elif query == "daily":
+        rows = ledger.daily_totals(days)
+        for row in rows[:limit]:
+            response_text += (
+                f"- {row['day']}: ${row['cost_usd']:.4f}, {row['input_tokens']} in / "
+                f"{row['output_tokens']} out / {row['cached_tokens']} cached\n"
+            )
+    else:
+        rows = ledger.top_spenders(days, limit)
+        for row in rows:
+            response_text += f"- @{row['username']}: ${row['cost_usd']:.4f} over {row['calls']} calls\n"
+    
+    if not rows:
+        response_text += "No Claude usage recorded yet."
+    
+    return [types.TextContent(type="text", text=response_text)]
+
+async def handle_warm_cache(arguments: dict) -> list[types.TextContent]:
+    """Handle an on-demand cache warming pass"""
+    warmer = CacheWarmer(fact_checker, arguments.get("top_n"), arguments.get("variants"))
+    report = await warmer.run(force=True, dry_run=arguments.get("dry_run", False), progress=ToolProgress(server))
+    return [types.TextContent(type="text", text=format_report(report))]
+
+async def handle_analytics(arguments: dict) -> list[types.TextContent]:
+    """Handle columnar analytics queries"""
+    query = arguments.get("query", "by_category")
+    days = arguments.get("days", 7)
+    limit = arguments.get("limit", 10)
+    where = {"category": arguments["category"]} if arguments.get("category") else None
+    
+    store = await asyncio.to_thread(fact_checker.refresh_analytics)
+    response_text = f"📈 **Analytics** ({query}, last {days} day(s))\n\n"
+    
+    with metrics.timer(f"analytics_{query}"):
+        if query == "spikes":
+            rows = [
+                f"- {row['category']}: {row['count']} vs ~{row['expected']} expected "
+                f"({'new' if row['ratio'] is None else str(row['ratio']) + 'x'})"
+                for row in store.spikes(days)
+            ]
+        elif query == "daily":
+            rows = [f"- {day}: {count}" for day, count in store.daily_counts(days, where)]
+        elif query == "response_length_by_tone":
+            means = store.group_mean("words", "tone", days, where)
+            rows = [f"- {tone}: {mean} words" for tone, mean in sorted(means.items(), key=lambda item: -item[1])]
+        else:
+            by = {"by_tone": "tone", "top_users": "user"}.get(query, "category")
+            counts = store.group_count(by, days, where)
+            prefix = "@" if by == "user" else ""
+            rows = [f"- {prefix}{name}: {count}" for name, count in sorted(counts.items(), key=lambda item: -item[1])]
+    
+    response_text += "\n".join(rows[:limit]) if rows else "No interactions recorded in this window."
+    
+    stats = store.get_stats()
+    response_text += (
+        f"\n\n🗄️ {stats['rows']} interactions over {stats['days']} day(s) in {stats['memory_bytes'] / 1024:.1f} KB"
+    )
+    if fact_checker.interaction_log:
+        sample = fact_checker.interaction_log.recent(100)
+        per_record = store.dict_records_bytes(sample) / len(sample)
+        response_text += f" (~{per_record * stats['rows'] / 1024:.1f} KB as dicts)"
     
     return [types.TextContent(type="text", text=response_text)]
 
+async def answer_dm(account: Account, dm: Dict[str, Any], previous: Optional[asyncio.Task]) -> None:
+    """Fact-check one polled DM after the previous DM of its thread, queue the reply and ack it.
+    
+    A failed DM is handed out again by the poller, and dead-lettered after DM_MAX_ATTEMPTS.
+    """
+    try:
+        with lifecycle.inflight(f"dm:{account.account_id}:{dm.get('thread_id')}"):
+            if previous is not None:
+                await asyncio.wait([previous])
+            result = await account.process(
+                worker_pool, dm["message"], dm["username"], "text", dm.get("message_id"), dm.get("thread_id")
+            )
+            if result.get("category") == "error":
+                _fail_dm(account, dm, result.get("response", "error"))
+                return
+            if result.get("category") != "duplicate":
+                # Waits while the outbox is full, holding back only this account's inbox
+                await account.outbox.put({"username": dm["username"], "response": result["response"]})
+            account.instagram.ack_dm(dm)
+    except Exception as e:
+        _fail_dm(account, dm, str(e))
+
+def _fail_dm(account: Account, dm: Dict[str, Any], error: str) -> None:
+    """Queue a failed DM for another attempt, or dead-letter it so the watermark can move on."""
+    retrying = account.instagram.retry_dm(dm, error)
+    print(f"Failed to answer DM from @{dm.get('username')} ({account.account_id}): {error}"
+          f"{' - retrying' if retrying else ' - dead-lettered'}")
+
+async def process_inbox(account: Account) -> None:
+    """Fact-check one account's new DMs as its adaptive poller streams them in; replies go to its outbox.
+    
+    DMs run concurrently up to the account's max_inflight, in arrival order within each thread.
+    """
+    room = asyncio.Semaphore(account.quota.max_inflight)
+    tails: Dict[str, asyncio.Task] = {}
+    running: set = set()
+    try:
+        async for dm in account.instagram.poll_dms():
+            await room.acquire()
+            if not lifecycle.accepting:
+                room.release()
+                break  # unanswered DMs stay past the watermark and are fetched again next start
+            key = dm.get("thread_id") or dm["username"]
+            task = asyncio.create_task(answer_dm(account, dm, tails.get(key)))
+            tails[key] = task
+            running.add(task)
+            task.add_done_callback(lambda done: (running.discard(done), room.release()))
+            task.add_done_callback(lambda done, key=key: tails.get(key) is done and tails.pop(key))
+        await asyncio.gather(*running, return_exceptions=True)
+    finally:
+        # Cancelled at shutdown once the drain deadline has passed
+        for task in running:
+            task.cancel()
+
+async def deliver_outbox(account: Account) -> None:
+    """Send one account's queued replies in order."""
+    while True:
+        reply = await account.outbox.next()
+        try:
+            sent = (await account.instagram.send_instagram_dm(reply["username"], reply["response"])).get("success", False)
+        except Exception as e:
+            sent = False
+            print(f"Failed to send reply to @{reply['username']} ({account.account_id}): {e}")
+        metrics.incr("outbox_sent" if sent else "outbox_failed", account.account_id)
+        account.outbox.done(sent)
+
+async def serve_accounts() -> None:
+    """Run every account's inbox and outbox side by side."""
+    await asyncio.gather(
+        *(process_inbox(account) for account in accounts),
+        *(deliver_outbox(account) for account in accounts)
+    )
+
+async def handle_account_status(arguments: dict) -> list[types.TextContent]:
+    """Handle per-account tenancy report"""
+    selected = [accounts.get(arguments["account"])] if arguments.get("account") else list(accounts)
+    response_text = f"👥 **Accounts** ({len(accounts)} served, shared Claude pool, cache and filter)\n\n"
+    for account in selected:
+        status = account.get_status()
+        quota = status["quota"]
+        outbox = status["outbox"]
+        rate = f"{quota['rate_per_minute']:g}/min" if quota["rate_per_minute"] else "unlimited"
+        budget = f" of ${quota['daily_budget_usd']:.2f}" if quota["daily_budget_usd"] else ""
+        response_text += (
+            f"**{status['account']}** ({status['mode']})\n"
+            f"- DMs: watermark {status['dm_watermark'] or 'none'}, polling every {status['poll_interval_s']:g}s"
+            + (f", last error: {status['last_fetch_error']}" if status["last_fetch_error"] else "")
+            + f", {status['unanswered_dms']} unanswered, {status['dead_letters']} dead-lettered"
+            + f"\n- Outbox: {outbox['pending']}/{outbox['limit']} pending, {outbox['sent']} sent, {outbox['failed']} failed\n"
+            f"- Followers: {status['followers']} seen\n"
+            f"- Quota: {rate}, {quota['inflight']}/{quota['max_inflight']} in flight, throttled {quota['throttled']}x\n"
+            f"- Today: ${quota['spent_usd']:.4f}{budget} over {quota['calls']} Claude calls"
+        )
+        if quota["degraded_mode"]:
+            response_text += f"\n- ⚠️ Account budget reached - running in {quota['degraded_mode']} mode"
+        response_text += "\n\n"
+    
+    return [types.TextContent(type="text", text=response_text.rstrip())]
+
+async def handle_bot_health(arguments: dict) -> list[types.TextContent]:
+    """Handle health report (passive outcomes and TTL-cached probes)"""
+    report = await health.report(force=arguments.get("refresh", False))
+    icons = {"healthy": "✅", "degraded": "⚠️", "unhealthy": "❌", "unknown": "❔"}
+    
+    response_text = f"🩺 **Bot Health: {icons[report['status']]} {report['status'].upper()}**"
+    response_text += " (idle)\n\n" if report["idle"] else "\n\n"
+    for component, check in report["components"].items():
+        age = f", {check['age_s']}s ago" if check["age_s"] is not None else ""
+        response_text += f"- {icons[check['status']]} {component}: {check['detail']} ({check['source']}{age})\n"
+    
+    pool = worker_pool.get_status()
+    if pool["mode"] == "sharded":
+        live = len(pool["alive"])
+        icon = icons["healthy"] if live == pool["workers"] else icons["degraded"]
+        response_text += f"- {icon} workers: {live}/{pool['workers']} alive, {pool['pending']} pending\n"
+    lifecycle_status = lifecycle.get_status()
+    if not lifecycle_status["accepting"]:
+        response_text += f"- ⏳ shutting down ({lifecycle_status['stop_reason']}), {lifecycle_status['inflight']} in flight\n"
+    degraded = fact_checker.ledger.degraded_mode() if "ledger" in fact_checker.__dict__ else None
+    if degraded:
+        response_text += f"- ⚠️ daily budget reached, running in {degraded} mode\n"
+    for account in accounts:
+        account_degraded = account.quota.degraded_mode()
+        if account_degraded:
+            response_text += f"- ⚠️ {account.account_id}: account budget reached, running in {account_degraded} mode\n"
+    
+    return [types.TextContent(type="text", text=response_text)]
+
+async def prewarm_components() -> None:
+    """Build lazy components in the background once the handshake is under way."""
+    await asyncio.sleep(float(os.getenv("PREWARM_DELAY", "1.0")))
+    
+    def warm() -> None:
+        with metrics.timer("prewarm"):
+            for account in accounts:
+                account.instagram
+                account.welcomer.seen_followers
+            fact_checker.prewarm()
+    
+    try:
+        await asyncio.to_thread(warm)
+    except Exception as e:
+        print(f"⚠️ Pre-warm skipped: {e}")
+
 async def main():
     """Main entry point for the MCP server."""
     
+    # stdout is the JSON-RPC transport: status prints (here, in lazily built components
+    # and in threads) go to stderr, as in the worker processes
+    transport = TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+    sys.stdout = sys.stderr
+    
     print("🔧 Starting Perfect Sassy Fact Check Bot...")
     
     real_mode = os.getenv("INSTAGRAM_REAL_MODE", "false").lower() == "true"
     mode_display = "REAL MODE - Connected to Gala Labs MCP!" if real_mode else "DEMO MODE - Perfect for hackathon!"
     print(f"📱 Instagram Integration: {mode_display}")
     
-    # Run the server
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="sassy-factcheck-bot-perfect",
-                server_version="1.0.2-perfect",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    # Signal handlers, and how the previous run ended
+    previous_run = lifecycle.start()
+    
+    # Shard DMs across worker processes when BOT_WORKERS > 1
+    worker_pool.start()
+    
+    # Warm restart: restore the snapshot, then replay only the log written since
+    restore_report = snapshots.restore()
+    replayed = fact_checker.replay_log_tail()
+    if restore_report["restored"]:
+        print(f"♻️ Restored {', '.join(restore_report['sections'])} from snapshot "
+              f"({restore_report['snapshot_age_s']}s old) in {restore_report['duration_ms']}ms, "
+              f"replayed {replayed} newer interactions")
+    else:
+        print(f"♻️ No snapshot ({restore_report['reason']}), rebuilt state from {replayed} logged interactions")
+    print(f"🩹 Recovery: {format_recovery(previous_run, fact_checker.log_writer.recovered)}")
+    
+    # Shutdown order: stop background work, close workers, flush buffers, snapshot last
+    lifecycle.on_shutdown("worker_pool", worker_pool.close)
+    lifecycle.on_shutdown("interaction_log", fact_checker.flush_log)
+    lifecycle.on_shutdown("usage_ledger", lambda: fact_checker.ledger.save() if "ledger" in fact_checker.__dict__ else None)
+    lifecycle.on_shutdown("snapshot", snapshots.save)
+    log_flush_task = asyncio.create_task(fact_checker.log_writer.run_periodic())
+    snapshot_task = asyncio.create_task(snapshots.run_periodic())
+    warm_task = asyncio.create_task(cache_warmer.run_periodic())
+    inbox_task = None
+    if os.getenv("ENABLE_DM_POLLING", "false").lower() == "true":
+        inbox_task = asyncio.create_task(serve_accounts())
+    
+    # Run the server until the client disconnects or SIGTERM/SIGINT arrives
+    server_task = prewarm_task = None
+    try:
+        async with mcp.server.stdio.stdio_server(stdout=anyio.wrap_file(transport)) as (read_stream, write_stream):
+            if os.getenv("PREWARM_ON_START", "true").lower() == "true":
+                prewarm_task = asyncio.create_task(prewarm_components())
+            
+            server_task = asyncio.create_task(server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="sassy-factcheck-bot-perfect",
+                    server_version="1.0.2-perfect",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            ))
+            await lifecycle.wait(server_task)
+            # Drain while the transport is still open so in-flight replies reach the client
+            report = await lifecycle.shutdown(
+                inbox_task, warm_task, snapshot_task, prewarm_task, log_flush_task, server_task
+            )
+            print(f"💅 Shut down in {report['duration_ms']}ms: drained {report['drained']}, "
+                  f"abandoned {len(report['abandoned'])}, flushed {', '.join(report['flushed'])}")
+            if not server_task.cancelled() and server_task.exception():
+                raise server_task.exception()
+            if lifecycle.stop_reason in ("SIGTERM", "SIGINT"):
+                # Everything is flushed; the stdio reader thread would block exit until stdin closes
+                transport.flush()
+                os._exit(0)
+    finally:
+        # Transport failures skip the drain but still flush
+        await lifecycle.shutdown(inbox_task, warm_task, snapshot_task, prewarm_task, log_flush_task, server_task)
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,232 @@
+"""
+Low-overhead metrics for Sassy Fact Check Bot.
+Per-stage latency histograms, per-category counters and point-in-time gauges.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Log-linear bucketing (HDR style): exact below 128, then 64 sub-buckets
+# per power of two, which keeps relative error under ~1.6%.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value: int) -> int:
+    """Map a non-negative integer to its histogram bucket."""
+    if value < SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+
+def _bucket_value(index: int) -> int:
+    """Representative (midpoint) value of a bucket."""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+    mantissa = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return (mantissa << shift) + ((1 << shift) >> 1)
+
+
+class Histogram:
+    """Sparse HDR-style histogram of nanosecond durations."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value_ns: int) -> None:
+        """Record one observation in O(1)."""
+        if value_ns < 0:
+            value_ns = 0
+        index = _bucket_index(value_ns)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if self.count == 0 or value_ns < self.min:
+            self.min = value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+        self.count += 1
+        self.total += value_ns
+
+    def percentile(self, q: float) -> int:
+        """Approximate value at percentile q (0-100)."""
+        if self.count == 0:
+            return 0
+        target = max(1, int(round(self.count * q / 100.0)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(max(_bucket_value(index), self.min), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Summary in milliseconds."""
+        to_ms = 1e-6
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * to_ms, 3) if self.count else 0.0,
+            "min_ms": round(self.min * to_ms, 3),
+            "p50_ms": round(self.percentile(50) * to_ms, 3),
+            "p90_ms": round(self.percentile(90) * to_ms, 3),
+            "p99_ms": round(self.percentile(99) * to_ms, 3),
+            "max_ms": round(self.max * to_ms, 3),
+        }
+
+
+class _StageTimer:
+    """Context manager recording elapsed perf_counter_ns into a stage histogram."""
+
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry: "BotMetrics", stage: str):
+        self.registry = registry
+        self.stage = stage
+        self.start = 0
+
+    def __enter__(self) -> "_StageTimer":
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        self.registry.observe(self.stage, time.perf_counter_ns() - self.start)
+        return False
+
+
+class BotMetrics:
+    """Registry of stage histograms and labelled counters."""
+
+    def __init__(self):
+        self.enabled = os.getenv("ENABLE_METRICS", "true").lower() == "true"
+        self.started_at = time.time()
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self.gauges: Dict[Tuple[str, str], float] = {}
+
+    def timer(self, stage: str) -> "_StageTimer":
+        """Time a block with the monotonic clock and record it under `stage`."""
+        return _StageTimer(self, stage)
+
+    def observe(self, stage: str, duration_ns: int) -> None:
+        """Record a duration for a stage."""
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.record(duration_ns)
+
+    def incr(self, name: str, category: str = "all", amount: int = 1) -> None:
+        """Increment a counter, labelled by content category."""
+        if not self.enabled:
+            return
+        key = (name, category)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, component: str = "all") -> None:
+        """Set a point-in-time value (e.g. bytes held by a component)."""
+        if not self.enabled:
+            return
+        self.gauges[(name, component)] = value
+
+    def get_counter(self, name: str, category: str = None) -> int:
+        """Read a counter for one category, or summed over all categories."""
+        if category is not None:
+            return self.counters.get((name, category), 0)
+        return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a JSON-friendly view of all metrics."""
+        counters: Dict[str, Dict[str, int]] = {}
+        for (name, category), value in sorted(self.counters.items()):
+            counters.setdefault(name, {})[category] = value
+
+        gauges: Dict[str, Dict[str, float]] = {}
+        for (name, component), value in sorted(self.gauges.items()):
+            gauges.setdefault(name, {})[component] = value
+
+        return {
+            "uptime_seconds": round(time.time() - self.started_at, 1),
+            "stages": {stage: h.summary() for stage, h in sorted(self.histograms.items())},
+            "counters": counters,
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            metric = f"sassybot_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, category), value in sorted(self.counters.items()):
+                if counter_name == name:
+                    lines.append(f'{metric}{{category="{category}"}} {value}')
+
+        for name in sorted({name for name, _ in self.gauges}):
+            metric = f"sassybot_{name}"
+            lines.append(f"# TYPE {metric} gauge")
+            for (gauge_name, component), value in sorted(self.gauges.items()):
+                if gauge_name == name:
+                    lines.append(f'{metric}{{component="{component}"}} {value}')
+
+        if self.histograms:
+            metric = "sassybot_stage_duration_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for stage, histogram in sorted(self.histograms.items()):
+                for q in (50, 90, 99):
+                    value = histogram.percentile(q) / 1e9
+                    lines.append(f'{metric}{{stage="{stage}",quantile="{q / 100}"}} {value:.9f}')
+                lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.total / 1e9:.9f}')
+                lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+    def dump_prometheus(self, path: str = None) -> str:
+        """Write Prometheus text to `path` (or METRICS_PROM_FILE). Returns the path used."""
+        path = path or os.getenv("METRICS_PROM_FILE", "")
+        if not path:
+            return ""
+        target = Path(path)
+        tmp = target.with_suffix(target.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, target)
+        return str(target)
+
+    def reset(self) -> None:
+        """Clear all recorded metrics."""
+        self.histograms.clear()
+        self.counters.clear()
+        self.gauges.clear()
+        self.started_at = time.time()
+
+
+def resident_memory_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Global instance
+metrics = BotMetrics()
@@ -0,0 +1,105 @@
+"""
+Model routing for Sassy Fact Check Bot.
+Sends common myths to a cheap, fast model and escalates to a stronger one
+only when the reply post-processor rejects the draft. Tracks latency, cost
+and escalation rate per route so the mix can be tuned.
+"""
+
+import os
+import re
+from typing import Any, Dict, Optional
+
+from metrics import metrics
+from usage_ledger import estimate_cost
+
+# Routes from cheapest to strongest; escalation moves one step up
+ROUTE_ORDER = ("fast", "balanced", "strong")
+DEFAULT_MODELS = {
+    "fast": "claude-3-haiku-20240307",
+    "balanced": "claude-3-5-haiku-20241022",
+    "strong": "claude-3-5-sonnet-20241022",
+}
+
+_NUMBER = re.compile(r"\d")
+_SENTENCE_END = re.compile(r"[.!?]+(?:\s|$)")
+
+
+class RouteStats:
+    """Counters for one route."""
+
+    __slots__ = ("calls", "escalations", "rejected", "cost_usd", "latency_ns")
+
+    def __init__(self):
+        self.calls = 0
+        self.escalations = 0
+        self.rejected = 0
+        self.cost_usd = 0.0
+        self.latency_ns = 0
+
+
+class ModelRouter:
+    """Picks a model per request and decides when a draft needs escalation."""
+
+    def __init__(self):
+        self.models = {
+            route: os.getenv(f"MODEL_{route.upper()}", model)
+            for route, model in DEFAULT_MODELS.items()
+        }
+        self.enabled = os.getenv("ENABLE_MODEL_ROUTING", "true").lower() == "true"
+        self.max_escalations = int(os.getenv("ROUTE_MAX_ESCALATIONS", "1"))
+        self.complex_words = int(os.getenv("ROUTE_COMPLEX_WORDS", "60"))
+        self.stats: Dict[str, RouteStats] = {route: RouteStats() for route in ROUTE_ORDER}
+
+    def choose(self, category: str, tone: str, content: str) -> str:
+        """Initial route from category, claim length and complexity."""
+        if not self.enabled:
+            return "fast"
+        if category == "sensitive":
+            return "balanced"
+        words = len(content.split())
+        sentences = len(_SENTENCE_END.findall(content))
+        # Long, multi-part or statistics-heavy claims need more care than a one-line myth
+        if words > self.complex_words or (sentences >= 3 and _NUMBER.search(content)):
+            return "balanced"
+        return "fast"
+
+    def model_for(self, route: str) -> str:
+        return self.models[route]
+
+    def escalate(self, route: str, attempt: int) -> Optional[str]:
+        """Next route after a rejected draft, or None if escalation is exhausted."""
+        index = ROUTE_ORDER.index(route)
+        if not self.enabled or attempt >= self.max_escalations or index + 1 >= len(ROUTE_ORDER):
+            self.stats[route].rejected += 1
+            metrics.incr("route_rejected", route)
+            return None
+        self.stats[route].escalations += 1
+        metrics.incr("route_escalations", route)
+        return ROUTE_ORDER[index + 1]
+
+    def record(self, route: str, duration_ns: int, usage: Dict[str, Any]) -> None:
+        """Account one model call on a route."""
+        stats = self.stats[route]
+        stats.calls += 1
+        stats.latency_ns += duration_ns
+        stats.cost_usd += estimate_cost(
+            usage["model"], usage["input_tokens"], usage["output_tokens"], usage["cached_tokens"]
+        )
+        metrics.observe(f"llm_{route}", duration_ns)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-route calls, mean latency, cost and escalation rate."""
+        report = {}
+        for route in ROUTE_ORDER:
+            stats = self.stats[route]
+            calls = stats.calls
+            report[route] = {
+                "model": self.models[route],
+                "calls": calls,
+                "mean_latency_ms": round(stats.latency_ns / calls / 1e6, 1) if calls else 0.0,
+                "cost_usd": round(stats.cost_usd, 6),
+                "cost_per_call_usd": round(stats.cost_usd / calls, 6) if calls else 0.0,
+                "escalation_rate": round(stats.escalations / calls, 3) if calls else 0.0,
+                "rejected": stats.rejected,
+            }
+        return report
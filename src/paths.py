@@ -0,0 +1,15 @@
+"""
+Runtime file locations for Sassy Fact Check Bot.
+Traces, the usage ledger, the state database, snapshots and journals live in
+BOT_DATA_DIR (default ./var) unless their own *_FILE / *_PATH variable is set.
+"""
+
+import os
+from pathlib import Path
+
+
+def data_path(name: str) -> Path:
+    """Path of a runtime file inside BOT_DATA_DIR, creating the directory on first use."""
+    directory = Path(os.getenv("BOT_DATA_DIR", "var"))
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / name
@@ -0,0 +1,182 @@
+"""
+Response cache for Sassy Fact Check Bot.
+Keeps generated replies per normalized claim and tone so repeat myths skip Claude.
+Thread-safe, so async callers can run it in a thread when a shared backend makes
+lookups block on SQLite; backend I/O happens outside the lock.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from state_backend import StateBackend
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+CACHED_FIELDS = ("response", "tone_used", "category", "sources")
+
+
+def normalize_claim(text: str) -> str:
+    """Normalize a claim so trivially different phrasings share a cache key."""
+    text = _NON_WORD.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+class CacheEntry:
+    """Reply variants for one claim and tone."""
+
+    __slots__ = ("variants", "created_at", "next_index")
+
+    def __init__(self, created_at: float):
+        self.variants: List[Dict[str, Any]] = []
+        self.created_at = created_at
+        self.next_index = 0
+
+
+class ResponseCache:
+    """LRU cache of reply variants keyed by (normalized claim, tone)."""
+
+    def __init__(
+        self,
+        max_entries: int = None,
+        ttl_seconds: float = None,
+        max_variants: int = None,
+        backend: Optional[StateBackend] = None
+    ):
+        self.max_entries = max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("RESPONSE_CACHE_TTL", "86400"))
+        self.max_variants = max_variants or int(os.getenv("RESPONSE_CACHE_VARIANTS", "3"))
+        self.enabled = os.getenv("ENABLE_RESPONSE_CACHE", "true").lower() == "true"
+        self.backend = backend
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, content: str, tone: str) -> Optional[Dict[str, Any]]:
+        """Get a cached reply, rotating through the stored variants."""
+        if not self.enabled:
+            return None
+        key = (normalize_claim(content), tone)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            entry = self._load_shared(key)
+            if entry is None:
+                return None
+
+        with self._lock:
+            if time.time() - entry.created_at > self.ttl_seconds:
+                self._entries.pop(key, None)
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            variant = entry.variants[entry.next_index % len(entry.variants)]
+            entry.next_index += 1
+            return dict(variant)
+
+    def _load_shared(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        """Pull an entry another process stored in the shared backend."""
+        if self.backend is None:
+            return None
+        shared = self.backend.cache_get(*key)
+        if not shared or not shared["variants"]:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CacheEntry(shared["created_at"])
+                entry.variants = shared["variants"]
+            return entry
+
+    def put(self, content: str, tone: str, result: Dict[str, Any]) -> None:
+        """Store a generated reply as a variant for this claim."""
+        if not self.enabled:
+            return
+        key = (normalize_claim(content), tone)
+        if not key[0]:
+            return
+        variant = {field: result.get(field) for field in CACHED_FIELDS}
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = CacheEntry(time.time())
+            self._entries.move_to_end(key)
+            if any(v["response"] == variant["response"] for v in entry.variants):
+                return
+            entry.variants.append(variant)
+            if len(entry.variants) > self.max_variants:
+                entry.variants.pop(0)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        if self.backend is not None:
+            self.backend.cache_put(key[0], tone, variant, self.max_variants)
+
+    def entry_info(self, content: str, tone: str) -> Optional[Tuple[float, int]]:
+        """(age in seconds, variant count) for a claim, or None if not cached."""
+        key = (normalize_claim(content), tone)
+        with self._lock:
+            entry = self._entries.get(key)
+        entry = entry or self._load_shared(key)
+        if entry is None:
+            return None
+        return time.time() - entry.created_at, len(entry.variants)
+
+    def replace(self, content: str, tone: str, results: List[Dict[str, Any]]) -> None:
+        """Replace a claim's variants with a freshly generated set."""
+        key = (normalize_claim(content), tone)
+        if not self.enabled or not key[0] or not results:
+            return
+        entry = CacheEntry(time.time())
+        for result in results:
+            variant = {field: result.get(field) for field in CACHED_FIELDS}
+            if not any(v["response"] == variant["response"] for v in entry.variants):
+                entry.variants.append(variant)
+        entry.variants = entry.variants[-self.max_variants:]
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if self.backend is not None:
+            self.backend.cache_replace(key[0], tone, entry.variants)
+
+    def export_state(self) -> List[list]:
+        """Cache entries in LRU order, for snapshots."""
+        with self._lock:
+            return [
+                [claim, tone, entry.created_at, entry.next_index, list(entry.variants)]
+                for (claim, tone), entry in self._entries.items()
+            ]
+
+    def restore_state(self, state: List[list]) -> None:
+        """Load entries saved by export_state, skipping expired ones."""
+        now = time.time()
+        with self._lock:
+            for claim, tone, created_at, next_index, variants in state:
+                if now - created_at > self.ttl_seconds or not variants:
+                    continue
+                entry = CacheEntry(created_at)
+                entry.variants = variants[-self.max_variants:]
+                entry.next_index = next_index
+                self._entries[(claim, tone)] = entry
+                self._entries.move_to_end((claim, tone))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size statistics."""
+        with self._lock:
+            variants = sum(len(entry.variants) for entry in self._entries.values())
+        return {
+            "entries": len(self._entries),
+            "variants": variants,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,289 @@
+"""
+Moderation rule packs for Sassy Fact Check Bot.
+
+Rules live in versioned JSON packs (rules/*.json) instead of code. The
+packs are merged and compiled into a RuleSet: keyword lists become one
+Aho-Corasick automaton that finds every category in a single pass over the
+text, and patterns become one regex per category. The compiled tables are
+cached on disk with marshal, keyed by a hash of the pack files, so a start
+with unchanged rules only loads the artifact.
+
+Pack format:
+    {"name": "...", "version": "1.0.0",
+     "keywords": {"blocked": [...], "sensitive": [...], "health_panic": [...]},
+     "patterns": {"spam": ["regex", ...]}}
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from metrics import metrics
+
+# Checked in this order; the first matching category wins
+CATEGORY_PRIORITY = ("blocked", "spam", "sensitive", "health_panic")
+CATEGORY_BITS = {category: 1 << index for index, category in enumerate(CATEGORY_PRIORITY)}
+
+# Bump when the artifact layout changes so stale caches are ignored
+ARTIFACT_FORMAT = 1
+
+DEFAULT_RULES_DIR = Path(__file__).parent.parent / "rules"
+
+
+class RulePackError(Exception):
+    """Raised when rule packs cannot be read or compiled."""
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over characters; outputs are category bitmasks."""
+
+    __slots__ = ("root", "delta", "out")
+
+    def __init__(self, root: Dict[str, int], delta: List[Dict[str, int]], out: List[int]):
+        # root: transitions from state 0; delta[s]: non-root transitions of s with
+        # failure links already folded in; out[s]: categories ending at s
+        self.root = root
+        self.delta = delta
+        self.out = out
+
+    @classmethod
+    def build(cls, keywords: Dict[str, List[str]]) -> "KeywordAutomaton":
+        goto: List[Dict[str, int]] = [{}]
+        out: List[int] = [0]
+        for category, words in keywords.items():
+            bit = CATEGORY_BITS[category]
+            for word in words:
+                state = 0
+                for char in word.lower():
+                    nxt = goto[state].get(char)
+                    if nxt is None:
+                        nxt = goto[state][char] = len(goto)
+                        goto.append({})
+                        out.append(0)
+                    state = nxt
+                out[state] |= bit
+
+        # Breadth-first: failure links, inherited outputs and folded transitions
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        queue = list(goto[0].values())
+        for state in queue:
+            delta[state] = dict(goto[state])
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, nxt in goto[state].items():
+                target = fail[state]
+                while target and char not in goto[target]:
+                    target = fail[target]
+                fail[nxt] = goto[target].get(char, 0)
+                out[nxt] |= out[fail[nxt]]
+                # Transitions the failure state would take, minus root ones (looked up separately)
+                delta[nxt] = {**delta[fail[nxt]], **goto[nxt]} if fail[nxt] else dict(goto[nxt])
+                queue.append(nxt)
+        return cls(dict(goto[0]), delta, out)
+
+    def scan(self, text: str, stop: int = 0) -> int:
+        """Bitmask of categories whose keywords occur in text; returns early once `stop` bits are found."""
+        root_get = self.root.get
+        delta = self.delta
+        out = self.out
+        found = 0
+        state = 0
+        for char in text:
+            state = (delta[state].get(char) if state else None) or root_get(char, 0)
+            mask = out[state]
+            if mask:
+                found |= mask
+                if found & stop:
+                    break
+        return found
+
+    def tables(self) -> tuple:
+        return (self.root, self.delta, self.out)
+
+    def __len__(self) -> int:
+        return len(self.out)
+
+
+class RuleSet:
+    """Compiled, immutable rules; swapped as a whole on reload."""
+
+    __slots__ = ("digest", "packs", "keywords", "patterns", "automaton", "use_automaton", "source", "load_ms")
+
+    def __init__(self, digest: str, packs: List[Tuple[str, str]], keywords: Dict[str, List[str]],
+                 patterns: Dict[str, str], automaton: KeywordAutomaton):
+        self.digest = digest
+        self.packs = packs
+        self.keywords = {category: tuple(words) for category, words in keywords.items()}
+        self.patterns = {category: re.compile(pattern) for category, pattern in patterns.items()}
+        self.automaton = automaton
+        # A handful of keywords is faster with C-level substring checks than a Python-level scan
+        total = sum(len(words) for words in keywords.values())
+        self.use_automaton = total > int(os.getenv("RULES_AUTOMATON_MIN_KEYWORDS", "150"))
+        self.source = "compiled"
+        self.load_ms = 0.0
+
+    def match(self, text_lower: str) -> Optional[str]:
+        """Highest-priority category matched by the text, or None."""
+        if self.use_automaton:
+            found = self.automaton.scan(text_lower, CATEGORY_BITS["blocked"])
+            for category in CATEGORY_PRIORITY:
+                if found & CATEGORY_BITS[category]:
+                    return category
+                pattern = self.patterns.get(category)
+                if pattern is not None and pattern.search(text_lower):
+                    return category
+            return None
+
+        for category in CATEGORY_PRIORITY:
+            words = self.keywords.get(category)
+            if words and any(word in text_lower for word in words):
+                return category
+            pattern = self.patterns.get(category)
+            if pattern is not None and pattern.search(text_lower):
+                return category
+        return None
+
+    def keywords_in(self, text_lower: str) -> Iterator[str]:
+        """Keywords of any category that occur in the text, found lazily."""
+        for words in self.keywords.values():
+            for word in words:
+                if word in text_lower:
+                    yield word
+
+    def describe(self) -> str:
+        packs = ", ".join(f"{name}@{version}" for name, version in self.packs)
+        return f"{packs} [{self.digest[:12]}] {self.source} in {self.load_ms}ms"
+
+
+def pack_files(directory: Path) -> List[Path]:
+    return sorted(Path(directory).glob("*.json"))
+
+
+def fingerprint(directory: Path) -> Tuple:
+    """Cheap change detector: names, sizes and mtimes of the pack files."""
+    try:
+        return tuple((path.name, stat.st_size, stat.st_mtime_ns)
+                     for path in pack_files(directory) for stat in (path.stat(),))
+    except OSError:
+        return ()
+
+
+def _merge(blobs: List[Tuple[str, bytes]]) -> Tuple[List[Tuple[str, str]], Dict[str, List[str]], Dict[str, List[str]]]:
+    packs, keywords, patterns = [], {}, {}
+    seen: Dict[Tuple[str, str], set] = {}
+    for filename, blob in blobs:
+        try:
+            pack = json.loads(blob)
+        except ValueError as e:
+            raise RulePackError(f"{filename}: {e}")
+        packs.append((pack.get("name", filename), str(pack.get("version", "0"))))
+        for kind, target in (("keywords", keywords), ("patterns", patterns)):
+            for category, entries in pack.get(kind, {}).items():
+                if category not in CATEGORY_BITS:
+                    raise RulePackError(f"{filename}: unknown category {category!r}")
+                merged = target.setdefault(category, [])
+                known = seen.setdefault((kind, category), set())
+                for entry in entries:
+                    entry = entry.lower() if kind == "keywords" else entry
+                    if entry not in known:
+                        known.add(entry)
+                        merged.append(entry)
+    return packs, keywords, patterns
+
+
+def compile_rules(packs: List[Dict[str, Any]]) -> RuleSet:
+    """Compile in-memory packs (no disk cache)."""
+    blobs = [(pack.get("name", f"pack{index}"), json.dumps(pack).encode()) for index, pack in enumerate(packs)]
+    names, keywords, patterns = _merge(blobs)
+    joined = _join_patterns(patterns)
+    return RuleSet("", names, keywords, joined, KeywordAutomaton.build(keywords))
+
+
+def _join_patterns(patterns: Dict[str, List[str]]) -> Dict[str, str]:
+    joined = {}
+    for category, entries in patterns.items():
+        for entry in entries:
+            try:
+                re.compile(entry)
+            except re.error as e:
+                raise RulePackError(f"bad {category} pattern {entry!r}: {e}")
+        if entries:
+            joined[category] = "|".join(f"(?:{entry})" for entry in entries)
+    return joined
+
+
+def load_rules(directory: Path = None, cache_dir: Path = None) -> RuleSet:
+    """Load the compiled artifact for the current packs, compiling and caching it on a miss."""
+    directory = Path(directory or os.getenv("RULES_DIR", DEFAULT_RULES_DIR))
+    cache_dir = Path(cache_dir or os.getenv("RULES_CACHE_DIR", ".rules_cache"))
+    started = time.perf_counter_ns()
+
+    files = pack_files(directory)
+    if not files:
+        raise RulePackError(f"No rule packs in {directory}")
+    blobs = [(path.name, path.read_bytes()) for path in files]
+    hasher = hashlib.sha256(str(ARTIFACT_FORMAT).encode())
+    for filename, blob in blobs:
+        hasher.update(filename.encode() + b"\0" + blob + b"\0")
+    digest = hasher.hexdigest()
+    artifact = cache_dir / f"{digest}.rules"
+
+    tables = None
+    if artifact.exists():
+        try:
+            tables = marshal.loads(artifact.read_bytes())
+            if tables[0] != ARTIFACT_FORMAT:
+                tables = None
+        except (ValueError, EOFError, TypeError, IndexError):
+            tables = None  # corrupt artifact: recompile
+
+    if tables is not None:
+        _, packs, keywords, patterns, automaton_tables = tables
+        rules = RuleSet(digest, [tuple(pack) for pack in packs], keywords, patterns, KeywordAutomaton(*automaton_tables))
+        rules.source = "cache"
+        stage = "rules_load"
+    else:
+        packs, keywords, patterns = _merge(blobs)
+        joined = _join_patterns(patterns)
+        automaton = KeywordAutomaton.build(keywords)
+        rules = RuleSet(digest, packs, keywords, joined, automaton)
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = artifact.with_suffix(".tmp")
+            tmp.write_bytes(marshal.dumps((ARTIFACT_FORMAT, packs, keywords, joined, automaton.tables())))
+            os.replace(tmp, artifact)
+            # Keep a few recent artifacts for rollbacks and last-good fallback
+            stale = sorted(cache_dir.glob("*.rules"), key=lambda path: path.stat().st_mtime, reverse=True)
+            for old in stale[int(os.getenv("RULES_CACHE_KEEP", "5")):]:
+                old.unlink(missing_ok=True)
+        except OSError as e:
+            print(f"Could not cache compiled rules: {e}")
+        stage = "rules_compile"
+
+    elapsed = time.perf_counter_ns() - started
+    metrics.observe(stage, elapsed)
+    rules.load_ms = round(elapsed / 1e6, 2)
+    return rules
+
+
+def load_last_good(cache_dir: Path = None) -> Optional[RuleSet]:
+    """Newest cached artifact, used when the packs on disk are broken at startup."""
+    cache_dir = Path(cache_dir or os.getenv("RULES_CACHE_DIR", ".rules_cache"))
+    artifacts = sorted(cache_dir.glob("*.rules"), key=lambda path: path.stat().st_mtime, reverse=True)
+    for artifact in artifacts:
+        try:
+            _, packs, keywords, patterns, automaton_tables = marshal.loads(artifact.read_bytes())
+        except (ValueError, EOFError, TypeError):
+            continue
+        rules = RuleSet(artifact.stem, [tuple(pack) for pack in packs], keywords, patterns, KeywordAutomaton(*automaton_tables))
+        rules.source = "last good cache"
+        return rules
+    return None
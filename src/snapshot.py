@@ -0,0 +1,157 @@
+"""
+State snapshots for fast warm restarts of Sassy Fact Check Bot.
+
+A snapshot is a single versioned binary file: a fixed header, a section table
+and one payload per section. Payloads are read straight out of a memory map,
+so restoring only touches the sections that are registered.
+
+Layout (little endian):
+    header   MAGIC(8s) version(H) section_count(H) reserved(I) created_at(d)
+    table    section_count x [name(16s) offset(Q) length(Q) crc32(I)]
+    payloads compact JSON, one blob per section
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from paths import data_path
+
+MAGIC = b"SASSYSNP"
+SNAPSHOT_VERSION = 1
+HEADER = struct.Struct("<8sHHId")
+SECTION = struct.Struct("<16sQQI")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, corrupt or from another version."""
+
+
+def write_snapshot(path: Path, sections: Dict[str, Any]) -> int:
+    """Atomically write sections to a snapshot file. Returns the size in bytes."""
+    payloads = []
+    for name, state in sections.items():
+        encoded_name = name.encode()
+        if len(encoded_name) > 16:
+            raise ValueError(f"Section name too long: {name}")
+        payloads.append((encoded_name, json.dumps(state, separators=(",", ":"), default=list).encode()))
+
+    offset = HEADER.size + SECTION.size * len(payloads)
+    table = b""
+    for encoded_name, payload in payloads:
+        table += SECTION.pack(encoded_name, offset, len(payload), zlib.crc32(payload))
+        offset += len(payload)
+
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(payloads), 0, time.time()))
+        f.write(table)
+        for _, payload in payloads:
+            f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return offset
+
+
+def read_snapshot(path: Path) -> Tuple[float, Dict[str, Any]]:
+    """Memory-map a snapshot and decode its sections. Returns (created_at, sections)."""
+    if not path.exists():
+        raise SnapshotError(f"No snapshot at {path}")
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if len(mm) < HEADER.size:
+            raise SnapshotError("Snapshot truncated")
+        magic, version, count, _, created_at = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise SnapshotError("Not a snapshot file")
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot version {version}")
+
+        sections = {}
+        for index in range(count):
+            raw_name, offset, length, crc = SECTION.unpack_from(mm, HEADER.size + index * SECTION.size)
+            name = raw_name.rstrip(b"\0").decode()
+            payload = mm[offset:offset + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                raise SnapshotError(f"Corrupt section {name}")
+            sections[name] = json.loads(payload)
+        return created_at, sections
+
+
+class SnapshotManager:
+    """Periodically snapshots registered components and restores them on start."""
+
+    def __init__(self, path: str = None, interval: float = None):
+        self.path = Path(path or os.getenv("STATE_SNAPSHOT_FILE") or data_path("bot_state.snap"))
+        self.interval = interval or float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+        self.enabled = os.getenv("ENABLE_SNAPSHOTS", "true").lower() == "true"
+        self._components: Dict[str, Tuple[Callable[[], Any], Callable[[Any], None]]] = {}
+        self.last_saved_at = 0.0
+
+    def register(self, name: str, export_state: Callable[[], Any], restore_state: Callable[[Any], None]) -> None:
+        """Register a component's export/restore hooks under a section name."""
+        if len(name.encode()) > 16:
+            raise ValueError(f"Section name too long: {name}")
+        self._components[name] = (export_state, restore_state)
+
+    def collect(self) -> Dict[str, Any]:
+        """Export every registered component (call from the event loop thread)."""
+        return {name: export() for name, (export, _) in self._components.items()}
+
+    def save(self, sections: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Write a snapshot of every registered component."""
+        if not self.enabled:
+            return {"saved": False}
+        started = time.perf_counter()
+        if sections is None:
+            sections = self.collect()
+        size = write_snapshot(self.path, sections)
+        self.last_saved_at = time.time()
+        return {
+            "saved": True,
+            "bytes": size,
+            "sections": list(sections),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    def restore(self) -> Dict[str, Any]:
+        """Restore every registered component found in the snapshot."""
+        if not self.enabled:
+            return {"restored": False, "reason": "snapshots disabled"}
+        started = time.perf_counter()
+        try:
+            created_at, sections = read_snapshot(self.path)
+        except SnapshotError as e:
+            return {"restored": False, "reason": str(e)}
+
+        restored = []
+        for name, (_, restore_state) in self._components.items():
+            if name in sections:
+                try:
+                    restore_state(sections[name])
+                    restored.append(name)
+                except Exception as e:
+                    print(f"Failed to restore {name} from snapshot: {e}")
+
+        return {
+            "restored": True,
+            "sections": restored,
+            "snapshot_age_s": round(time.time() - created_at, 1),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+
+    async def run_periodic(self) -> None:
+        """Save a snapshot every `interval` seconds."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.save, self.collect())
+            except Exception as e:
+                print(f"Failed to write snapshot: {e}")
@@ -0,0 +1,293 @@
+"""
+Shared state backends for running several Sassy Fact Check Bot processes.
+The SQLite backend uses WAL mode so processes can read concurrently while
+short write transactions coordinate the response cache, interaction log,
+stats, DM leases and follower set.
+
+The backend API is synchronous and may wait on SQLite locks (busy_timeout);
+async code calls it through run_blocking() so the event loop never stalls.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from paths import data_path
+
+
+def process_owner_id(pid: int = None) -> str:
+    """Identifier for this process (or a local one by pid); every DM lease it takes starts with it."""
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def lease_owner() -> str:
+    """Owner id for one DM lease: this process plus a per-request nonce."""
+    return f"{process_owner_id()}:{uuid.uuid4().hex[:8]}"
+
+
+async def run_blocking(backend: Optional["StateBackend"], func: Callable[..., Any], *args: Any) -> Any:
+    """Call func in a thread when it may block on the shared backend, inline otherwise."""
+    if backend is None:
+        return func(*args)
+    return await asyncio.to_thread(func, *args)
+
+
+class StateBackend(ABC):
+    """Interface for state shared between bot processes."""
+
+    name = "base"
+
+    # Response cache
+    @abstractmethod
+    def cache_get(self, claim: str, tone: str) -> Optional[Dict[str, Any]]:
+        """Return {"variants": [...], "created_at": ts} for a normalized claim, or None."""
+
+    @abstractmethod
+    def cache_put(self, claim: str, tone: str, variant: Dict[str, Any], max_variants: int) -> None:
+        ...
+
+    @abstractmethod
+    def cache_replace(self, claim: str, tone: str, variants: List[Dict[str, Any]]) -> None:
+        """Overwrite a claim's variants and reset its age."""
+
+    # Interaction log and stats
+    @abstractmethod
+    def append_interaction(self, interaction: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def interactions_since(self, timestamp: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def daily_stats(self, day: str) -> Dict[str, int]:
+        ...
+
+    # DM dedupe leases
+    @abstractmethod
+    def claim_message(self, message_id: str, owner: str, lease_seconds: float) -> bool:
+        """Take the lease on a DM for one request. False if it is done or anyone holds an unexpired lease."""
+
+    @abstractmethod
+    def complete_message(self, message_id: str, owner: str) -> None:
+        ...
+
+    @abstractmethod
+    def release_message(self, message_id: str, owner: str) -> None:
+        """Give up a lease without completing, so another process can retry."""
+
+    @abstractmethod
+    def release_leases(self, process_owner: str) -> int:
+        """Drop every unfinished lease a (dead) process took; returns how many."""
+
+    # Followers
+    @abstractmethod
+    def add_followers(self, usernames: List[str]) -> List[str]:
+        """Add followers, returning only the ones no process had seen before."""
+
+    @abstractmethod
+    def ping(self) -> None:
+        """Cheap round trip; raises if the backend is unusable."""
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStateBackend(StateBackend):
+    """State shared through one SQLite database in WAL mode."""
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS response_cache (
+            claim TEXT NOT NULL,
+            tone TEXT NOT NULL,
+            variants TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (claim, tone)
+        );
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TEXT NOT NULL,
+            username TEXT,
+            category TEXT,
+            record TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS interactions_timestamp ON interactions (timestamp);
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT NOT NULL,
+            category TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, category)
+        );
+        CREATE TABLE IF NOT EXISTS message_leases (
+            message_id TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            lease_until REAL NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS followers (
+            username TEXT PRIMARY KEY,
+            first_seen REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = None):
+        self.path = str(path or os.getenv("STATE_DB_PATH") or data_path("bot_state.db"))
+        self.max_interactions = int(os.getenv("STATE_MAX_INTERACTIONS", "100000"))
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.executescript(self.SCHEMA)
+        self._appends = 0
+
+    def _write(self, statements) -> Any:
+        """Run `statements(cursor)` inside one IMMEDIATE transaction."""
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                result = statements(cursor)
+                cursor.execute("COMMIT")
+                return result
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+
+    def _read(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def ping(self) -> None:
+        self._read("SELECT 1")
+
+    def cache_get(self, claim: str, tone: str) -> Optional[Dict[str, Any]]:
+        rows = self._read(
+            "SELECT variants, created_at FROM response_cache WHERE claim = ? AND tone = ?", (claim, tone)
+        )
+        if not rows:
+            return None
+        return {"variants": json.loads(rows[0][0]), "created_at": rows[0][1]}
+
+    def cache_put(self, claim: str, tone: str, variant: Dict[str, Any], max_variants: int) -> None:
+        def statements(cursor: sqlite3.Cursor) -> None:
+            row = cursor.execute(
+                "SELECT variants FROM response_cache WHERE claim = ? AND tone = ?", (claim, tone)
+            ).fetchone()
+            variants = json.loads(row[0]) if row else []
+            if any(v.get("response") == variant.get("response") for v in variants):
+                return
+            variants = (variants + [variant])[-max_variants:]
+            cursor.execute(
+                "INSERT INTO response_cache (claim, tone, variants, created_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (claim, tone) DO UPDATE SET variants = excluded.variants",
+                (claim, tone, json.dumps(variants), time.time())
+            )
+        self._write(statements)
+
+    def cache_replace(self, claim: str, tone: str, variants: List[Dict[str, Any]]) -> None:
+        self._write(lambda cursor: cursor.execute(
+            "INSERT INTO response_cache (claim, tone, variants, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (claim, tone) DO UPDATE SET variants = excluded.variants, created_at = excluded.created_at",
+            (claim, tone, json.dumps(variants), time.time())
+        ))
+
+    def append_interaction(self, interaction: Dict[str, Any]) -> None:
+        timestamp = interaction.get("timestamp", "")
+        category = interaction.get("category", "unknown")
+
+        def statements(cursor: sqlite3.Cursor) -> None:
+            cursor.execute(
+                "INSERT INTO interactions (timestamp, username, category, record) VALUES (?, ?, ?, ?)",
+                (timestamp, interaction.get("username"), category, json.dumps(interaction, default=str))
+            )
+            cursor.execute(
+                "INSERT INTO daily_stats (day, category, count) VALUES (?, ?, 1) "
+                "ON CONFLICT (day, category) DO UPDATE SET count = count + 1",
+                (timestamp[:10], category)
+            )
+            self._appends += 1
+            if self._appends % 1000 == 0:
+                cursor.execute(
+                    "DELETE FROM interactions WHERE id <= (SELECT MAX(id) FROM interactions) - ?",
+                    (self.max_interactions,)
+                )
+        self._write(statements)
+
+    def interactions_since(self, timestamp: str, limit: int = 1000) -> List[Dict[str, Any]]:
+        rows = self._read(
+            "SELECT record FROM interactions WHERE timestamp > ? ORDER BY id DESC LIMIT ?", (timestamp, limit)
+        )
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def daily_stats(self, day: str) -> Dict[str, int]:
+        return dict(self._read("SELECT category, count FROM daily_stats WHERE day = ?", (day,)))
+
+    def claim_message(self, message_id: str, owner: str, lease_seconds: float) -> bool:
+        now = time.time()
+
+        def statements(cursor: sqlite3.Cursor) -> bool:
+            cursor.execute(
+                "INSERT INTO message_leases (message_id, owner, lease_until, done) VALUES (?, ?, ?, 0) "
+                "ON CONFLICT (message_id) DO UPDATE SET owner = excluded.owner, lease_until = excluded.lease_until "
+                "WHERE message_leases.done = 0 AND message_leases.lease_until < ?",
+                (message_id, owner, now + lease_seconds, now)
+            )
+            return cursor.rowcount == 1
+        return self._write(statements)
+
+    def complete_message(self, message_id: str, owner: str) -> None:
+        self._write(lambda cursor: cursor.execute(
+            "UPDATE message_leases SET done = 1 WHERE message_id = ? AND owner = ?", (message_id, owner)
+        ))
+
+    def release_message(self, message_id: str, owner: str) -> None:
+        self._write(lambda cursor: cursor.execute(
+            "DELETE FROM message_leases WHERE message_id = ? AND owner = ? AND done = 0", (message_id, owner)
+        ))
+
+    def release_leases(self, process_owner: str) -> int:
+        prefix = process_owner + ":"
+        return self._write(lambda cursor: cursor.execute(
+            "DELETE FROM message_leases WHERE substr(owner, 1, ?) = ? AND done = 0", (len(prefix), prefix)
+        ).rowcount)
+
+    def add_followers(self, usernames: List[str]) -> List[str]:
+        now = time.time()
+
+        def statements(cursor: sqlite3.Cursor) -> List[str]:
+            new_followers = []
+            for username in usernames:
+                cursor.execute("INSERT OR IGNORE INTO followers (username, first_seen) VALUES (?, ?)", (username, now))
+                if cursor.rowcount == 1:
+                    new_followers.append(username)
+            return new_followers
+        return self._write(statements)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_backend: Optional[StateBackend] = None
+
+
+def get_state_backend() -> Optional[StateBackend]:
+    """Shared backend selected by STATE_BACKEND, or None for per-process JSON files."""
+    global _backend
+    if _backend is None:
+        kind = os.getenv("STATE_BACKEND", "local").lower()
+        if kind == "sqlite":
+            _backend = SQLiteStateBackend()
+        elif kind not in ("local", ""):
+            raise ValueError(f"Unknown STATE_BACKEND: {kind}")
+    return _backend
@@ -0,0 +1,344 @@
+"""
+Multi-account tenancy for Sassy Fact Check Bot.
+
+One process can serve several Instagram accounts (bot personas). The
+expensive parts stay shared: the Claude client pool, response cache,
+compiled content filter and worker pool all live in the one
+SassyFactChecker. Each account keeps its own DM cursor, outbox, follower
+index and quotas, so one noisy account cannot starve the others:
+
+- a token-bucket rate limit and a cap on concurrent fact-checks, so its
+  backlog waits in its own line;
+- a daily Claude cost budget, after which it degrades like the global
+  budget does (BUDGET_DEGRADE_MODE) while other accounts carry on.
+
+Message and thread ids of extra accounts are prefixed with the account id,
+so conversations and DM leases never mix across accounts while identical
+claims still share cached replies.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import date
+from pathlib import Path
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, List, Optional
+
+from instagram_dm_mcp import InstagramDemoTools, get_instagram_tools
+from metrics import metrics
+from tools.welcome_followers import FollowerWelcomer
+from usage_ledger import DEGRADE_MODES, estimate_cost
+
+DEFAULT_ACCOUNT = "default"
+# Account ids end up in file names and state keys
+ACCOUNT_ID_RE = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+class AccountQuota:
+    """Per-account rate limit, concurrency cap and daily Claude budget."""
+
+    def __init__(
+        self,
+        account: str,
+        rate_per_minute: float = None,
+        burst: float = None,
+        max_inflight: int = None,
+        daily_budget_usd: float = None
+    ):
+        self.account = account
+        self.rate_per_minute = rate_per_minute if rate_per_minute is not None else float(os.getenv("ACCOUNT_RATE_PER_MINUTE", "0"))
+        self.burst = max(1.0, burst if burst is not None else float(os.getenv("ACCOUNT_BURST", "5")))
+        self.max_inflight = max(1, max_inflight or int(os.getenv("ACCOUNT_MAX_INFLIGHT", "8")))
+        self.daily_budget_usd = daily_budget_usd if daily_budget_usd is not None else float(os.getenv("ACCOUNT_DAILY_BUDGET_USD", "0"))
+        self.degrade_mode = os.getenv("BUDGET_DEGRADE_MODE", "cache_only")
+        if self.degrade_mode not in DEGRADE_MODES:
+            self.degrade_mode = "cache_only"
+
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self.inflight = 0
+        self.throttled = 0
+        self.day = date.today().isoformat()
+        self.spent_usd = 0.0
+        self.tokens_used = 0
+        self.calls = 0
+
+    def _reserve(self) -> float:
+        """Take one token, returning how long to wait for it (0 if available now)."""
+        if self.rate_per_minute <= 0:
+            return 0.0
+        now = time.monotonic()
+        rate = self.rate_per_minute / 60
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        # Going negative queues the caller behind earlier reservations
+        self._tokens -= 1
+        return max(0.0, -self._tokens / rate)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a concurrency slot and a rate token, then hold the slot."""
+        async with self._slots:
+            wait = self._reserve()
+            if wait > 0:
+                self.throttled += 1
+                metrics.incr("account_throttled", self.account)
+                await asyncio.sleep(wait)
+            self.inflight += 1
+            try:
+                yield
+            finally:
+                self.inflight -= 1
+
+    def _roll_day(self) -> None:
+        today = date.today().isoformat()
+        if today != self.day:
+            self.day = today
+            self.spent_usd = 0.0
+            self.tokens_used = 0
+            self.calls = 0
+
+    def charge(self, result: Dict[str, Any]) -> float:
+        """Count the Claude calls behind a result (cached and templated replies are free)."""
+        self._roll_day()
+        cost = 0.0
+        for usage in result.get("usage") or ():
+            cost += estimate_cost(usage["model"], usage["input_tokens"], usage["output_tokens"], usage["cached_tokens"])
+            self.tokens_used += usage["input_tokens"] + usage["output_tokens"]
+            self.calls += 1
+        self.spent_usd += cost
+        return cost
+
+    def degraded_mode(self) -> Optional[str]:
+        """The degradation mode once today's account budget is spent, else None."""
+        self._roll_day()
+        if self.daily_budget_usd and self.spent_usd >= self.daily_budget_usd:
+            return self.degrade_mode
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._roll_day()
+        return {
+            "rate_per_minute": self.rate_per_minute or None,
+            "max_inflight": self.max_inflight,
+            "inflight": self.inflight,
+            "throttled": self.throttled,
+            "spent_usd": round(self.spent_usd, 6),
+            "tokens_used": self.tokens_used,
+            "calls": self.calls,
+            "daily_budget_usd": self.daily_budget_usd or None,
+            "degraded_mode": self.degraded_mode(),
+        }
+
+    def export_state(self) -> Dict[str, Any]:
+        """Today's spend, for snapshots."""
+        return {"day": self.day, "spent_usd": self.spent_usd, "tokens_used": self.tokens_used, "calls": self.calls}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore today's spend (a snapshot from an earlier day is ignored)."""
+        if state.get("day") != date.today().isoformat():
+            return
+        self.day = state["day"]
+        self.spent_usd = state.get("spent_usd", 0.0)
+        self.tokens_used = state.get("tokens_used", 0)
+        self.calls = state.get("calls", 0)
+
+
+class Outbox:
+    """Replies waiting to be sent for one account, oldest first.
+
+    A reply leaves the outbox only once it has been sent (or given up on), so
+    unsent replies survive a restart through the snapshot. When the outbox is
+    full, put() waits, which holds back that account's inbox only.
+    """
+
+    def __init__(self, limit: int = None):
+        self.limit = max(1, limit or int(os.getenv("ACCOUNT_OUTBOX_SIZE", "100")))
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self._ready = asyncio.Event()
+        self._room = asyncio.Event()
+        self._room.set()
+        self.sent = 0
+        self.failed = 0
+
+    async def put(self, reply: Dict[str, Any]) -> None:
+        while len(self.pending) >= self.limit:
+            self._room.clear()
+            await self._room.wait()
+        self.pending.append(reply)
+        self._ready.set()
+
+    async def next(self) -> Dict[str, Any]:
+        """The oldest unsent reply, waiting for one if the outbox is empty."""
+        while not self.pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self.pending[0]
+
+    def done(self, sent: bool) -> None:
+        """Drop the reply returned by next()."""
+        self.pending.popleft()
+        if sent:
+            self.sent += 1
+        else:
+            self.failed += 1
+        self._room.set()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"pending": len(self.pending), "limit": self.limit, "sent": self.sent, "failed": self.failed}
+
+    def export_state(self) -> List[Dict[str, Any]]:
+        return list(self.pending)
+
+    def restore_state(self, state: List[Dict[str, Any]]) -> None:
+        self.pending = deque(state)
+        if self.pending:
+            self._ready.set()
+
+
+class Account:
+    """One Instagram account served by this process, with its own cursor, outbox, followers and quota."""
+
+    def __init__(self, account_id: str, welcomer: FollowerWelcomer = None, quota: AccountQuota = None,
+                 outbox: Outbox = None):
+        self.account_id = account_id
+        self.is_default = account_id == DEFAULT_ACCOUNT
+        self.welcomer = welcomer or FollowerWelcomer(None if self.is_default else account_id)
+        self.quota = quota or AccountQuota(account_id)
+        self.outbox = outbox if outbox is not None else Outbox()
+
+    @property
+    def instagram(self) -> InstagramDemoTools:
+        """DM client and cursor for this account (created on first use, after .env is loaded)."""
+        return get_instagram_tools(None if self.is_default else self.account_id)
+
+    def scoped(self, key: Optional[str]) -> Optional[str]:
+        """Namespace a message or thread id so accounts never share leases or conversations."""
+        if key is None or self.is_default:
+            return key
+        return f"{self.account_id}:{key}"
+
+    async def process(
+        self,
+        worker_pool: Any,
+        content: str,
+        username: str,
+        message_type: str = "text",
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Fact-check a DM on the shared worker pool within this account's quotas."""
+        async with self.quota.slot():
+            result = await worker_pool.process(
+                content,
+                username,
+                message_type,
+                self.scoped(message_id),
+                self.scoped(thread_id or (None if self.is_default else username)),
+                self.quota.degraded_mode()
+            )
+        cost = self.quota.charge(result)
+        if cost:
+            metrics.incr("account_calls", self.account_id)
+        return result
+
+    def get_status(self) -> Dict[str, Any]:
+        instagram = self.instagram
+        return {
+            "account": self.account_id,
+            "mode": "demo" if instagram.demo_mode else "real",
+            "dm_watermark": instagram.dm_watermark or None,
+            "poll_interval_s": instagram.poll_interval,
+            "last_fetch_error": instagram.last_fetch_error,
+            "unanswered_dms": instagram.unanswered,
+            "dead_letters": len(instagram.dead_letters),
+            "followers": len(self.welcomer.seen_followers),
+            "outbox": self.outbox.get_stats(),
+            "quota": self.quota.get_stats(),
+        }
+
+    def export_state(self) -> Dict[str, Any]:
+        """Quota and outbox; extra accounts also carry their DM cursor and follower index."""
+        state = {"quota": self.quota.export_state(), "outbox": self.outbox.export_state()}
+        if not self.is_default:
+            # The default account's cursor and followers have their own snapshot sections
+            state["dm"] = self.instagram.export_state()
+            state["followers"] = self.welcomer.export_state()
+        return state
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        self.quota.restore_state(state.get("quota", {}))
+        self.outbox.restore_state(state.get("outbox", []))
+        if not self.is_default:
+            if "dm" in state:
+                self.instagram.restore_state(state["dm"])
+            if "followers" in state:
+                self.welcomer.restore_state(state["followers"])
+
+
+def _load_account_overrides(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Per-account quota overrides from ACCOUNTS_FILE, e.g. {"alice": {"rate_per_minute": 30}}."""
+    if not path.exists():
+        return {}
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        return {account: settings for account, settings in data.items() if isinstance(settings, dict)}
+    except Exception as e:
+        print(f"Error loading account settings from {path}: {e}")
+        return {}
+
+
+class AccountRegistry:
+    """The accounts this process serves: the default account plus BOT_ACCOUNTS."""
+
+    QUOTA_SETTINGS = ("rate_per_minute", "burst", "max_inflight", "daily_budget_usd")
+
+    def __init__(self, default_welcomer: FollowerWelcomer = None, account_ids: List[str] = None):
+        if account_ids is None:
+            account_ids = [account.strip() for account in os.getenv("BOT_ACCOUNTS", "").split(",")]
+        overrides = _load_account_overrides(Path(os.getenv("ACCOUNTS_FILE", "accounts.json")))
+
+        self.accounts: Dict[str, Account] = {}
+        for account_id in [DEFAULT_ACCOUNT] + account_ids:
+            if not account_id or account_id in self.accounts:
+                continue
+            if not ACCOUNT_ID_RE.match(account_id):
+                print(f"⚠️ Skipping account {account_id!r}: use letters, digits, '.', '_' or '-'")
+                continue
+            settings = overrides.get(account_id, {})
+            quota = AccountQuota(account_id, **{name: settings[name] for name in self.QUOTA_SETTINGS if name in settings})
+            welcomer = default_welcomer if account_id == DEFAULT_ACCOUNT else None
+            self.accounts[account_id] = Account(account_id, welcomer, quota)
+
+    def get(self, account_id: Optional[str] = None) -> Account:
+        """An account by id (the default account for None or "")."""
+        account = self.accounts.get(account_id or DEFAULT_ACCOUNT)
+        if account is None:
+            raise ValueError(f"Unknown account: {account_id} (configured: {', '.join(self.accounts)})")
+        return account
+
+    def __iter__(self) -> Iterator[Account]:
+        return iter(self.accounts.values())
+
+    def __len__(self) -> int:
+        return len(self.accounts)
+
+    def export_state(self) -> Dict[str, Any]:
+        """Per-account state, for snapshots."""
+        return {account_id: account.export_state() for account_id, account in self.accounts.items()}
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore accounts still configured; state of removed accounts is dropped."""
+        for account_id, account_state in state.items():
+            account = self.accounts.get(account_id)
+            if account is not None:
+                account.restore_state(account_state)
@@ -0,0 +1,91 @@
+"""
+Progress reporting for long-running MCP tools.
+
+ToolProgress sends MCP progress notifications for the tool call being
+handled, carrying each finished item's result in the notification message so
+the host can show partial results before the final response. It is a no-op
+when the client did not ask for progress (no progressToken).
+
+run_bounded() runs many item jobs with limited concurrency and yields each
+result as soon as it finishes. If the consumer is cancelled (e.g. the client
+sent notifications/cancelled), jobs still running are cancelled and jobs not
+yet started never start, so no further LLM calls are made.
+"""
+
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence, Tuple
+
+from metrics import metrics
+
+# Keep notifications small; the full text is in the final result
+MAX_MESSAGE_CHARS = 500
+
+
+class ToolProgress:
+    """Progress notifications for the current tool call."""
+
+    def __init__(self, server: Any, total: Optional[int] = None):
+        self.total = total
+        self.completed = 0
+        self.token = None
+        self.session = None
+        self.request_id = None
+        try:
+            context = server.request_context
+        except LookupError:
+            return  # called outside a request (e.g. from a script)
+        if context.meta is not None:
+            self.token = context.meta.progressToken
+        self.session = context.session
+        self.request_id = context.request_id
+
+    @property
+    def enabled(self) -> bool:
+        return self.token is not None
+
+    async def advance(self, message: str = "", amount: int = 1) -> None:
+        """Count finished items and notify the client, with an optional partial result."""
+        self.completed += amount
+        if self.token is None:
+            return
+        if len(message) > MAX_MESSAGE_CHARS:
+            message = message[:MAX_MESSAGE_CHARS - 1] + "…"
+        try:
+            await self.session.send_progress_notification(
+                self.token, self.completed, self.total, message or None,
+                related_request_id=str(self.request_id)
+            )
+            metrics.incr("progress_notifications")
+        except Exception as e:
+            # A closed or slow transport must not fail the tool itself
+            print(f"Failed to send progress notification: {e}")
+
+
+async def run_bounded(
+    jobs: Sequence[Callable[[], Awaitable[Any]]],
+    limit: int,
+    keep_starting: Callable[[], bool] = lambda: True
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Run job factories with at most `limit` in flight; yield (index, result or exception) as each finishes.
+    
+    Once `keep_starting()` is false no new jobs start, but running ones are still awaited.
+    """
+    pending = {}
+    next_index = 0
+    try:
+        while pending or (next_index < len(jobs) and keep_starting()):
+            while next_index < len(jobs) and len(pending) < max(1, limit) and keep_starting():
+                pending[asyncio.ensure_future(jobs[next_index]())] = next_index
+                next_index += 1
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                yield index, task.exception() or task.result()
+    finally:
+        # Cancelled or abandoned: stop in-flight jobs; unstarted ones are simply dropped
+        for task in pending:
+            task.cancel()
+        if pending:
+            metrics.incr("tool_jobs_cancelled", "all", len(pending) + len(jobs) - next_index)
+            await asyncio.gather(*pending, return_exceptions=True)
+
@@ -5,15 +5,25 @@ Welcome new followers with a sassy introduction message.
 import json
 import asyncio
 from datetime import datetime
-from typing import Set, List, Dict, Any
+from functools import cached_property
+from typing import Set, List, Dict, Any, Optional
 from pathlib import Path
 
+from state_backend import get_state_backend
+from write_behind import atomic_write_json
+
 class FollowerWelcomer:
     """Manages welcoming new followers with sassy introduction."""
     
-    def __init__(self):
-        self.seen_followers_file = Path("seen_followers.json")
-        self.seen_followers: Set[str] = self._load_seen_followers()
+    def __init__(self, account: Optional[str] = None):
+        # Each extra account keeps its own follower index (None is the default account)
+        self.account = account
+        self.seen_followers_file = Path(f"seen_followers.{account}.json" if account else "seen_followers.json")
+    
+    @cached_property
+    def seen_followers(self) -> Set[str]:
+        """Seen followers, loaded from file on first use."""
+        return self._load_seen_followers()
         
     def _load_seen_followers(self) -> Set[str]:
         """Load previously seen followers from file."""
@@ -33,11 +43,21 @@ class FollowerWelcomer:
                 'followers': list(self.seen_followers),
                 'last_updated': datetime.now().isoformat()
             }
-            with open(self.seen_followers_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            atomic_write_json(self.seen_followers_file, data, indent=2)
         except Exception as e:
             print(f"Error saving seen followers: {e}")
     
+    def export_state(self) -> Dict[str, Any]:
+        """Follower index, for snapshots."""
+        return {"followers": sorted(self.seen_followers), "updated_at": datetime.now().timestamp()}
+    
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """Restore the follower index, merging the file if it was written since."""
+        followers = set(state.get("followers", []))
+        if self.seen_followers_file.exists() and self.seen_followers_file.stat().st_mtime > state.get("updated_at", 0):
+            followers |= self._load_seen_followers()
+        self.seen_followers = followers
+    
     def get_welcome_messages(self) -> List[str]:
         """Get pool of welcome messages to rotate through."""
         return [
@@ -70,9 +90,24 @@ class FollowerWelcomer:
                 new_followers.append(username)
                 self.seen_followers.add(username)
         
+        # With a shared backend, only the first process to see a follower welcomes them
+        backend = get_state_backend()
+        if backend is not None and new_followers:
+            if self.account:
+                prefix = f"{self.account}:"
+                new_followers = [
+                    username[len(prefix):]
+                    for username in await asyncio.to_thread(
+                        backend.add_followers, [prefix + username for username in new_followers]
+                    )
+                ]
+            else:
+                new_followers = await asyncio.to_thread(backend.add_followers, new_followers)
+        
         # Save updated seen followers
         if new_followers:
-            self._save_seen_followers()
+            if backend is None:
+                self._save_seen_followers()
             print(f"Found {len(new_followers)} new followers: {new_followers}")
         
         return new_followers
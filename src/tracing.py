@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Lightweight per-request tracing for Sassy Fact Check Bot.
+Spans flow through contextvars and are exported to a rotating JSONL file
+by a background thread.
+
+Usage:
+    python src/tracing.py --slowest 10 [--file var/traces.jsonl]
+"""
+
+import argparse
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from paths import data_path
+
+
+class Span:
+    """A timed unit of work inside a trace."""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:8]
+        self.parent_id = parent_id
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns = 0
+        self.attributes = attributes
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes to the span."""
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "offset_ms": round((self.start_ns - self.trace.start_ns) / 1e6, 3),
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """All spans recorded for one request."""
+
+    __slots__ = ("trace_id", "started_at", "start_ns", "spans")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex[:16]
+        self.started_at = time.time()
+        self.start_ns = time.perf_counter_ns()
+        self.spans: List[Span] = []
+
+    @property
+    def duration_ms(self) -> float:
+        root = self.spans[0]
+        return (root.end_ns - root.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.spans[0].name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+
+class _NoopSpan:
+    """Stand-in used when no trace is active."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: ContextVar[Optional[Span]] = ContextVar("sassybot_current_span", default=None)
+
+
+class _SpanScope:
+    """Context manager that opens a span and makes it current."""
+
+    __slots__ = ("tracer", "span", "token", "is_root")
+
+    def __init__(self, tracer: "Tracer", span: Span, is_root: bool):
+        self.tracer = tracer
+        self.span = span
+        self.is_root = is_root
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.span.end_ns = time.perf_counter_ns()
+        if exc_type is not None:
+            self.span.attributes["error"] = exc_type.__name__
+        _current_span.reset(self.token)
+        if self.is_root:
+            self.tracer._finish(self.span.trace)
+        return False
+
+
+class _TraceExporter(threading.Thread):
+    """Background thread writing finished traces to a rotating JSONL file."""
+
+    def __init__(self, path: Path, max_bytes: int, backups: int):
+        super().__init__(name="trace-exporter", daemon=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=10000)
+
+    def run(self) -> None:
+        while True:
+            record = self.queue.get()
+            if record is None:
+                return
+            try:
+                self._write(record)
+            except Exception as e:
+                print(f"Failed to export trace: {e}")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, default=str) + "\n"
+        if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a") as f:
+            f.write(line)
+
+    def _rotate(self) -> None:
+        for index in range(self.backups - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.backups > 0:
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+
+
+class Tracer:
+    """Creates traces and decides which ones are worth keeping."""
+
+    def __init__(self):
+        self.enabled = os.getenv("ENABLE_TRACING", "true").lower() == "true"
+        self.sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+        self.slow_ms = float(os.getenv("TRACE_SLOW_MS", "2000"))
+        self.max_bytes = int(os.getenv("TRACE_MAX_BYTES", str(5 * 1024 * 1024)))
+        self.backups = int(os.getenv("TRACE_BACKUPS", "3"))
+        self._exporter: Optional[_TraceExporter] = None
+        self._lock = threading.Lock()
+
+    def trace(self, name: str, remote_parent: Optional[Dict[str, str]] = None, **attributes: Any):
+        """Start a new trace, or a child span if one is already active.
+
+        `remote_parent` is another process's context() (e.g. from a worker job), so the
+        spans recorded here are exported under the caller's trace id.
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        parent = _current_span.get()
+        if parent is not None:
+            return self._child(parent, name, attributes)
+        remote_parent = remote_parent or {}
+        trace = Trace(remote_parent.get("trace_id"))
+        span = Span(trace, name, remote_parent.get("span_id"), attributes)
+        trace.spans.append(span)
+        return _SpanScope(self, span, is_root=True)
+
+    def span(self, name: str, **attributes: Any):
+        """Open a child span of the current one; a no-op outside a trace."""
+        parent = _current_span.get()
+        if parent is None:
+            return _NOOP_SPAN
+        return self._child(parent, name, attributes)
+
+    def _child(self, parent: Span, name: str, attributes: Dict[str, Any]) -> _SpanScope:
+        span = Span(parent.trace, name, parent.span_id, attributes)
+        parent.trace.spans.append(span)
+        return _SpanScope(self, span, is_root=False)
+
+    def current_span(self):
+        """Get the active span (or a no-op stand-in)."""
+        return _current_span.get() or _NOOP_SPAN
+
+    def context(self) -> Optional[Dict[str, str]]:
+        """Picklable trace/span ids of the active span, to continue the trace in another process."""
+        span = _current_span.get()
+        if span is None:
+            return None
+        return {"trace_id": span.trace.trace_id, "span_id": span.span_id}
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.trace.trace_id if span is not None else None
+
+    def _finish(self, trace: Trace) -> None:
+        """Tail-sample a finished trace: keep slow ones, plus a random share."""
+        if trace.duration_ms < self.slow_ms and random.random() >= self.sample_rate:
+            return
+        try:
+            self._get_exporter().queue.put_nowait(trace.to_dict())
+        except queue.Full:
+            pass
+
+    def _get_exporter(self) -> _TraceExporter:
+        with self._lock:
+            if self._exporter is None or not self._exporter.is_alive():
+                # Resolved on first export, so importing this module creates no files
+                path = Path(os.getenv("TRACE_FILE") or data_path("traces.jsonl"))
+                self._exporter = _TraceExporter(path, self.max_bytes, self.backups)
+                self._exporter.start()
+            return self._exporter
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Stop the exporter after it has written everything queued."""
+        with self._lock:
+            exporter, self._exporter = self._exporter, None
+        if exporter is not None and exporter.is_alive():
+            exporter.queue.put(None)
+            exporter.join(timeout)
+
+
+def load_traces(path: Path) -> List[Dict[str, Any]]:
+    """Load traces from a JSONL file and its rotated backups."""
+    traces = []
+    for candidate in [path] + sorted(path.parent.glob(f"{path.name}.*")):
+        if not candidate.exists() or candidate.suffix == ".tmp":
+            continue
+        with open(candidate, "r") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        traces.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+    return traces
+
+
+def merge_remote_parts(traces: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold parts exported by worker processes into the trace that started them."""
+    roots: Dict[str, Dict[str, Any]] = {}
+    parts = []
+    for trace in traces:
+        if trace["spans"] and trace["spans"][0]["parent_id"] is None:
+            roots[trace["trace_id"]] = trace
+        else:
+            parts.append(trace)
+    merged = list(roots.values())
+    for part in parts:
+        root = roots.get(part["trace_id"])
+        if root is None:
+            merged.append(part)  # the caller's part was not sampled
+            continue
+        shift_ms = (part["started_at"] - root["started_at"]) * 1000
+        root["spans"].extend(
+            {**span, "offset_ms": round(span["offset_ms"] + shift_ms, 3)} for span in part["spans"]
+        )
+    return merged
+
+
+def print_slowest(path: Path, count: int) -> None:
+    """Print the slowest recorded traces with their span breakdown."""
+    traces = sorted(merge_remote_parts(load_traces(path)), key=lambda t: t["duration_ms"], reverse=True)
+    if not traces:
+        print(f"No traces found in {path}")
+        return
+
+    for trace in traces[:count]:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(trace["started_at"]))
+        print(f"🐢 {trace['duration_ms']:.1f}ms  {trace['name']}  trace={trace['trace_id']}  at {started}")
+
+        depth = {None: -1}
+        for span in trace["spans"]:
+            level = depth.get(span["parent_id"], 0) + 1
+            depth[span["span_id"]] = level
+            attributes = " ".join(f"{k}={v}" for k, v in span["attributes"].items())
+            print(f"   {'  ' * level}{span['name']}: {span['duration_ms']:.1f}ms (+{span['offset_ms']:.1f}) {attributes}")
+        print()
+
+
+# Global instance
+tracer = Tracer()
+atexit.register(tracer.flush)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the slowest Sassy Fact Check Bot traces")
+    parser.add_argument("--slowest", type=int, default=10, help="Number of traces to show")
+    parser.add_argument("--file", default=os.getenv("TRACE_FILE") or data_path("traces.jsonl"), help="Trace JSONL file")
+    args = parser.parse_args()
+    print_slowest(Path(args.file), args.slowest)
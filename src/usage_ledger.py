@@ -0,0 +1,215 @@
+"""
+Token and cost accounting for Sassy Fact Check Bot.
+Aggregates Claude usage per day, user and category and enforces daily budgets.
+"""
+
+import atexit
+import json
+import os
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from paths import data_path
+from write_behind import atomic_write_json
+
+# USD per million tokens: (input, output, cache read)
+MODEL_PRICING = {
+    "claude-3-haiku-20240307": (0.25, 1.25, 0.03),
+    "claude-3-5-haiku-20241022": (0.80, 4.00, 0.08),
+    "claude-3-5-sonnet-20241022": (3.00, 15.00, 0.30),
+}
+DEFAULT_PRICING = MODEL_PRICING["claude-3-haiku-20240307"]
+
+# Ledger row layout: [calls, input_tokens, output_tokens, cached_tokens, cost_usd]
+CALLS, INPUT, OUTPUT, CACHED, COST = range(5)
+
+DEGRADE_MODES = ("cache_only", "template_only")
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimate the USD cost of one Claude call."""
+    input_price, output_price, cache_price = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    return (
+        input_tokens * input_price
+        + output_tokens * output_price
+        + cached_tokens * cache_price
+    ) / 1_000_000
+
+
+class UsageLedger:
+    """Per-day/per-user/per-category token ledger with O(1) updates."""
+
+    def __init__(self, ledger_file: str = None):
+        self.ledger_file = Path(ledger_file or os.getenv("USAGE_LEDGER_FILE") or data_path("usage_ledger.json"))
+        self.daily_budget_usd = float(os.getenv("DAILY_BUDGET_USD", "0"))
+        self.daily_token_budget = int(os.getenv("DAILY_TOKEN_BUDGET", "0"))
+        self.degrade_mode = os.getenv("BUDGET_DEGRADE_MODE", "cache_only")
+        if self.degrade_mode not in DEGRADE_MODES:
+            self.degrade_mode = "cache_only"
+        self.retention_days = int(os.getenv("USAGE_RETENTION_DAYS", "31"))
+        self.save_interval = float(os.getenv("USAGE_SAVE_INTERVAL", "30"))
+
+        self.entries: Dict[Tuple[str, str, str], List[float]] = {}
+        self.day_totals: Dict[str, List[float]] = {}
+        self._day = date.today().isoformat()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+        atexit.register(self.save)
+
+    def record(
+        self,
+        username: str,
+        category: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        cached_tokens: int = 0
+    ) -> float:
+        """Record one Claude call and return its estimated cost."""
+        cost = estimate_cost(model, input_tokens, output_tokens, cached_tokens)
+        day = date.today().isoformat()
+        if day != self._day:
+            # First call of a new day: a long-running server would otherwise keep every day
+            self._day = day
+            self._prune()
+
+        for row in (
+            self.entries.setdefault((day, username, category), [0, 0, 0, 0, 0.0]),
+            self.day_totals.setdefault(day, [0, 0, 0, 0, 0.0]),
+        ):
+            row[CALLS] += 1
+            row[INPUT] += input_tokens
+            row[OUTPUT] += output_tokens
+            row[CACHED] += cached_tokens
+            row[COST] += cost
+
+        self._dirty = True
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.save()
+        return cost
+
+    def degraded_mode(self) -> Optional[str]:
+        """Return the degradation mode if today's budget is exhausted, else None."""
+        today = self.day_totals.get(date.today().isoformat())
+        if today is None:
+            return None
+        if self.daily_budget_usd and today[COST] >= self.daily_budget_usd:
+            return self.degrade_mode
+        if self.daily_token_budget and today[INPUT] + today[OUTPUT] >= self.daily_token_budget:
+            return self.degrade_mode
+        return None
+
+    def _days(self, days: int) -> List[str]:
+        today = date.today()
+        return [(today - timedelta(days=offset)).isoformat() for offset in range(max(days, 1))]
+
+    def _aggregate(self, days: int, key_index: int) -> Dict[str, List[float]]:
+        wanted = set(self._days(days))
+        totals: Dict[str, List[float]] = {}
+        for key, row in self.entries.items():
+            if key[0] not in wanted:
+                continue
+            total = totals.setdefault(key[key_index], [0, 0, 0, 0, 0.0])
+            for field in range(5):
+                total[field] += row[field]
+        return totals
+
+    @staticmethod
+    def _row_dict(row: List[float]) -> Dict[str, Any]:
+        return {
+            "calls": int(row[CALLS]),
+            "input_tokens": int(row[INPUT]),
+            "output_tokens": int(row[OUTPUT]),
+            "cached_tokens": int(row[CACHED]),
+            "cost_usd": round(row[COST], 6),
+        }
+
+    def top_spenders(self, days: int = 1, limit: int = 5) -> List[Dict[str, Any]]:
+        """Users ranked by cost over the last `days` days."""
+        totals = self._aggregate(days, 1)
+        ranked = sorted(totals.items(), key=lambda item: item[1][COST], reverse=True)
+        return [{"username": user, **self._row_dict(row)} for user, row in ranked[:limit]]
+
+    def cost_by_category(self, days: int = 1) -> List[Dict[str, Any]]:
+        """Cost and cost-per-call for each category over the last `days` days."""
+        totals = self._aggregate(days, 2)
+        ranked = sorted(totals.items(), key=lambda item: item[1][COST], reverse=True)
+        return [
+            {
+                "category": category,
+                **self._row_dict(row),
+                "cost_per_call_usd": round(row[COST] / row[CALLS], 6) if row[CALLS] else 0.0,
+            }
+            for category, row in ranked
+        ]
+
+    def daily_totals(self, days: int = 7) -> List[Dict[str, Any]]:
+        """Totals per day, newest first."""
+        return [
+            {"day": day, **self._row_dict(self.day_totals[day])}
+            for day in self._days(days)
+            if day in self.day_totals
+        ]
+
+    def get_budget_status(self) -> Dict[str, Any]:
+        """Today's spend against the configured budgets."""
+        today = self.day_totals.get(date.today().isoformat(), [0, 0, 0, 0, 0.0])
+        return {
+            "spent_usd": round(today[COST], 6),
+            "tokens_used": int(today[INPUT] + today[OUTPUT]),
+            "daily_budget_usd": self.daily_budget_usd or None,
+            "daily_token_budget": self.daily_token_budget or None,
+            "degraded_mode": self.degraded_mode(),
+        }
+
+    def _cutoff(self) -> str:
+        return (date.today() - timedelta(days=self.retention_days)).isoformat()
+
+    def _prune(self) -> None:
+        """Drop days past retention from memory."""
+        cutoff = self._cutoff()
+        for key in [key for key in self.entries if key[0] < cutoff]:
+            del self.entries[key]
+        for day in [day for day in self.day_totals if day < cutoff]:
+            del self.day_totals[day]
+
+    def _load(self) -> None:
+        """Load the ledger from file, dropping days past retention."""
+        if not self.ledger_file.exists():
+            return
+        try:
+            with open(self.ledger_file, 'r') as f:
+                data = json.load(f)
+            cutoff = self._cutoff()
+            for day, username, category, *row in data.get("entries", []):
+                if day < cutoff:
+                    continue
+                self.entries[(day, username, category)] = row
+                total = self.day_totals.setdefault(day, [0, 0, 0, 0, 0.0])
+                for field in range(5):
+                    total[field] += row[field]
+        except Exception as e:
+            print(f"Error loading usage ledger: {e}")
+
+    def save(self) -> None:
+        """Save the ledger to file if it changed."""
+        if not self._dirty:
+            return
+        try:
+            cutoff = self._cutoff()
+            data = {
+                "version": 1,
+                "entries": [
+                    [day, username, category, *row]
+                    for (day, username, category), row in self.entries.items()
+                    if day >= cutoff
+                ],
+            }
+            atomic_write_json(self.ledger_file, data, separators=(",", ":"))
+            self._dirty = False
+            self._last_save = time.monotonic()
+        except Exception as e:
+            print(f"Error saving usage ledger: {e}")
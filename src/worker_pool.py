@@ -0,0 +1,337 @@
+"""
+Sharded multi-worker runtime for Sassy Fact Check Bot.
+
+DMs are routed to one of BOT_WORKERS worker processes by a stable hash of the
+conversation key (thread id, else username). Each worker runs its own event
+loop and SassyFactChecker; messages for the same conversation are processed
+in arrival order while different conversations run concurrently. Results come
+back to the MCP server process over a shared response queue.
+
+With BOT_WORKERS=1 (the default), or if workers cannot be started, every
+request is handled in-process as before. A worker that dies, or does not
+answer within WORKER_REQUEST_TIMEOUT, hands its shard to the server process.
+"""
+
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import zlib
+from multiprocessing.connection import wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from health import health
+from metrics import metrics
+from state_backend import process_owner_id
+from tracing import tracer
+
+
+class WorkerUnavailable(Exception):
+    """Raised when the worker owning a shard has died."""
+
+
+def shard_for(key: str, workers: int) -> int:
+    """Stable shard for a conversation key (same in every process, unlike hash())."""
+    return zlib.crc32(key.encode()) % workers
+
+
+def _worker_main(index: int, requests: "multiprocessing.Queue", responses: "multiprocessing.Queue") -> None:
+    """Worker process entry point."""
+    # stdout belongs to the MCP stdio transport in the parent
+    sys.stdout = sys.stderr
+    from tools.sassy_fact_check import SassyFactChecker
+
+    checker = SassyFactChecker()
+    checker.owns_ledger = False
+    try:
+        asyncio.run(_serve(requests, responses, checker))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # multiprocessing exits children with os._exit, so atexit hooks never run here
+        tracer.flush()
+
+
+async def _serve(requests: "multiprocessing.Queue", responses: "multiprocessing.Queue", checker) -> None:
+    """Pull jobs until the None sentinel, chaining jobs that share a conversation key."""
+    loop = asyncio.get_running_loop()
+    tails: Dict[str, asyncio.Task] = {}
+    running: Dict[int, asyncio.Task] = {}
+
+    while True:
+        job = await loop.run_in_executor(None, requests.get)
+        if job is None:
+            break
+        request_id, op, key, kwargs = job
+
+        if op == "metrics":
+            responses.put((request_id, True, metrics.snapshot()))
+            continue
+        if op == "cancel":
+            # The caller gave up (e.g. the MCP client cancelled); stop this DM's LLM calls
+            task = running.get(request_id)
+            if task is not None:
+                task.cancel()
+            continue
+
+        task = loop.create_task(_run_ordered(tails.get(key), checker, request_id, kwargs, responses))
+        tails[key] = task
+        running[request_id] = task
+        task.add_done_callback(lambda done, request_id=request_id: running.pop(request_id, None))
+        task.add_done_callback(lambda done, key=key: tails.get(key) is done and tails.pop(key))
+
+    # Drain in-flight conversations before exiting
+    if tails:
+        await asyncio.gather(*tails.values(), return_exceptions=True)
+
+
+async def _run_ordered(previous: Optional[asyncio.Task], checker, request_id: int,
+                       kwargs: Dict[str, Any], responses: "multiprocessing.Queue") -> None:
+    """Process one DM after the previous DM of the same conversation has finished."""
+    # Spans recorded here belong to the server's trace for this request
+    remote_parent = kwargs.pop("trace_parent", None)
+    try:
+        with tracer.trace("worker_job", remote_parent=remote_parent, pid=os.getpid()) as span:
+            if previous is not None:
+                with tracer.span("wait_for_thread"):
+                    await asyncio.wait([previous])
+            result = await checker.process_dm_content(**kwargs)
+            span.set(category=result.get("category"))
+        responses.put((request_id, True, result))
+    except Exception as e:
+        responses.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class WorkerPool:
+    """Routes DMs to sharded worker processes, or to a local checker in single-process mode."""
+
+    def __init__(self, local_checker, workers: int = None):
+        self.local_checker = local_checker
+        self.workers = workers if workers is not None else int(os.getenv("BOT_WORKERS", "1"))
+        self.request_timeout = float(os.getenv("WORKER_REQUEST_TIMEOUT", "180"))
+        self.mode = "single"
+        self._processes: List[multiprocessing.Process] = []
+        self._queues: List["multiprocessing.Queue"] = []
+        self._responses: Optional["multiprocessing.Queue"] = None
+        self._pending: Dict[int, Tuple[asyncio.Future, int]] = {}
+        self._dead: set = set()
+        self._lease_release: Dict[int, asyncio.Task] = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._collector: Optional[threading.Thread] = None
+        self._closing = False
+        self._target = _worker_main
+
+    def start(self) -> None:
+        """Spawn worker processes (call from the running event loop)."""
+        if self.workers <= 1:
+            return
+
+        # Workers must share the cache, log and stats rather than race on JSON files
+        if os.getenv("STATE_BACKEND", "local").lower() == "local":
+            os.environ["STATE_BACKEND"] = "sqlite"
+            print("🗄️ BOT_WORKERS > 1: using the shared SQLite state backend")
+
+        self._loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context("spawn")
+        try:
+            self._responses = context.Queue()
+            for index in range(self.workers):
+                requests = context.Queue()
+                process = context.Process(
+                    target=self._target,
+                    args=(index, requests, self._responses),
+                    name=f"sassy-worker-{index}",
+                    daemon=True
+                )
+                process.start()
+                self._queues.append(requests)
+                self._processes.append(process)
+        except Exception as e:
+            print(f"⚠️ Worker processes unavailable, running single-process: {e}")
+            self.close()
+            return
+
+        self.mode = "sharded"
+        self._collector = threading.Thread(target=self._collect, name="sassy-worker-results", daemon=True)
+        self._collector.start()
+        print(f"🧵 Started {self.workers} worker processes")
+
+    async def process(
+        self,
+        content: str,
+        username: str,
+        message_type: str = "text",
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        degraded_mode: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Process a DM on the worker that owns its conversation."""
+        kwargs = {
+            "content": content,
+            "username": username,
+            "message_type": message_type,
+            "message_id": message_id,
+            "thread_id": thread_id,
+            "degraded_mode": degraded_mode
+        }
+        if self.mode != "sharded":
+            return await self.local_checker.process_dm_content(**kwargs)
+
+        key = thread_id or username
+        shard = shard_for(key, self.workers)
+        if shard in self._dead:
+            return await self._run_locally(shard, kwargs)
+
+        # Budget state and spend live in this process's ledger, not in the workers
+        ledger = self.local_checker.ledger
+        job = {**kwargs, "degraded_mode": ledger.degraded_mode() or degraded_mode, "trace_parent": tracer.context()}
+        try:
+            result = await asyncio.wait_for(self._submit(shard, "process", key, job), self.request_timeout)
+        except asyncio.TimeoutError:
+            # A hung worker: stop it so its leases are released and its shard runs here from now on
+            print(f"⚠️ Worker {shard} did not answer within {self.request_timeout:g}s; stopping it")
+            metrics.incr("worker_timeouts", str(shard))
+            self._processes[shard].terminate()
+            self._fail_shard(shard)
+            return await self._run_locally(shard, kwargs)
+        except WorkerUnavailable:
+            return await self._run_locally(shard, kwargs)
+        self.local_checker.record_usage(username, result)
+        # Claude is called in the worker; mirror the outcome so the server's health stays passive
+        if result.get("usage"):
+            health.record("claude_api", True)
+        elif result.get("category") == "error":
+            health.record("claude_api", False, error="worker fact-check error")
+        return result
+
+    async def _run_locally(self, shard: int, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle a dead shard's DM in this process."""
+        metrics.incr("worker_fallbacks", str(shard))
+        # The dead worker's leases would turn this retry into a duplicate
+        release = self._lease_release.get(shard)
+        if release is not None:
+            await release
+        return await self.local_checker.process_dm_content(**kwargs)
+
+    async def _submit(self, shard: int, op: str, key: Optional[str], kwargs: Optional[Dict[str, Any]]) -> Any:
+        request_id = next(self._ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = (future, shard)
+        try:
+            with metrics.timer("worker_roundtrip"):
+                self._queues[shard].put((request_id, op, key, kwargs))
+                return await future
+        except asyncio.CancelledError:
+            if op == "process" and shard not in self._dead:
+                self._queues[shard].put((request_id, "cancel", key, None))
+            raise
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _collect(self) -> None:
+        """Collector thread: hand worker results back to the event loop and notice dead workers."""
+        sentinels = {process.sentinel: index for index, process in enumerate(self._processes)}
+        try:
+            while not self._closing:
+                try:
+                    request_id, ok, payload = self._responses.get(timeout=0.2)
+                except queue.Empty:
+                    pass
+                except (EOFError, OSError, ValueError):
+                    break
+                else:
+                    self._loop.call_soon_threadsafe(self._resolve, request_id, ok, payload)
+                if self._closing:
+                    break
+                # Checked after every result too, so a crashed shard is noticed while other shards keep answering
+                exited = wait(list(sentinels), timeout=0)
+                if exited:
+                    # Results the dead workers sent before exiting still count
+                    try:
+                        while True:
+                            self._loop.call_soon_threadsafe(self._resolve, *self._responses.get_nowait())
+                    except (queue.Empty, EOFError, OSError, ValueError):
+                        pass
+                    for sentinel in exited:
+                        self._loop.call_soon_threadsafe(self._fail_shard, sentinels.pop(sentinel))
+        except RuntimeError:
+            pass  # the event loop closed before the pool did
+
+    def _resolve(self, request_id: int, ok: bool, payload: Any) -> None:
+        entry = self._pending.get(request_id)
+        if entry is None or entry[0].done():
+            return
+        if ok:
+            entry[0].set_result(payload)
+        else:
+            entry[0].set_exception(RuntimeError(payload))
+
+    def _fail_shard(self, index: int) -> None:
+        """Mark a dead worker and fail its pending requests so callers fall back."""
+        if index in self._dead or self._closing:
+            return
+        self._dead.add(index)
+        print(f"⚠️ Worker {index} exited; its conversations now run in the server process")
+        # Fallbacks wait for this before retrying the worker's DMs
+        self._lease_release[index] = self._loop.create_task(self._release_leases(index))
+        for future, shard in list(self._pending.values()):
+            if shard == index and not future.done():
+                future.set_exception(WorkerUnavailable(f"worker {index} exited"))
+
+    async def _release_leases(self, index: int) -> None:
+        """Free the DM leases a dead worker held so the server can retry those DMs now."""
+        backend = self.local_checker.backend
+        if backend is None:
+            return
+        try:
+            released = await asyncio.to_thread(backend.release_leases, process_owner_id(self._processes[index].pid))
+        except Exception as e:
+            print(f"Failed to release worker {index} leases: {e}")
+            return
+        if released:
+            print(f"🔓 Released {released} DM lease(s) held by worker {index}")
+
+    async def worker_metrics(self, timeout: float = 2.0) -> List[Dict[str, Any]]:
+        """Collect a metrics snapshot from every live worker."""
+        if self.mode != "sharded":
+            return []
+        live = [index for index in range(self.workers) if index not in self._dead]
+        results = await asyncio.gather(
+            *(asyncio.wait_for(self._submit(index, "metrics", None, None), timeout) for index in live),
+            return_exceptions=True
+        )
+        return [
+            {"worker": index, **result}
+            for index, result in zip(live, results)
+            if isinstance(result, dict)
+        ]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Pool mode, worker liveness and in-flight requests."""
+        return {
+            "mode": self.mode,
+            "workers": self.workers if self.mode == "sharded" else 1,
+            # A terminated worker can still look alive until the OS reaps it
+            "alive": [index for index, p in enumerate(self._processes) if index not in self._dead and p.is_alive()],
+            "pending": len(self._pending),
+        }
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Let workers drain their queues, then stop them."""
+        self._closing = True
+        for requests in self._queues:
+            try:
+                requests.put(None)
+            except Exception:
+                pass
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        if self._collector is not None:
+            self._collector.join(2.0)
+        self.mode = "single"
@@ -0,0 +1,139 @@
+"""
+Crash-safe persistence helpers for Sassy Fact Check Bot.
+
+atomic_write_json() replaces a file via temp file + fsync + rename, so a
+crash mid-write leaves the previous version intact. WriteBehindLog buffers
+interaction records and rewrites the JSON log in batches instead of on every
+message; each record is first appended (and fsynced) to a small journal so
+buffered records survive a crash and are recovered on the next start.
+Readers use read(), which includes records still in the buffer, and the
+buffer is flushed at interpreter exit.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+from paths import data_path
+
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs: Any) -> None:
+    """Write JSON to a temp file, fsync it and rename it over `path`."""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, **dump_kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    try:
+        # Persist the rename itself
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass  # not supported on every platform (e.g. Windows)
+
+
+def _record_key(record: Dict[str, Any]) -> tuple:
+    return record.get("timestamp", ""), record.get("username")
+
+
+class WriteBehindLog:
+    """Batched JSON log with an append-only journal for records not yet flushed."""
+
+    def __init__(self, path: Path, max_entries: int = 1000, batch_size: int = None, journal_path: Path = None):
+        self.path = Path(path)
+        self.journal_path = Path(journal_path or data_path(self.path.name + ".journal"))
+        self.max_entries = max_entries
+        self.batch_size = batch_size or int(os.getenv("LOG_FLUSH_BATCH", "50"))
+        self.flush_interval = float(os.getenv("LOG_FLUSH_INTERVAL", "5"))
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.recovered = self._recover()
+        atexit.register(self._flush_at_exit)
+
+    def _load(self) -> List[Dict[str, Any]]:
+        if not self.path.exists():
+            return []
+        with open(self.path, "r") as f:
+            return json.load(f)
+
+    def _recover(self) -> int:
+        """Flush journal records a crash left behind into the log; returns how many."""
+        if not self.journal_path.exists():
+            return 0
+        pending = []
+        try:
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        pending.append(json.loads(line))
+                    except ValueError:
+                        break  # torn final line from the crash
+            logs = self._load()
+        except Exception as e:
+            print(f"Failed to recover interaction journal: {e}")
+            return 0
+
+        # The crash may have come after the log rewrite but before the journal was removed
+        logged = {_record_key(record) for record in logs}
+        pending = [record for record in pending if _record_key(record) not in logged]
+        if pending:
+            atomic_write_json(self.path, (logs + pending)[-self.max_entries:], indent=2)
+        self.journal_path.unlink()
+        return len(pending)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Journal a record and flush the batch once it is full."""
+        with self._lock:
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Atomically rewrite the log with buffered records and clear the journal."""
+        with self._lock:
+            if not self._buffer:
+                return 0
+            logs = self._load()
+            logs.extend(self._buffer)
+            atomic_write_json(self.path, logs[-self.max_entries:], indent=2)
+            flushed = len(self._buffer)
+            self._buffer = []
+            self.journal_path.unlink(missing_ok=True)
+            return flushed
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Every record: the log on disk followed by the ones still buffered."""
+        with self._lock:
+            return self._load() + self._buffer
+
+    def _flush_at_exit(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Failed to flush interaction log at exit: {e}")
+
+    async def run_periodic(self) -> None:
+        """Flush whatever is buffered every `flush_interval` seconds."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except Exception as e:
+                print(f"Failed to flush interaction log: {e}")
+
+    def __len__(self) -> int:
+        return len(self._buffer)
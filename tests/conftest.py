@@ -0,0 +1,16 @@
+"""Shared pytest setup: import the bot's flat modules and keep runtime files out of the tree."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run each test in a scratch directory with its own BOT_DATA_DIR."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("BOT_DATA_DIR", str(tmp_path / "var"))
+    return tmp_path / "var"
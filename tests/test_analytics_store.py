@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import analytics_store
+from analytics_store import AnalyticsStore
+
+NOW = datetime.now().replace(microsecond=0)
+
+
+def interaction(seconds_ago, username, category="health", tone="sassy", response="nope bestie"):
+    return {
+        "timestamp": (NOW - timedelta(seconds=seconds_ago)).isoformat(),
+        "username": username,
+        "category": category,
+        "tone_used": tone,
+        "response": response,
+    }
+
+
+@pytest.fixture(params=["numpy", "pure python"])
+def store(request, monkeypatch):
+    if request.param == "pure python":
+        monkeypatch.setattr(analytics_store, "np", None)
+    return AnalyticsStore()
+
+
+def test_group_queries(store):
+    store.ingest([
+        interaction(30, "a"),
+        interaction(20, "b", "spam", "neutral", "one two three four"),
+        interaction(10, "a"),
+    ])
+    assert store.group_count("category") == {"health": 2, "spam": 1}
+    assert store.group_count("user", where={"category": "health"}) == {"a": 2}
+    assert store.group_mean("words", "tone") == {"sassy": 2.0, "neutral": 4.0}
+    assert sum(count for _, count in store.daily_counts(2)) == 3
+
+
+def test_late_record_is_counted_once(store):
+    store.ingest([interaction(10, "a"), interaction(5, "b")])
+    late = interaction(60, "slow_worker")
+    store.append(late)
+    assert len(store) == 3
+    # Re-reading an overlapping slice of the log adds nothing
+    assert store.ingest([interaction(10, "a"), late, interaction(5, "b")]) == 0
+
+
+def test_records_older_than_the_late_window_are_skipped(store):
+    store.append(interaction(5, "a"))
+    store.append(interaction(store.late_seconds + 60, "ancient"))
+    assert len(store) == 1
+
+
+def test_resume_from_reaches_back_over_the_late_window(store):
+    store.append(interaction(5, "a"))
+    assert store.resume_from() < interaction(60, "late")["timestamp"]
+    assert AnalyticsStore().resume_from() == ""
+
+
+def test_snapshot_round_trip_keeps_dedupe_keys(store):
+    records = [interaction(30, "a"), interaction(10, "b")]
+    store.ingest(records)
+    restored = AnalyticsStore()
+    restored.restore_state(store.export_state())
+    assert restored.ingest(records) == 0
+    assert restored.group_count("user") == {"a": 1, "b": 1}
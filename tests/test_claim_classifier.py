@@ -0,0 +1,55 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from claim_classifier import ClaimClassifier, evaluate, split_holdout, training_set, weak_label
+
+# Not in the seed set
+QUESTION_CLAIMS = [
+    "Is it true that coffee stunts your growth?",
+    "Can apple cider vinegar melt belly fat?",
+    "does celery juice detox your liver?",
+    "Is it true you only use 10% of your brain?",
+    "Do carrots give you night vision?",
+    "does cold water make you sick?",
+    "are eggs bad for your heart?",
+    "can essential oils cure anxiety?",
+]
+CHITCHAT_QUESTIONS = ["how are you?", "are you a bot?", "did you see my story?", "where are you from?"]
+
+
+@pytest.fixture(scope="module")
+def model():
+    texts, labels = training_set([])
+    return ClaimClassifier(dim=2 ** 16).fit(texts, labels)
+
+
+def test_question_form_claims_are_not_gated(model):
+    report = evaluate(model, QUESTION_CLAIMS, [1] * len(QUESTION_CLAIMS))
+    assert report["question_claims"] == len(QUESTION_CLAIMS)
+    assert report["question_recall"] >= 0.75
+
+
+def test_chitchat_questions_are_gated(model):
+    assert not any(model.is_claim(text) for text in CHITCHAT_QUESTIONS)
+
+
+def test_saved_model_remembers_its_training_texts(model, tmp_path):
+    model.report = {"messages": 3}
+    model.save(tmp_path / "model.npz")
+    loaded = ClaimClassifier.load(tmp_path / "model.npz")
+    assert loaded.report == {"messages": 3}
+    assert loaded.was_trained_on("essential oils cure cancer")
+    assert not loaded.was_trained_on(QUESTION_CLAIMS[0])
+    assert loaded.is_claim("vaccines cause autism") == model.is_claim("vaccines cause autism")
+
+
+def test_holdout_split_is_deterministic():
+    texts, labels = training_set([])
+    assert split_holdout(texts, labels) == split_holdout(texts, labels)
+
+
+def test_weak_labels():
+    assert weak_label({"content": "lemon water detoxes you", "category": "health_panic"}) == 1
+    assert weak_label({"content": "hey bestie", "category": "safe"}) == 0
+    assert weak_label({"content": "what about the thing", "category": "safe"}) is None
@@ -0,0 +1,70 @@
+import pytest
+
+from claim_extractor import ClaimExtractor, estimate_tokens, score_sentence, split_sentences
+
+FILLER = [
+    "So this weekend was honestly a whole vibe.",
+    "We drove out to the lake with the girls and stayed in a tiny cabin.",
+    "The sunsets were unreal and the playlist was even better.",
+    "Anyway I wanted to share something my yoga teacher told me.",
+    "Link in bio for the full vlog!",
+]
+CLAIM = "Studies show lemon water flushes 100% of toxins from your liver overnight."
+SECOND = "Doctors hate this because big pharma won't tell you it cures cancer."
+
+
+@pytest.fixture
+def extractor():
+    return ClaimExtractor(max_sentences=3, max_tokens=40, min_tokens=20)
+
+
+def test_short_message_passes_through(extractor):
+    claim = extractor.extract("lemon water detoxes your liver")
+    assert claim.text == "lemon water detoxes your liver"
+    assert not claim.trimmed
+
+
+def test_long_message_keeps_the_claims_in_original_order(extractor):
+    text = " ".join(FILLER[:3] + [SECOND] + FILLER[3:] + [CLAIM])
+    claim = extractor.extract(text)
+    assert claim.trimmed
+    assert claim.text.index("Doctors hate") < claim.text.index("Studies show")
+    assert "sunsets" not in claim.text and "Link in bio" not in claim.text
+    assert claim.kept_tokens <= 40
+    assert claim.saved_tokens == claim.original_tokens - claim.kept_tokens
+
+
+def test_filler_is_dropped_even_with_budget_left(extractor):
+    claim = extractor.extract(" ".join(FILLER + [CLAIM]))
+    assert claim.text == CLAIM
+    assert claim.sentences == 1
+
+
+def test_rule_keywords_break_ties(extractor):
+    plain = "My aunt keeps posting about the moon water thing lately."
+    flagged = "My aunt keeps posting about the moonwater ritual lately."
+    text = " ".join(FILLER + [plain, flagged])
+    selected = ClaimExtractor(max_sentences=1, max_tokens=40, min_tokens=20).extract(text, ["moonwater"])
+    assert selected.text == flagged
+
+
+def test_oversized_sentence_is_cut_at_a_word_boundary():
+    sentence = "Essential oils cure " + " ".join(["cancer and diabetes"] * 40) + "."
+    claim = ClaimExtractor(max_sentences=3, max_tokens=20, min_tokens=10).extract(sentence)
+    assert claim.text.endswith("…")
+    assert estimate_tokens(claim.text) <= 21
+
+
+def test_disabled_extractor_sends_everything(monkeypatch):
+    monkeypatch.setenv("ENABLE_CLAIM_EXTRACTION", "false")
+    text = " ".join(FILLER + [CLAIM])
+    assert ClaimExtractor(max_tokens=40, min_tokens=20).extract(text).text == text
+
+
+def test_split_sentences_drops_urls_and_blank_lines():
+    assert split_sentences("Read this https://x.co/abc now.\n\nIt cures colds!") == ["Read this now.", "It cures colds!"]
+
+
+def test_claim_sentences_outscore_filler():
+    assert score_sentence(CLAIM) > max(score_sentence(sentence) for sentence in FILLER)
+    assert score_sentence("OMG.") == 0
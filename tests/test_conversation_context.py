@@ -0,0 +1,72 @@
+import time
+
+from conversation_context import ConversationStore, estimate_tokens
+
+
+def store(**kwargs):
+    return ConversationStore(**{"max_threads": 10, "max_turns": 6, "token_budget": 120, "idle_seconds": 3600, **kwargs})
+
+
+def test_recent_turns_are_returned_in_order():
+    conversations = store()
+    conversations.add_turn("t1", "user", "Garlic cures colds", "health")
+    conversations.add_turn("t1", "bot", "It does not, bestie")
+    assert conversations.context_for("t1") == "User: Garlic cures colds\nYou: It does not, bestie"
+    assert conversations.context_for("unknown") == ""
+
+
+def test_oldest_turn_is_evicted_from_a_full_thread():
+    conversations = store(max_turns=3)
+    for number in range(5):
+        conversations.add_turn("t1", "user", f"message {number}")
+    assert conversations.context_for("t1") == "User: message 2\nUser: message 3\nUser: message 4"
+
+
+def test_older_turns_collapse_into_a_note_within_the_budget():
+    conversations = store(token_budget=40)
+    conversations.add_turn("t1", "user", "Lemon water detoxes your liver completely", "detox")
+    conversations.add_turn("t1", "bot", "Your liver detoxes itself, no lemons needed")
+    conversations.add_turn("t1", "user", "Apple cider vinegar melts belly fat", "weight_loss")
+    conversations.add_turn("t1", "bot", "Sadly vinegar is not a fat solvent")
+
+    context = conversations.context_for("t1")
+    assert estimate_tokens(context) <= 40
+    assert context == (
+        "(earlier: 2 message(s) about detox)\n"
+        "User: Apple cider vinegar melts belly fat\n"
+        "You: Sadly vinegar is not a fat solvent"
+    )
+
+
+def test_latest_turn_is_trimmed_rather_than_dropped():
+    conversations = store(token_budget=20)
+    conversations.add_turn("t1", "user", "word " * 50)
+    context = conversations.context_for("t1")
+    assert context.startswith("User: word")
+    assert context.endswith("…")
+    assert estimate_tokens(context) <= 20
+
+
+def test_least_recently_used_thread_is_evicted():
+    conversations = store(max_threads=2)
+    conversations.add_turn("t1", "user", "one")
+    conversations.add_turn("t2", "user", "two")
+    conversations.context_for("t1")  # reading a thread counts as use
+    conversations.add_turn("t3", "user", "three")
+    assert conversations.context_for("t2") == ""
+    assert conversations.context_for("t1") == "User: one"
+    assert len(conversations) == 2
+
+
+def test_idle_thread_is_forgotten_and_skipped_on_restore():
+    conversations = store()
+    conversations.add_turn("fresh", "user", "still here")
+    conversations.add_turn("stale", "user", "long gone")
+    conversations._threads["stale"][-1].timestamp = time.time() - 7200
+
+    restored = store()
+    restored.restore_state(conversations.export_state())
+    assert restored.context_for("fresh") == "User: still here"
+    assert restored.context_for("stale") == ""
+    assert conversations.context_for("stale") == ""
+    assert len(conversations) == 1
@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from state_backend import SQLiteStateBackend
+from tools.sassy_fact_check import SassyFactChecker
+
+
+def interaction(timestamp, category="health", tone="sassy", username="someone"):
+    return {"timestamp": timestamp, "username": username, "content": "claim", "response": "nope",
+            "tone_used": tone, "category": category, "sources": []}
+
+
+@pytest.fixture
+def checker(monkeypatch):
+    monkeypatch.setenv("STATE_BACKEND", "local")
+    monkeypatch.setenv("STATS_RETENTION_DAYS", "30")
+    return SassyFactChecker()
+
+
+def test_daily_stats_come_from_the_aggregates(checker):
+    now = datetime.now().isoformat()
+    checker._write_interaction(interaction(now, username="a"))
+    checker._write_interaction(interaction(now, category="nutrition", tone="gentle", username="b"))
+    checker._write_interaction(interaction("2000-01-01T10:00:00", username="c"))
+    # Counts cover interactions that only reached the aggregates (e.g. replayed from the log)
+    checker._fold_into_stats(interaction(now))
+
+    stats = asyncio.run(checker.get_daily_stats())
+    assert stats["total_interactions"] == 3
+    assert stats["top_categories"] == [("health", 2), ("nutrition", 1)]
+    assert [reply["username"] for reply in stats["sassiest_responses"]] == ["a"]
+
+
+def test_days_past_retention_are_dropped(checker):
+    checker._fold_into_stats(interaction("2025-01-01T10:00:00"))
+    checker._fold_into_stats(interaction("2025-01-20T10:00:00"))
+    checker._fold_into_stats(interaction("2025-02-15T10:00:00"))
+    assert sorted(checker.daily_stats) == ["2025-01-20", "2025-02-15"]
+
+    restored = SassyFactChecker()
+    restored.stats_retention_days = 10
+    restored.restore_state(checker.export_state())
+    assert sorted(restored.daily_stats) == ["2025-02-15"]
+    assert restored.log_cursor == "2025-02-15T10:00:00"
+
+
+def test_shared_backend_counts_every_interaction_of_the_day(checker, tmp_path):
+    backend = checker.backend = SQLiteStateBackend(tmp_path / "state.db")
+    now = datetime.now().isoformat()
+    for number in range(1005):
+        backend.append_interaction(interaction(now, username=f"user{number}"))
+    backend.append_interaction(interaction(now, category="nutrition", tone="gentle"))
+
+    stats = asyncio.run(checker.get_daily_stats())
+    backend.close()
+    assert stats["total_interactions"] == 1006
+    assert stats["top_categories"] == [("health", 1005), ("nutrition", 1)]
+    assert len(stats["sassiest_responses"]) == 5
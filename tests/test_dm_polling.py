@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from instagram_dm_mcp import InstagramDemoTools
+
+
+@pytest.fixture
+def instagram(monkeypatch):
+    monkeypatch.setenv("INSTAGRAM_REAL_MODE", "false")
+    monkeypatch.setenv("DM_POLL_MIN", "0.01")
+    monkeypatch.setenv("DM_POLL_MAX", "0.01")
+    tools = InstagramDemoTools()
+    tools.demo_dms = [
+        {"username": f"user{index}", "message": f"claim {index}", "timestamp": f"2025-01-27T13:0{index}:00Z",
+         "thread_id": f"thread{index}"}
+        for index in range(3)
+    ]
+    return tools
+
+
+async def poll(instagram, polls=2):
+    """DMs handed out over a couple of poll cycles."""
+    received = []
+
+    async def consume():
+        async for dm in instagram.poll_dms():
+            received.append(dm)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01 * polls + 0.02)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return received
+
+
+def test_each_dm_is_handed_out_once_while_unanswered(instagram):
+    received = asyncio.run(poll(instagram, polls=3))
+    assert [dm["username"] for dm in received] == ["user0", "user1", "user2"]
+    assert instagram.dm_watermark == ""
+
+
+def test_watermark_waits_for_every_older_dm(instagram):
+    first, second, third = asyncio.run(poll(instagram))
+    instagram.ack_dm(third)
+    instagram.ack_dm(second)
+    assert instagram.dm_watermark == ""
+    instagram.ack_dm(first)
+    assert instagram.dm_watermark == third["timestamp"]
+
+
+def test_unanswered_dm_is_refetched_after_restart(instagram):
+    first, second, third = asyncio.run(poll(instagram))
+    instagram.ack_dm(first)
+    instagram.ack_dm(third)
+    assert instagram.dm_watermark == first["timestamp"]
+
+    restarted = InstagramDemoTools()
+    restarted.demo_dms = instagram.demo_dms
+    restarted.restore_state(instagram.export_state())
+    assert [dm["username"] for dm in asyncio.run(poll(restarted))] == ["user1", "user2"]
+
+
+async def answer(instagram, failing, polls=6):
+    """Poll like process_inbox, failing every attempt at the `failing` users and acking the rest."""
+    attempts = []
+
+    async def consume():
+        async for dm in instagram.poll_dms():
+            attempts.append(dm["username"])
+            if dm["username"] in failing:
+                instagram.retry_dm(dm, "Claude unavailable")
+            else:
+                instagram.ack_dm(dm)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.01 * polls + 0.02)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return attempts
+
+
+def test_failed_dm_is_retried_then_dead_lettered_so_the_watermark_advances(instagram, monkeypatch):
+    monkeypatch.setattr(instagram, "max_attempts", 3)
+    attempts = asyncio.run(answer(instagram, failing={"user0"}))
+
+    assert attempts.count("user0") == 3
+    assert attempts.count("user1") == attempts.count("user2") == 1
+    assert instagram.dm_watermark == instagram.demo_dms[2]["timestamp"]
+    assert instagram.unanswered == 0
+    [dead] = instagram.dead_letters
+    assert dead["username"] == "user0" and dead["attempts"] == 3 and dead["error"] == "Claude unavailable"
+
+
+def test_polling_pauses_while_too_many_dms_are_unanswered(instagram, monkeypatch):
+    monkeypatch.setattr(instagram, "max_unanswered", 2)
+    received = asyncio.run(poll(instagram, polls=3))
+    assert [dm["username"] for dm in received] == ["user0", "user1"]
+
+    instagram.ack_dm(received[0])
+    assert [dm["username"] for dm in asyncio.run(poll(instagram))] == ["user2"]
+
+
+def test_check_dms_pages_through_dms_sharing_a_timestamp(instagram):
+    instagram.demo_dms = [
+        {"username": f"user{index}", "message": f"claim {index}", "timestamp": "2025-01-27T13:00:00Z",
+         "thread_id": f"thread{index}"}
+        for index in range(5)
+    ]
+
+    async def page_through():
+        pages, cursor = [], ""
+        while True:
+            dms = await instagram.check_instagram_dms(2, cursor=cursor)
+            if not dms:
+                return pages
+            pages.append([dm["username"] for dm in dms])
+            cursor = instagram.page_cursor(dms, cursor)
+
+    assert asyncio.run(page_through()) == [["user0", "user1"], ["user2", "user3"], ["user4"]]
+
+
+def test_invalid_dm_cursor_is_rejected(instagram):
+    with pytest.raises(ValueError, match="Invalid DM cursor"):
+        asyncio.run(instagram.check_instagram_dms(2, cursor="not-a-cursor"))
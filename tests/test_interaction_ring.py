@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from interaction_ring import InteractionRing
+
+START = datetime(2025, 1, 27, 12, 0, 0)
+
+
+def interaction(number, username=None, **fields):
+    return {
+        "timestamp": (START + timedelta(minutes=number)).isoformat(),
+        "username": username or f"user{number}",
+        "content": f"claim {number}",
+        "response": f"reply {number}",
+        "tone_used": "sassy",
+        "category": "health",
+        "sources": ["Mayo Clinic"],
+        **fields,
+    }
+
+
+def test_records_round_trip_to_the_logged_shape():
+    ring = InteractionRing(capacity=4)
+    ring.append(interaction(0, trace_id="abc"))
+    [record] = list(ring)
+    assert record == {
+        "timestamp": START.isoformat(), "username": "user0", "content": "claim 0", "message_type": "text",
+        "response": "reply 0", "tone_used": "sassy", "category": "health", "sources": ["Mayo Clinic"],
+        "trace_id": "abc",
+    }
+
+
+def test_full_ring_overwrites_the_oldest_record():
+    ring = InteractionRing(capacity=3)
+    for number in range(5):
+        ring.append(interaction(number))
+    assert len(ring) == 3
+    assert ring.total == 5
+    assert [record["username"] for record in ring] == ["user2", "user3", "user4"]
+    assert [record["username"] for record in ring.recent(2)] == ["user4", "user3"]
+
+
+def test_wrap_around_keeps_order_over_many_laps():
+    ring = InteractionRing(capacity=4)
+    for number in range(4 * 5 + 2):
+        ring.append(interaction(number))
+    assert [record["content"] for record in ring] == ["claim 18", "claim 19", "claim 20", "claim 21"]
+    assert ring.recent(0) == []
+    assert len(ring.recent(10)) == 4
+
+
+def test_long_texts_are_capped():
+    ring = InteractionRing(capacity=2, text_chars=10)
+    ring.append(interaction(0, content="x" * 50, response="y" * 50))
+    [record] = list(ring)
+    assert record["content"] == "x" * 10
+    assert record["response"] == "y" * 10
+
+
+def test_user_interner_is_compacted_to_live_records():
+    ring = InteractionRing(capacity=3)
+    for number in range(6):
+        ring.append(interaction(number))
+    # Six distinct users in a ring of three: the next new user triggers compaction
+    ring.append(interaction(6))
+    assert len(ring.interners["user"]) <= 2 * ring.capacity
+    assert sorted(ring.interners["user"].values) == ["user4", "user5", "user6"]
+    assert [record["username"] for record in ring] == ["user4", "user5", "user6"]
+
+
+def test_repeated_users_share_one_code():
+    ring = InteractionRing(capacity=10)
+    for number in range(10):
+        ring.append(interaction(number, username="regular"))
+    assert ring.get_stats()["users"] == 1
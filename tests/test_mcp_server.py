@@ -0,0 +1,70 @@
+import asyncio
+
+import mcp.types as types
+import pytest
+from mcp.shared.exceptions import McpError
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from tool_progress import ToolProgress
+
+
+@pytest.fixture
+def mcp_server(data_dir):
+    """The server module, imported only once BOT_DATA_DIR points at the test's scratch directory."""
+    import mcp_server
+    return mcp_server
+
+
+@pytest.fixture
+def tools(monkeypatch, mcp_server):
+    """Stand-in tools: "slow" blocks until cancelled, "echo" answers at once, "count" reports progress."""
+    started = asyncio.Event()
+    calls = {}
+
+    async def dispatch(name, arguments):
+        if name == "slow":
+            calls["slow"] = mcp_server.server.request_context.request_id
+            started.set()
+            await asyncio.sleep(60)
+        if name == "count":
+            progress = ToolProgress(mcp_server.server, total=3)
+            for number in range(3):
+                await progress.advance(f"item {number}")
+        return [types.TextContent(type="text", text=f"{name}: {arguments.get('text', 'done')}")]
+
+    monkeypatch.setattr(mcp_server, "_dispatch_tool", dispatch)
+    return started, calls
+
+
+def test_cancelled_tool_call_leaves_the_session_serving(mcp_server, tools):
+    started, calls = tools
+
+    async def run():
+        async with create_connected_server_and_client_session(mcp_server.server) as client:
+            slow = asyncio.create_task(client.call_tool("slow", {}))
+            await asyncio.wait_for(started.wait(), 5)
+            await client.send_notification(types.ClientNotification(types.CancelledNotification(
+                method="notifications/cancelled",
+                params=types.CancelledNotificationParams(requestId=calls["slow"])
+            )))
+            with pytest.raises(McpError, match="cancelled"):
+                await asyncio.wait_for(slow, 5)
+            return await asyncio.wait_for(client.call_tool("echo", {"text": "still here"}), 5)
+
+    result = asyncio.run(run())
+    assert result.content[0].text == "echo: still here"
+
+
+def test_progress_notifications_reach_the_client(mcp_server, tools):
+    updates = []
+
+    async def on_progress(progress, total, message):
+        updates.append((progress, total, message))
+
+    async def run():
+        async with create_connected_server_and_client_session(mcp_server.server) as client:
+            return await client.call_tool("count", {}, progress_callback=on_progress)
+
+    result = asyncio.run(run())
+    assert result.content[0].text == "count: done"
+    assert updates == [(1, 3, "item 0"), (2, 3, "item 1"), (3, 3, "item 2")]
@@ -0,0 +1,53 @@
+import random
+
+from metrics import Histogram, _bucket_index, _bucket_value
+
+
+def exact_percentile(values, q):
+    ordered = sorted(values)
+    return ordered[max(1, round(len(ordered) * q / 100)) - 1]
+
+
+def test_empty_histogram():
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0
+    assert histogram.summary()["count"] == 0
+
+
+def test_small_values_are_exact():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert (histogram.min, histogram.max, histogram.count) == (1, 100, 100)
+
+
+def test_quantiles_within_relative_error():
+    rng = random.Random(7)
+    values = [int(rng.lognormvariate(15, 1.2)) for _ in range(20000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.record(value)
+    for q in (50, 90, 99, 99.9):
+        expected = exact_percentile(values, q)
+        assert abs(histogram.percentile(q) - expected) / expected < 0.02
+
+
+def test_percentile_clamped_to_observed_range():
+    histogram = Histogram()
+    histogram.record(1_000_003)
+    assert histogram.percentile(0) == histogram.percentile(100) == 1_000_003
+
+
+def test_negative_values_count_as_zero():
+    histogram = Histogram()
+    histogram.record(-5)
+    assert histogram.min == histogram.max == 0
+
+
+def test_bucket_value_round_trips():
+    for value in (0, 127, 128, 129, 4095, 10**6, 10**9, 2**40 + 12345):
+        representative = _bucket_value(_bucket_index(value))
+        assert _bucket_index(representative) == _bucket_index(value)
+        assert abs(representative - value) <= max(1, value * 0.016)
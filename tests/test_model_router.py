@@ -0,0 +1,151 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from claude_client import ClaudeFactChecker
+from filters import ContentCategory, ToneMode
+from metrics import metrics
+from model_router import DEFAULT_MODELS, ModelRouter
+
+GOOD = ("Bestie, apple cider vinegar does not melt belly fat overnight, that is not how metabolism works "
+        "at all and no study shows it. 💀 Source: Mayo Clinic")
+GENTLE = ("I hear you, and this is a really hard topic. Recovery looks different for everyone, and a trained "
+          "professional can help you find support that fits. Source: NIMH")
+REJECTED = "Nope."
+
+
+class StubClient:
+    """Anthropic client stand-in: each create() returns the next draft or raises the next exception."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.models = []
+        self.prompts = []
+        self.messages = SimpleNamespace(with_raw_response=SimpleNamespace(create=self.create))
+
+    async def create(self, model, max_tokens, messages):
+        self.models.append(model)
+        self.prompts.append(messages[0]["content"])
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = SimpleNamespace(
+            content=[SimpleNamespace(text=outcome)],
+            usage=SimpleNamespace(input_tokens=200, output_tokens=40, cache_read_input_tokens=0)
+        )
+        return SimpleNamespace(retries_taken=0, parse=lambda: response)
+
+
+@pytest.fixture(autouse=True)
+def routing(monkeypatch):
+    metrics.reset()
+    monkeypatch.setenv("ENABLE_MODEL_ROUTING", "true")
+    monkeypatch.setenv("ROUTE_MAX_ESCALATIONS", "1")
+    for route in DEFAULT_MODELS:
+        monkeypatch.delenv(f"MODEL_{route.upper()}", raising=False)
+
+
+def fact_check(client, content="Apple cider vinegar melts belly fat",
+               analysis=(ContentCategory.SAFE, ToneMode.SASSY, "no flags")):
+    checker = ClaudeFactChecker()
+    checker.client = client
+    return checker, asyncio.run(checker.fact_check(content, analysis=analysis))
+
+
+def test_route_choice():
+    router = ModelRouter()
+    assert router.choose("safe", "sassy", "Lemon water detoxes your liver") == "fast"
+    assert router.choose("sensitive", "soft", "Lemon water detoxes your liver") == "balanced"
+    assert router.choose("safe", "sassy", "word " * 61) == "balanced"
+    assert router.choose("safe", "sassy", "It has 3 parts. Each is 20% off. Trust me.") == "balanced"
+
+
+def test_routing_disabled_always_uses_the_fast_route(monkeypatch):
+    monkeypatch.setenv("ENABLE_MODEL_ROUTING", "false")
+    router = ModelRouter()
+    assert router.choose("sensitive", "soft", "word " * 100) == "fast"
+    assert router.escalate("fast", 0) is None
+
+
+def test_escalation_order_and_exhaustion(monkeypatch):
+    monkeypatch.setenv("ROUTE_MAX_ESCALATIONS", "5")
+    router = ModelRouter()
+    assert router.escalate("fast", 0) == "balanced"
+    assert router.escalate("balanced", 1) == "strong"
+    assert router.escalate("strong", 2) is None
+    stats = router.stats
+    assert (stats["fast"].escalations, stats["balanced"].escalations, stats["strong"].rejected) == (1, 1, 1)
+
+    monkeypatch.setenv("ROUTE_MAX_ESCALATIONS", "1")
+    limited = ModelRouter()
+    assert limited.escalate("fast", 0) == "balanced"
+    assert limited.escalate("balanced", 1) is None  # ROUTE_MAX_ESCALATIONS reached
+
+
+def test_record_tracks_calls_latency_and_cost():
+    router = ModelRouter()
+    usage = {"model": router.model_for("fast"), "input_tokens": 1000, "output_tokens": 100, "cached_tokens": 0}
+    router.record("fast", 2_000_000, usage)
+    router.record("fast", 4_000_000, usage)
+    report = router.get_stats()["fast"]
+    assert report["calls"] == 2
+    assert report["mean_latency_ms"] == 3.0
+    assert report["cost_usd"] > 0
+    assert report["cost_per_call_usd"] == pytest.approx(report["cost_usd"] / 2, abs=1e-6)
+
+
+def test_accepted_first_draft_is_not_escalated():
+    client = StubClient(GOOD)
+    _, result = fact_check(client)
+    assert client.models == [DEFAULT_MODELS["fast"]]
+    assert result["route"] == "fast"
+    assert result["sources"] == ["Mayo Clinic"]
+
+
+def test_rejected_draft_escalates_with_a_revision_prompt():
+    client = StubClient(REJECTED, GOOD)
+    checker, result = fact_check(client)
+    assert client.models == [DEFAULT_MODELS["fast"], DEFAULT_MODELS["balanced"]]
+    assert "Your previous draft was rejected" in client.prompts[1]
+    assert result["route"] == "balanced"
+    assert result["response"].endswith("Source: Mayo Clinic")
+    assert len(result["usage"]) == 2
+    assert checker.router.stats["fast"].escalations == 1
+
+
+def test_failed_escalation_keeps_the_first_draft():
+    client = StubClient(REJECTED, ConnectionError("overloaded"))
+    checker, result = fact_check(client)
+    assert result["route"] == "fast"
+    assert result["category"] == "safe"
+    assert result["response"].startswith("Nope.")
+    assert len(result["usage"]) == 1
+    assert checker.router.stats["balanced"].calls == 0
+    assert metrics.get_counter("llm_errors", "safe") == 1
+    assert metrics.get_counter("llm_errors", "ConnectionError") == 0
+
+
+def test_failed_first_call_is_an_error_result():
+    _, result = fact_check(StubClient(ConnectionError("down")))
+    assert result["category"] == "error"
+    assert "usage" not in result
+    assert metrics.get_counter("llm_errors", "safe") == 1
+
+
+def test_sass_on_a_sensitive_topic_is_replaced():
+    sassy = "Bestie, " + GENTLE
+    client = StubClient(sassy, sassy)
+    _, result = fact_check(client, "I stopped eating to lose weight fast",
+                           (ContentCategory.SENSITIVE, ToneMode.SOFT, "eating disorder"))
+    assert client.models == [DEFAULT_MODELS["balanced"], DEFAULT_MODELS["strong"]]
+    assert "difficult topic" in result["response"]
+    assert "Bestie" not in result["response"]
+
+
+def test_gentle_reply_on_a_sensitive_topic_is_kept():
+    client = StubClient(GENTLE)
+    _, result = fact_check(client, "I stopped eating to lose weight fast",
+                           (ContentCategory.SENSITIVE, ToneMode.SOFT, "eating disorder"))
+    assert result["response"] == GENTLE
+    assert result["route"] == "balanced"
@@ -0,0 +1,82 @@
+import pytest
+
+from reply_postprocessor import ReplyPostprocessor, canonical_authority, match_authorities
+
+BODY = (
+    "Bestie, garlic is tasty but it does not cure a cold 💀 Studies show it might shorten symptoms "
+    "a little at most, so rest, fluids and time are still the real cure here."
+)
+
+
+@pytest.fixture
+def processor():
+    return ReplyPostprocessor(max_words=40, min_words=25)
+
+
+@pytest.mark.parametrize("citation, expected", [
+    ("mayo clinic", "mayo"),
+    ("The Mayo Clinic", "mayo"),
+    ("mayoclinic.org", "mayo"),
+    ("Centers for Disease Control and Prevention", "cdc"),
+    ("who.int", "who"),
+    ("WHO", "who"),
+    ("John Hopkins", "hopkins"),
+    ("heart.org", "aha"),
+    ("Harvard T.H. Chan School of Public Health", "harvard"),
+])
+def test_citation_variants_canonicalize(citation, expected):
+    assert canonical_authority(citation) == expected
+
+
+@pytest.mark.parametrize("text", ["experts who study this", "aha moment", "mayo on my sandwich", "harvard grads"])
+def test_short_aliases_only_count_as_the_whole_citation(text):
+    assert canonical_authority(text) is None
+
+
+def test_several_authorities_in_one_citation():
+    assert match_authorities("Mayo Clinic and NIH") == ["mayo", "nih"]
+
+
+def test_citation_is_normalized_and_moved_to_the_end(processor):
+    result = processor.process(f"(Source: the mayo clinic) {BODY}", "sassy")
+    assert result.text.endswith("Source: Mayo Clinic")
+    assert result.text.count("Source") == 1
+    assert result.source_ids == ["mayo"]
+    assert not result.needs_regeneration
+
+
+def test_preamble_and_wrapping_quotes_are_stripped(processor):
+    result = processor.process(f'Here\'s a sassy reply: "{BODY} Source: CDC"', "sassy")
+    assert result.text.startswith("Bestie")
+    assert result.sources == ["CDC"]
+
+
+def test_missing_source_needs_regeneration(processor):
+    result = processor.process(BODY, "sassy")
+    assert "missing 'Source:' citation" in result.problems
+    assert result.needs_regeneration
+
+
+def test_unknown_source_is_kept_without_regenerating(processor):
+    result = processor.process(f"{BODY} Source: My Aunt's Blog", "sassy")
+    assert result.sources == ["My Aunt's Blog"]
+    assert not result.needs_regeneration
+
+
+def test_long_reply_is_trimmed_at_a_sentence_boundary(processor):
+    extra = " And honestly the vampire rumours about garlic are not peer reviewed either, sorry bestie."
+    result = processor.process(f"{BODY}{extra} Source: NIH", "sassy")
+    assert result.trimmed
+    assert result.word_count <= 40
+    assert "vampire" not in result.text
+
+
+def test_short_reply_is_flagged_for_regeneration(processor):
+    result = processor.process("Garlic does not cure colds. Source: NIH", "sassy")
+    assert any("under the 25-word minimum" in problem for problem in result.problems)
+    assert result.needs_regeneration
+
+
+def test_sassy_wording_on_soft_tone(processor):
+    result = processor.process(f"{BODY} Source: NHS", "soft")
+    assert result.unsafe_tone
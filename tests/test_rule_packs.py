@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from rule_packs import CATEGORY_BITS, KeywordAutomaton, RulePackError, compile_rules, load_rules
+
+OVERLAPPING = {
+    "blocked": ["she", "hers"],
+    "sensitive": ["he", "his"],
+    "health_panic": ["detox", "tox", "toxic", "oxi"],
+}
+
+
+def substring_mask(keywords, text):
+    mask = 0
+    for category, words in keywords.items():
+        if any(word in text for word in words):
+            mask |= CATEGORY_BITS[category]
+    return mask
+
+
+def random_texts(keywords, count=2000, seed=3):
+    rng = random.Random(seed)
+    words = [word for group in keywords.values() for word in group] + ["the", "a", "bestie", "cure", "x", " "]
+    alphabet = "abcdehiorstx "
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(words) if rng.random() < 0.3 else "".join(rng.choices(alphabet, k=rng.randint(1, 6)))
+                 for _ in range(rng.randint(0, 8))]
+        texts.append(rng.choice(["", " "]).join(parts))
+    return texts
+
+
+@pytest.fixture(scope="module")
+def default_rules(tmp_path_factory):
+    return load_rules(cache_dir=tmp_path_factory.mktemp("rules_cache"))
+
+
+def test_automaton_matches_substring_search_on_overlapping_keywords():
+    automaton = KeywordAutomaton.build(OVERLAPPING)
+    for text in random_texts(OVERLAPPING) + ["ushers", "detoxify", "oxidize his hers"]:
+        assert automaton.scan(text) == substring_mask(OVERLAPPING, text), text
+
+
+def test_automaton_matches_substring_search_on_default_packs(default_rules):
+    keywords = {category: list(words) for category, words in default_rules.keywords.items()}
+    for text in random_texts(keywords, seed=11):
+        assert default_rules.automaton.scan(text) == substring_mask(keywords, text), text
+
+
+def test_scan_can_stop_early_on_blocked():
+    automaton = KeywordAutomaton.build(OVERLAPPING)
+    found = automaton.scan("she detoxes", CATEGORY_BITS["blocked"])
+    assert found & CATEGORY_BITS["blocked"]
+
+
+def test_match_is_the_same_with_and_without_the_automaton(default_rules):
+    keywords = {category: list(words) for category, words in default_rules.keywords.items()}
+    texts = random_texts(keywords, count=500, seed=5) + ["free followers click here", "lemon water detox"]
+    use_automaton = default_rules.use_automaton
+    try:
+        default_rules.use_automaton = True
+        with_automaton = [default_rules.match(text) for text in texts]
+        default_rules.use_automaton = False
+        with_substrings = [default_rules.match(text) for text in texts]
+    finally:
+        default_rules.use_automaton = use_automaton
+    assert with_automaton == with_substrings
+
+
+def test_keywords_in_lists_every_present_keyword():
+    rules = compile_rules([{"name": "test", "keywords": OVERLAPPING}])
+    assert sorted(rules.keywords_in("a toxic detox")) == ["detox", "oxi", "tox", "toxic"]
+    assert list(rules.keywords_in("no match at all")) == []
+
+
+def test_cached_artifact_loads_the_same_rules(tmp_path):
+    compiled = load_rules(cache_dir=tmp_path)
+    cached = load_rules(cache_dir=tmp_path)
+    assert (compiled.source, cached.source) == ("compiled", "cache")
+    assert cached.keywords == compiled.keywords
+    assert cached.automaton.tables() == compiled.automaton.tables()
+
+
+def test_bad_pattern_is_rejected():
+    with pytest.raises(RulePackError):
+        compile_rules([{"name": "bad", "patterns": {"spam": ["(unclosed"]}}])
@@ -0,0 +1,55 @@
+import pytest
+
+from snapshot import HEADER, SECTION, SnapshotError, SnapshotManager, read_snapshot, write_snapshot
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "state.snap"
+    sections = {"cache": [{"claim": "garlic cures colds", "variants": 2}], "stats": {"2025-01-27": {"health": 3}}}
+    size = write_snapshot(path, sections)
+    assert path.stat().st_size == size
+    _, restored = read_snapshot(path)
+    assert restored == sections
+
+
+def test_flipped_payload_byte_fails_crc(tmp_path):
+    path = tmp_path / "state.snap"
+    write_snapshot(path, {"stats": {"health": 3}})
+    data = bytearray(path.read_bytes())
+    data[HEADER.size + SECTION.size + 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(SnapshotError, match="Corrupt section stats"):
+        read_snapshot(path)
+
+
+def test_truncated_and_foreign_files_are_rejected(tmp_path):
+    path = tmp_path / "state.snap"
+    write_snapshot(path, {"stats": {"health": 3}})
+    path.write_bytes(path.read_bytes()[:-4])
+    with pytest.raises(SnapshotError):
+        read_snapshot(path)
+    path.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(SnapshotError, match="Not a snapshot"):
+        read_snapshot(path)
+
+
+def test_section_names_are_limited_to_16_bytes(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(tmp_path / "state.snap", {"a_very_long_section_name": {}})
+
+
+def test_manager_restores_registered_components(tmp_path):
+    saved = {"count": 41}
+    manager = SnapshotManager(tmp_path / "state.snap")
+    manager.register("counter", lambda: dict(saved), saved.update)
+    assert manager.save()["saved"]
+
+    saved["count"] = 0
+    report = manager.restore()
+    assert report["restored"] and report["sections"] == ["counter"]
+    assert saved["count"] == 41
+
+
+def test_manager_reports_missing_snapshot(tmp_path):
+    report = SnapshotManager(tmp_path / "missing.snap").restore()
+    assert not report["restored"]
@@ -0,0 +1,77 @@
+import time
+
+import pytest
+
+from state_backend import SQLiteStateBackend, StateBackend, lease_owner, process_owner_id
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = SQLiteStateBackend(tmp_path / "state.db")
+    yield backend
+    backend.close()
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def test_claim_is_exclusive_until_released(backend):
+    first, second = lease_owner(), lease_owner()
+    assert first != second
+    assert backend.claim_message("m1", first, 30)
+    assert not backend.claim_message("m1", second, 30)
+    assert not backend.claim_message("m1", first, 30)  # a retry of the same request is a duplicate too
+
+    backend.release_message("m1", first)
+    assert backend.claim_message("m1", second, 30)
+
+
+def test_completed_message_is_never_reclaimed(backend):
+    owner = lease_owner()
+    assert backend.claim_message("m1", owner, 0.01)
+    backend.complete_message("m1", owner)
+    time.sleep(0.02)
+    assert not backend.claim_message("m1", lease_owner(), 30)
+
+
+def test_expired_lease_is_regranted(backend):
+    assert backend.claim_message("m1", lease_owner(), 0.01)
+    time.sleep(0.02)
+    assert backend.claim_message("m1", lease_owner(), 30)
+
+
+def test_only_the_owner_releases_or_completes(backend):
+    owner = lease_owner()
+    assert backend.claim_message("m1", owner, 30)
+    backend.release_message("m1", lease_owner())
+    backend.complete_message("m1", lease_owner())
+    assert not backend.claim_message("m1", lease_owner(), 30)
+    backend.complete_message("m1", owner)
+    backend.release_message("m1", owner)  # completed leases stay done
+    assert not backend.claim_message("m1", lease_owner(), 0.01)
+
+
+def test_release_leases_of_a_dead_process(backend):
+    dead = f"{process_owner_id(999999)}:abcd1234"
+    # Same pid prefix but a different process: must not be released
+    other = f"{process_owner_id(9999990)}:abcd1234"
+    assert backend.claim_message("m1", dead, 30)
+    assert backend.claim_message("m2", other, 30)
+    assert backend.release_leases(process_owner_id(999999)) == 1
+    assert backend.claim_message("m1", lease_owner(), 30)
+    assert not backend.claim_message("m2", lease_owner(), 30)
+
+
+def test_interactions_and_daily_stats(backend):
+    backend.append_interaction({"timestamp": "2025-01-27T10:00:00", "username": "a", "category": "health"})
+    backend.append_interaction({"timestamp": "2025-01-27T11:00:00", "username": "b", "category": "health"})
+    assert [row["username"] for row in backend.interactions_since("2025-01-27T10:30:00")] == ["b"]
+    assert backend.daily_stats("2025-01-27") == {"health": 2}
+
+
+def test_add_followers_returns_only_new_ones(backend):
+    assert backend.add_followers(["a", "b"]) == ["a", "b"]
+    assert backend.add_followers(["b", "c"]) == ["c"]
+    assert backend.add_followers(["a", "b", "c"]) == []
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from tenancy import Account, AccountQuota, Outbox
+from usage_ledger import estimate_cost
+
+USAGE = {"model": "claude-3-5-haiku-20241022", "input_tokens": 1000, "output_tokens": 200, "cached_tokens": 0}
+
+
+def result_with(calls):
+    return {"category": "health_panic", "response": "nope", "usage": [dict(USAGE)] * calls}
+
+
+def test_charge_counts_only_claude_calls():
+    quota = AccountQuota("alice")
+    assert quota.charge({"category": "health_panic", "response": "cached"}) == 0
+    cost = quota.charge(result_with(2))
+    assert cost == pytest.approx(2 * estimate_cost(**USAGE))
+    stats = quota.get_stats()
+    assert stats["calls"] == 2
+    assert stats["tokens_used"] == 2400
+    assert stats["spent_usd"] == pytest.approx(cost)
+
+
+def test_budget_degrades_only_that_account(monkeypatch):
+    monkeypatch.setenv("BUDGET_DEGRADE_MODE", "template_only")
+    alice = AccountQuota("alice", daily_budget_usd=estimate_cost(**USAGE) * 1.5)
+    bob = AccountQuota("bob", daily_budget_usd=estimate_cost(**USAGE) * 1.5)
+    alice.charge(result_with(1))
+    assert alice.degraded_mode() is None
+    alice.charge(result_with(1))
+    assert alice.degraded_mode() == "template_only"
+    assert bob.degraded_mode() is None
+
+
+def test_spend_resets_on_a_new_day():
+    quota = AccountQuota("alice", daily_budget_usd=0.000001)
+    quota.charge(result_with(1))
+    quota.day = "2000-01-01"
+    assert quota.degraded_mode() is None
+    assert quota.get_stats()["calls"] == 0
+
+
+def test_snapshot_keeps_todays_spend_only():
+    quota = AccountQuota("alice")
+    quota.charge(result_with(3))
+    restored = AccountQuota("alice")
+    restored.restore_state(quota.export_state())
+    assert restored.calls == 3
+    stale = AccountQuota("alice")
+    stale.restore_state({**quota.export_state(), "day": "2000-01-01"})
+    assert stale.calls == 0
+
+
+def test_slot_caps_concurrency():
+    quota = AccountQuota("alice", max_inflight=2)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with quota.slot():
+            peak = max(peak, quota.inflight)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert quota.inflight == 0
+
+
+def test_rate_limit_throttles_beyond_the_burst():
+    quota = AccountQuota("alice", rate_per_minute=6000, burst=2)
+
+    async def main():
+        for _ in range(4):
+            async with quota.slot():
+                pass
+
+    asyncio.run(main())
+    assert quota.throttled == 2
+
+
+class FakePool:
+    def __init__(self):
+        self.calls = []
+
+    async def process(self, content, username, message_type, message_id, thread_id, degraded_mode):
+        self.calls.append((message_id, thread_id, degraded_mode))
+        return result_with(1)
+
+
+def test_account_scopes_ids_and_charges_its_own_quota():
+    pool = FakePool()
+    default, alice = Account("default"), Account("alice")
+
+    async def main():
+        await default.process(pool, "claim", "bob", "text", "m1", "t1")
+        await alice.process(pool, "claim", "bob", "text", "m1", "t1")
+        await alice.process(pool, "claim", "carol", "text", "m2")
+
+    asyncio.run(main())
+    assert pool.calls == [("m1", "t1", None), ("alice:m1", "alice:t1", None), ("alice:m2", "alice:carol", None)]
+    assert (default.quota.calls, alice.quota.calls) == (1, 2)
+
+
+def test_outbox_waits_for_room_and_keeps_order():
+    outbox = Outbox(limit=1)
+
+    async def main():
+        await outbox.put({"username": "a"})
+        blocked = asyncio.create_task(outbox.put({"username": "b"}))
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        assert (await outbox.next())["username"] == "a"
+        outbox.done(True)
+        await blocked
+        assert (await outbox.next())["username"] == "b"
+
+    asyncio.run(main())
+    assert outbox.get_stats()["sent"] == 1
@@ -0,0 +1,117 @@
+import asyncio
+from types import SimpleNamespace
+
+from tool_progress import MAX_MESSAGE_CHARS, ToolProgress, run_bounded
+
+
+def job(delay, value, running, peak):
+    async def run():
+        running.append(value)
+        peak[0] = max(peak[0], len(running))
+        try:
+            await asyncio.sleep(delay)
+            if isinstance(value, Exception):
+                raise value
+            return value
+        finally:
+            running.remove(value)
+    return run
+
+
+def test_results_arrive_as_jobs_finish_within_the_limit():
+    running, peak = [], [0]
+    jobs = [job(0.03, "slow", running, peak), job(0.01, "fast", running, peak), job(0.0, "last", running, peak)]
+
+    async def run():
+        return [item async for item in run_bounded(jobs, 2)]
+
+    assert asyncio.run(run()) == [(1, "fast"), (2, "last"), (0, "slow")]
+    assert peak[0] == 2
+
+
+def test_failed_job_is_yielded_not_raised():
+    running, peak = [], [0]
+    boom = ValueError("boom")
+
+    async def run():
+        return [item async for item in run_bounded([job(0, boom, running, peak), job(0, "ok", running, peak)], 2)]
+
+    assert sorted(asyncio.run(run()), key=lambda item: item[0]) == [(0, boom), (1, "ok")]
+
+
+def test_no_new_jobs_once_keep_starting_is_false():
+    running, peak = [], [0]
+    jobs = [job(0, number, running, peak) for number in range(5)]
+    results = []
+
+    async def run():
+        async for item in run_bounded(jobs, 1, keep_starting=lambda: len(results) < 2):
+            results.append(item)
+
+    asyncio.run(run())
+    assert results == [(0, 0), (1, 1)]
+
+
+def test_cancelling_the_consumer_cancels_running_jobs():
+    started, cancelled = [], []
+
+    def endless(number):
+        async def run():
+            started.append(number)
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(number)
+                raise
+        return run
+
+    async def run():
+        async def consume():
+            async for _ in run_bounded([endless(number) for number in range(5)], 2):
+                pass
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    assert started == [0, 1]
+    assert sorted(cancelled) == [0, 1]
+
+
+class FakeSession:
+    def __init__(self):
+        self.sent = []
+
+    async def send_progress_notification(self, token, progress, total, message, related_request_id=None):
+        self.sent.append((token, progress, total, message, related_request_id))
+
+
+def fake_server(token):
+    return SimpleNamespace(request_context=SimpleNamespace(
+        meta=SimpleNamespace(progressToken=token), session=FakeSession(), request_id=7
+    ))
+
+
+def test_progress_counts_items_and_trims_long_messages():
+    server = fake_server("tok")
+    progress = ToolProgress(server, total=2)
+
+    async def run():
+        await progress.advance("first")
+        await progress.advance("x" * (MAX_MESSAGE_CHARS + 10))
+
+    asyncio.run(run())
+    first, second = server.request_context.session.sent
+    assert first == ("tok", 1, 2, "first", "7")
+    assert second[1] == 2 and len(second[3]) == MAX_MESSAGE_CHARS and second[3].endswith("…")
+
+
+def test_progress_is_silent_without_a_token():
+    server = fake_server(None)
+    progress = ToolProgress(server, total=1)
+    asyncio.run(progress.advance("done"))
+    assert not progress.enabled
+    assert progress.completed == 1
+    assert server.request_context.session.sent == []
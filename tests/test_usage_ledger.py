@@ -0,0 +1,105 @@
+from datetime import date
+
+import pytest
+
+import usage_ledger
+from usage_ledger import DEFAULT_PRICING, UsageLedger, estimate_cost
+
+
+class FakeDate(date):
+    current = date(2025, 1, 27)
+
+    @classmethod
+    def today(cls):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    monkeypatch.setattr(usage_ledger, "date", FakeDate)
+    FakeDate.current = date(2025, 1, 27)
+    return FakeDate
+
+
+@pytest.fixture
+def ledger_env(monkeypatch, tmp_path):
+    # Absolute, so the atexit save never writes into the working tree
+    monkeypatch.setenv("USAGE_LEDGER_FILE", str(tmp_path / "ledger.json"))
+    for name in ("DAILY_BUDGET_USD", "DAILY_TOKEN_BUDGET", "BUDGET_DEGRADE_MODE", "USAGE_RETENTION_DAYS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("USAGE_SAVE_INTERVAL", "3600")
+    return monkeypatch
+
+
+def test_cost_uses_per_model_prices():
+    assert estimate_cost("claude-3-5-sonnet-20241022", 1_000_000, 0) == pytest.approx(3.00)
+    assert estimate_cost("claude-3-5-sonnet-20241022", 0, 1_000_000) == pytest.approx(15.00)
+    assert estimate_cost("claude-3-5-sonnet-20241022", 0, 0, 1_000_000) == pytest.approx(0.30)
+    assert estimate_cost("claude-3-haiku-20240307", 2000, 400, 1000) == pytest.approx(
+        (2000 * 0.25 + 400 * 1.25 + 1000 * 0.03) / 1_000_000
+    )
+
+
+def test_unknown_model_is_priced_as_the_default():
+    assert estimate_cost("claude-next", 1_000_000, 1_000_000) == pytest.approx(DEFAULT_PRICING[0] + DEFAULT_PRICING[1])
+
+
+def test_record_aggregates_per_day_user_and_category(ledger_env, clock):
+    ledger = UsageLedger()
+    ledger.record("alice", "health", "claude-3-5-sonnet-20241022", 1000, 100)
+    ledger.record("alice", "health", "claude-3-5-sonnet-20241022", 1000, 100)
+    ledger.record("bob", "spam", "claude-3-haiku-20240307", 1000, 100)
+
+    [top, second] = ledger.top_spenders()
+    assert (top["username"], top["calls"], top["input_tokens"]) == ("alice", 2, 2000)
+    assert second["username"] == "bob"
+    assert [row["category"] for row in ledger.cost_by_category()] == ["health", "spam"]
+    assert ledger.daily_totals()[0]["calls"] == 3
+
+
+@pytest.mark.parametrize("setting, expected", [
+    (None, "cache_only"), ("template_only", "template_only"), ("shrug", "cache_only")
+])
+def test_usd_budget_switches_to_the_degrade_mode(ledger_env, clock, setting, expected):
+    if setting:
+        ledger_env.setenv("BUDGET_DEGRADE_MODE", setting)
+    ledger_env.setenv("DAILY_BUDGET_USD", "0.01")
+    ledger = UsageLedger()
+    ledger.record("alice", "health", "claude-3-5-sonnet-20241022", 1000, 100)
+    assert ledger.degraded_mode() is None
+    ledger.record("alice", "health", "claude-3-5-sonnet-20241022", 3000, 300)
+    assert ledger.degraded_mode() == expected
+    assert ledger.get_budget_status()["degraded_mode"] == expected
+
+    clock.current = date(2025, 1, 28)  # a new day starts with a fresh budget
+    assert ledger.degraded_mode() is None
+
+
+def test_token_budget_switches_to_the_degrade_mode(ledger_env, clock):
+    ledger_env.setenv("DAILY_TOKEN_BUDGET", "1000")
+    ledger = UsageLedger()
+    ledger.record("alice", "health", "claude-3-haiku-20240307", 800, 150)
+    assert ledger.degraded_mode() is None
+    ledger.record("alice", "health", "claude-3-haiku-20240307", 40, 10)
+    assert ledger.degraded_mode() == "cache_only"
+
+
+def test_days_past_retention_are_pruned_when_the_day_changes(ledger_env, clock):
+    ledger_env.setenv("USAGE_RETENTION_DAYS", "2")
+    ledger = UsageLedger()
+    ledger.record("alice", "health", "claude-3-haiku-20240307", 100, 10)
+    clock.current = date(2025, 1, 28)
+    ledger.record("bob", "health", "claude-3-haiku-20240307", 100, 10)
+    assert sorted(ledger.day_totals) == ["2025-01-27", "2025-01-28"]
+
+    clock.current = date(2025, 1, 30)
+    ledger.record("carol", "health", "claude-3-haiku-20240307", 100, 10)
+    assert sorted(ledger.day_totals) == ["2025-01-28", "2025-01-30"]
+    assert {key[0] for key in ledger.entries} == {"2025-01-28", "2025-01-30"}
+
+
+def test_save_and_load_round_trip(ledger_env, clock):
+    ledger = UsageLedger()
+    ledger.record("alice", "health", "claude-3-haiku-20240307", 100, 10)
+    ledger.save()
+    assert UsageLedger().daily_totals() == ledger.daily_totals()
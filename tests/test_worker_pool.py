@@ -0,0 +1,104 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from worker_pool import WorkerPool, shard_for
+
+
+def echo_worker(index, requests, responses):
+    """Stand-in worker: echoes DMs, dies on "die" and hangs on "hang"."""
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        request_id, op, key, kwargs = job
+        if op != "process":
+            continue
+        if kwargs["content"] == "die":
+            os._exit(1)
+        if kwargs["content"] == "hang":
+            time.sleep(60)
+        responses.put((request_id, True, {"response": f"worker {index}: {kwargs['content']}", "category": "health"}))
+
+
+class LocalChecker:
+    """The server-process checker a dead shard falls back to."""
+
+    backend = None
+
+    class ledger:
+        @staticmethod
+        def degraded_mode():
+            return None
+
+    async def process_dm_content(self, content, username, **kwargs):
+        return {"response": f"local: {content}", "category": "health"}
+
+    def record_usage(self, username, result):
+        pass
+
+
+def users_by_shard(workers=2):
+    """A username routed to each shard, in shard order."""
+    users = {}
+    for number in range(100):
+        users.setdefault(shard_for(f"user{number}", workers), f"user{number}")
+    return [users[shard] for shard in range(workers)]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("WORKER_REQUEST_TIMEOUT", "1")
+    pool = WorkerPool(LocalChecker(), workers=2)
+    pool._target = echo_worker
+    yield pool
+    pool.close(timeout=2.0)
+
+
+def test_dead_worker_is_noticed_while_another_keeps_answering(pool):
+    doomed, busy = users_by_shard()
+
+    async def run():
+        pool.start()
+        assert pool.mode == "sharded"
+        # Both workers up before one of them dies
+        await asyncio.gather(pool.process("ping", doomed), pool.process("ping", busy))
+        stop = asyncio.Event()
+
+        async def keep_busy():
+            answers = []
+            while not stop.is_set():
+                answers.append((await pool.process("ping", busy))["response"])
+                await asyncio.sleep(0.02)
+            return answers
+
+        streaming = asyncio.create_task(keep_busy())
+        await asyncio.sleep(0.1)
+        try:
+            died = await asyncio.wait_for(pool.process("die", doomed), 0.8)
+        finally:
+            stop.set()
+        return died, await streaming
+
+    died, answers = asyncio.run(run())
+    assert died["response"] == "local: die"
+    assert len(answers) > 1 and set(answers) == {"worker 1: ping"}
+    assert pool.get_status()["alive"] == [1]
+
+
+def test_hung_worker_times_out_to_local_handling(pool):
+    stuck, other = users_by_shard()
+
+    async def run():
+        pool.start()
+        hung = await pool.process("hang", stuck)
+        return hung, await pool.process("after", stuck), await pool.process("ping", other)
+
+    hung, after, ping = asyncio.run(run())
+    assert hung["response"] == "local: hang"
+    assert after["response"] == "local: after"
+    assert ping["response"] == "worker 1: ping"
+    assert pool.get_status()["alive"] == [1]
@@ -0,0 +1,70 @@
+import json
+
+from write_behind import WriteBehindLog, atomic_write_json
+
+
+def record(index):
+    return {"timestamp": f"2025-01-27T13:00:{index:02d}", "username": f"user{index}"}
+
+
+def make_log(tmp_path, **kwargs):
+    return WriteBehindLog(tmp_path / "interactions.json", journal_path=tmp_path / "interactions.journal", **kwargs)
+
+
+def test_records_are_journaled_until_the_batch_flushes(tmp_path):
+    log = make_log(tmp_path, batch_size=3)
+    log.append(record(1))
+    log.append(record(2))
+    assert not log.path.exists()
+    assert len(log.journal_path.read_text().splitlines()) == 2
+
+    log.append(record(3))
+    assert json.loads(log.path.read_text()) == [record(1), record(2), record(3)]
+    assert not log.journal_path.exists()
+    assert len(log) == 0
+
+
+def test_read_includes_buffered_records(tmp_path):
+    log = make_log(tmp_path, batch_size=2)
+    log.append(record(1))
+    log.append(record(2))
+    log.append(record(3))
+    assert log.read() == [record(1), record(2), record(3)]
+
+
+def test_crash_recovery_replays_the_journal(tmp_path):
+    crashed = make_log(tmp_path, batch_size=10)
+    crashed.append(record(1))
+    crashed.append(record(2))
+    # Process dies here: nothing flushed, journal left behind
+
+    recovered = make_log(tmp_path)
+    assert recovered.recovered == 2
+    assert json.loads(recovered.path.read_text()) == [record(1), record(2)]
+    assert not recovered.journal_path.exists()
+
+
+def test_recovery_skips_records_already_in_the_log(tmp_path):
+    # Crash after the log rewrite but before the journal was removed, with records out of order
+    atomic_write_json(tmp_path / "interactions.json", [record(1), record(3)])
+    journal = tmp_path / "interactions.journal"
+    journal.write_text("".join(json.dumps(entry) + "\n" for entry in (record(3), record(2), record(1))))
+
+    log = make_log(tmp_path)
+    assert log.recovered == 1
+    assert json.loads(log.path.read_text()) == [record(1), record(3), record(2)]
+
+
+def test_torn_final_journal_line_is_ignored(tmp_path):
+    journal = tmp_path / "interactions.journal"
+    journal.write_text(json.dumps(record(1)) + "\n" + '{"timestamp": "2025-01-27T13:00:0')
+    log = make_log(tmp_path)
+    assert log.recovered == 1
+    assert log.read() == [record(1)]
+
+
+def test_log_keeps_only_max_entries(tmp_path):
+    log = make_log(tmp_path, max_entries=3, batch_size=1)
+    for index in range(5):
+        log.append(record(index))
+    assert [entry["username"] for entry in log.read()] == ["user2", "user3", "user4"]